@@ -0,0 +1,98 @@
+# MULTI-GAME BATCHED DETECTION
+# Every game that drew a number in the same scheduler tick is evaluated in one
+# NumPy pass over a combined ticket matrix tagged by game, instead of running
+# the check_* functions ticket by ticket, game by game. Prize rules (who gets
+# which prize, sharing, Full Sheet Bonus) stay with the callers; this module
+# only reports which tickets completed which pattern.
+import logging
+import time
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from prize_plan import EARLY_FIVE, FOUR_CORNERS, TOP_LINE, MIDDLE_LINE, BOTTOM_LINE, FULL_HOUSE
+from ticket_audit import load_ticket_grids
+
+logger = logging.getLogger(__name__)
+
+# Patterns evaluated in the vectorized pass; custom patterns are checked per
+# ticket by the caller (see pattern_engine.check_custom_pattern)
+BATCH_PATTERNS = [EARLY_FIVE, FOUR_CORNERS, TOP_LINE, MIDDLE_LINE, BOTTOM_LINE, FULL_HOUSE]
+
+_LINES = {TOP_LINE: 0, MIDDLE_LINE: 1, BOTTOM_LINE: 2}
+
+
+def completed_pattern_matrix(grids: np.ndarray, game_index: np.ndarray, called: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Boolean (N,) array per pattern, True where the ticket has completed it.
+
+    grids: (N, 3, 9) ticket numbers, 0 for blanks
+    game_index: (N,) row of `called` each ticket belongs to
+    called: (G, 91) called-number flags per game
+    """
+    occupied = grids > 0
+    numbers = np.where(grids <= 90, grids, 0)
+    marked = called[game_index[:, None, None], numbers] & occupied
+
+    row_numbers = occupied.sum(axis=2)
+    row_marked = marked.sum(axis=2)
+    total_numbers = row_numbers.sum(axis=1)
+    total_marked = row_marked.sum(axis=1)
+
+    result = {
+        EARLY_FIVE: total_marked >= 5,
+        FULL_HOUSE: (total_numbers == 15) & (total_marked == 15),
+    }
+    for pattern, row in _LINES.items():
+        result[pattern] = (row_numbers[:, row] == 5) & (row_marked[:, row] == 5)
+
+    # Four corners: first and last numbers of the top and bottom rows
+    tickets = np.arange(len(grids))
+    corners = (row_numbers[:, 0] >= 2) & (row_numbers[:, 2] >= 2)
+    for row in (0, 2):
+        first = occupied[:, row].argmax(axis=1)
+        last = 8 - occupied[:, row, ::-1].argmax(axis=1)
+        corners &= marked[tickets, row, first] & marked[tickets, row, last]
+    result[FOUR_CORNERS] = corners
+    return result
+
+
+def evaluate_games(games: Sequence[Tuple[str, List[dict], Sequence[int]]]) -> Dict[str, dict]:
+    """
+    Evaluate several games in one pass. games is a list of
+    (game_key, ticket_docs, called_numbers); ticket docs carry their grid in
+    either storage form. Returns, per game_key:
+
+    - completed: pattern -> positions (in ticket_docs order) of tickets that
+      have completed it
+    - marks: marked-number count per ticket, in ticket_docs order
+    """
+    started = time.perf_counter()
+    all_docs = [doc for _, docs, _ in games for doc in docs]
+    game_index = np.repeat(np.arange(len(games)), [len(docs) for _, docs, _ in games])
+
+    called = np.zeros((len(games), 91), dtype=bool)
+    for g, (_, _, called_numbers) in enumerate(games):
+        numbers = [n for n in called_numbers if 1 <= n <= 90]
+        called[g, numbers] = True
+
+    grids = load_ticket_grids(all_docs)
+    flags = completed_pattern_matrix(grids, game_index, called)
+    marked = called[game_index[:, None, None], np.where(grids <= 90, grids, 0)] & (grids > 0)
+    marks = marked.sum(axis=(1, 2))
+
+    results = {}
+    offset = 0
+    for game_key, docs, _ in games:
+        end = offset + len(docs)
+        results[game_key] = {
+            "completed": {pattern: np.flatnonzero(flag[offset:end]).tolist() for pattern, flag in flags.items()},
+            "marks": marks[offset:end].tolist(),
+        }
+        offset = end
+
+    logger.debug(
+        f"Batched detection: {len(games)} games, {len(all_docs)} tickets in "
+        f"{(time.perf_counter() - started) * 1000:.1f}ms"
+    )
+    return results
@@ -0,0 +1,112 @@
+# PER-CALL COMMIT
+# Everything one number call changes on a game's session document - the drawn
+# number, last-call time, new winners and the status transition - collected
+# into a single atomic update. Also counts the database writes each call costs.
+#
+# The number is $push-ed, and the update only matches while called_numbers
+# still has the length the call was drawn from. If two calls race, the second
+# matches nothing instead of overwriting the first call's number.
+import logging
+from typing import Any, Dict, List, Optional
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+
+def _is_safe_field_name(name: str) -> bool:
+    """Whether a prize name can be used as a "winners.<prize>" field path."""
+    return bool(name) and "." not in name and not name.startswith("$")
+
+
+class CallCommit:
+    """
+    Pending changes to one session (admin game) or user game document.
+    New winners are written as "winners.<prize>" keys so concurrent writers
+    never overwrite each other's prizes; if a prize name cannot be a field
+    path the whole winners dict is set instead.
+    """
+
+    def __init__(self, key_field: str, key: str, winners: Optional[Dict[str, dict]] = None):
+        self.key_field = key_field
+        self.key = key
+        self.winners = dict(winners or {})   # winners already on the document
+        self.new_winners: Dict[str, dict] = {}
+        self.fields: Dict[str, Any] = {}
+        self.number: Optional[int] = None
+        self.called_before: Optional[int] = None  # length of called_numbers the number was drawn from
+
+    def call(self, number: int, called_numbers: List[int], called_at: Optional[str] = None):
+        """Record the drawn number; called_numbers ends with it."""
+        self.number = number
+        self.called_before = len(called_numbers) - 1
+        self.fields["current_number"] = number
+        if called_at:
+            self.fields["last_call_time"] = called_at
+
+    def applied_in(self, called_numbers: List[int]) -> bool:
+        """Whether a document's called_numbers holds this commit's number where it was drawn."""
+        return len(called_numbers) > self.called_before and called_numbers[self.called_before] == self.number
+
+    def add_winners(self, new_winners: Dict[str, dict]):
+        self.new_winners.update(new_winners)
+
+    def set(self, **fields):
+        """Any other field, e.g. the status transition when the game ends."""
+        self.fields.update(fields)
+
+    @property
+    def all_winners(self) -> Dict[str, dict]:
+        return {**self.winners, **self.new_winners}
+
+    def filter(self) -> Dict[str, Any]:
+        """The document's key, plus the called_numbers length guard when a number was drawn."""
+        if self.number is None:
+            return {self.key_field: self.key}
+        guard = {"called_numbers": {"$size": self.called_before}}
+        if self.called_before == 0:
+            # Older documents may not have the array until their first call
+            return {self.key_field: self.key, "$or": [guard, {"called_numbers": {"$exists": False}}]}
+        return {self.key_field: self.key, **guard}
+
+    def update(self) -> Dict[str, dict]:
+        """The single update document, or {} when there is nothing to write."""
+        fields = dict(self.fields)
+        if self.new_winners:
+            if all(_is_safe_field_name(prize) for prize in self.new_winners):
+                fields.update({f"winners.{prize}": winner for prize, winner in self.new_winners.items()})
+            else:
+                fields["winners"] = self.all_winners
+        update = {"$set": fields} if fields else {}
+        if self.number is not None:
+            update["$push"] = {"called_numbers": self.number}
+        return update
+
+    def operation(self) -> Optional[UpdateOne]:
+        """The update as a bulk_write operation, or None when there is nothing to write."""
+        update = self.update()
+        return UpdateOne(self.filter(), update) if update else None
+
+
+# ============ WRITE METRICS ============
+
+_call_write_stats = {"calls": 0, "writes": 0, "max_writes": 0}
+
+
+def record_call_writes(writes: int):
+    """Count the document writes one number call needed (winner checks included)."""
+    _call_write_stats["calls"] += 1
+    _call_write_stats["writes"] += writes
+    _call_write_stats["max_writes"] = max(_call_write_stats["max_writes"], writes)
+
+
+def get_call_write_stats() -> dict:
+    calls = _call_write_stats["calls"]
+    return {
+        **_call_write_stats,
+        "writes_per_call": round(_call_write_stats["writes"] / calls, 3) if calls else 0.0,
+    }
+
+
+def reset_call_write_stats():
+    _call_write_stats.update({"calls": 0, "writes": 0, "max_writes": 0})
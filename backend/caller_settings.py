@@ -0,0 +1,97 @@
+# CALLER SETTINGS CACHE
+# The global caller settings are read on every TTS request but change only
+# when an admin edits them, so each worker keeps a copy in memory. Writes go
+# through the cache (and bump settings_version in the same update), so the
+# writing worker is current immediately; other workers compare the stored
+# settings_version at most once per check_interval and reload the document
+# only when it has moved.
+import asyncio
+import copy
+import logging
+import os
+import time
+from typing import Optional
+
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+SETTINGS_FILTER = {"settings_id": "global"}
+DEFAULT_CHECK_INTERVAL = 2.0
+
+
+def _touched_fields(update: dict) -> set:
+    return {field for operator in update.values() for field in operator}
+
+
+class CallerSettingsCache:
+    """
+    Process-local copy of the caller_settings document. get() returns a copy
+    callers may modify; update() applies a MongoDB update and caches the result.
+    """
+
+    def __init__(self, db, defaults: dict, check_interval: float = DEFAULT_CHECK_INTERVAL):
+        self.db = db
+        self.defaults = defaults
+        self.check_interval = check_interval
+        self._settings: Optional[dict] = None
+        self._version = 0
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+        self.stats = {"hits": 0, "version_checks": 0, "loads": 0, "writes": 0}
+
+    @classmethod
+    def from_env(cls, db, defaults: dict) -> "CallerSettingsCache":
+        return cls(db, defaults, float(os.environ.get("CALLER_SETTINGS_CHECK_INTERVAL", DEFAULT_CHECK_INTERVAL)))
+
+    def _store(self, doc: Optional[dict]):
+        self._settings = doc if doc else {**SETTINGS_FILTER, **copy.deepcopy(self.defaults), "settings_version": 0}
+        self._version = self._settings.get("settings_version", 0)
+        self._checked_at = time.monotonic()
+
+    async def _load(self):
+        self.stats["loads"] += 1
+        self._store(await self.db.caller_settings.find_one(SETTINGS_FILTER, {"_id": 0}))
+
+    async def get(self, fresh: bool = False) -> dict:
+        """
+        Current settings (defaults if none are stored). fresh=True checks the
+        version now - for read-modify-write paths that must not act on a stale copy.
+        """
+        if not fresh and self._settings is not None and time.monotonic() - self._checked_at < self.check_interval:
+            self.stats["hits"] += 1
+            return copy.deepcopy(self._settings)
+
+        async with self._lock:
+            if self._settings is None:
+                await self._load()
+            elif fresh or time.monotonic() - self._checked_at >= self.check_interval:
+                self.stats["version_checks"] += 1
+                stamp = await self.db.caller_settings.find_one(SETTINGS_FILTER, {"_id": 0, "settings_version": 1})
+                if (stamp or {}).get("settings_version", 0) != self._version:
+                    await self._load()
+                else:
+                    self._checked_at = time.monotonic()
+            return copy.deepcopy(self._settings)
+
+    async def update(self, update: dict) -> dict:
+        """Apply a MongoDB update to the stored settings (created from defaults if missing)."""
+        touched = _touched_fields(update)
+        on_insert = {k: v for k, v in self.defaults.items() if k not in touched}
+        async with self._lock:
+            doc = await self.db.caller_settings.find_one_and_update(
+                SETTINGS_FILTER,
+                {**update, "$inc": {"settings_version": 1}, "$setOnInsert": on_insert},
+                projection={"_id": 0},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+            self.stats["writes"] += 1
+            self._store(doc)
+            return copy.deepcopy(self._settings)
+
+    def invalidate(self):
+        self._settings = None
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "version": self._version}
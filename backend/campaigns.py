@@ -0,0 +1,278 @@
+# BULK CAMPAIGNS
+# Game reminders (and any other one-message-per-booking blast) as resumable
+# campaigns. The recipient list is snapshotted once with a single aggregation,
+# every message is rendered up front and stored with its recipient, and a
+# runner sends them through the notification transport with a bounded
+# concurrency window, chunk by chunk. Each chunk is logged with one
+# whatsapp_logs insert_many and one recipients bulk_write, so an interrupted
+# campaign resumes from where it stopped without sending anyone a message twice.
+#
+# Every worker resumes unfinished campaigns at startup, so a run first takes
+# the campaign's lease (lease_owner / lease_until, renewed per chunk) and
+# only the lease holder sends. Chunks are claimed with a per-chunk token, so
+# a recipient is only ever sent by the run that claimed it.
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+# Campaign status: running -> completed; "interrupted" when a run died mid-way
+RUNNING, COMPLETED, INTERRUPTED = "running", "completed", "interrupted"
+
+# Recipient status: pending -> sending -> sent | failed; skipped without a phone.
+# "unknown" - the process stopped while the message was in flight; it is not
+# resent, since the provider may already have delivered it. "failed" is final
+# for a run; retry_failed_recipients() puts them back to pending on request
+PENDING, SENDING, SENT, FAILED, SKIPPED, UNKNOWN = "pending", "sending", "sent", "failed", "skipped", "unknown"
+
+DEFAULT_WINDOW = 20
+CHUNK_SIZE = 100
+DEFAULT_LEASE_SECONDS = 120
+
+
+async def snapshot_recipients(db, game_id: str) -> List[dict]:
+    """Confirmed, opted-in bookings of a game joined with their user, in one aggregation."""
+    return await db.bookings.aggregate([
+        {"$match": {"game_id": game_id, "status": "confirmed", "whatsapp_opt_in": {"$ne": False}}},
+        {"$lookup": {"from": "users", "localField": "user_id", "foreignField": "user_id", "as": "user"}},
+        {"$unwind": {"path": "$user", "preserveNullAndEmptyArrays": True}},
+        {"$project": {
+            "_id": 0,
+            "booking_id": 1,
+            "user_id": 1,
+            "ticket_count": {"$size": {"$ifNull": ["$ticket_ids", []]}},
+            "name": {"$ifNull": ["$user.name", "Player"]},
+            "phone": "$user.phone",
+        }},
+    ]).to_list(None)
+
+
+async def create_campaign(db, game_id: str, message_type: str, template_name: str,
+                          render: Callable[[dict], str], recipients: Optional[List[dict]] = None) -> dict:
+    """
+    Render each recipient's message with render(recipient) and store the
+    campaign with its recipients (snapshotted here unless given). Nothing is
+    sent yet.
+    """
+    if recipients is None:
+        recipients = await snapshot_recipients(db, game_id)
+    campaign_id = f"cmp_{uuid.uuid4().hex[:10]}"
+    now = datetime.now(timezone.utc)
+
+    docs = []
+    for recipient in recipients:
+        has_phone = bool(recipient.get("phone"))
+        docs.append({
+            **recipient,
+            "campaign_id": campaign_id,
+            "message": render(recipient) if has_phone else None,
+            "status": PENDING if has_phone else SKIPPED,
+        })
+    skipped = sum(1 for d in docs if d["status"] == SKIPPED)
+
+    campaign = {
+        "campaign_id": campaign_id,
+        "game_id": game_id,
+        "message_type": message_type,
+        "template_name": template_name,
+        "status": RUNNING,
+        "total": len(docs),
+        "sent": 0,
+        "failed": 0,
+        "skipped": skipped,
+        "unknown": 0,
+        "created_at": now,
+        "updated_at": now,
+    }
+    await db.campaigns.insert_one(dict(campaign))
+    if docs:
+        await db.campaign_recipients.insert_many(docs)
+    logger.info(f"📣 Campaign {campaign_id} ({message_type}) for {game_id}: {len(docs)} recipients, {skipped} skipped")
+    return campaign
+
+
+class CampaignRunner:
+    """
+    Sends a campaign's pending messages, `window` at a time, through
+    transport.send_whatsapp. limiter (a notification_outbox.TokenBucket) is
+    shared with the outbox so campaigns respect the same provider rate.
+    """
+
+    def __init__(self, db, transport, window: int = DEFAULT_WINDOW, limiter=None, chunk_size: int = CHUNK_SIZE,
+                 lease_seconds: float = DEFAULT_LEASE_SECONDS):
+        self.db = db
+        self.transport = transport
+        self.window = window
+        self.limiter = limiter
+        self.chunk_size = chunk_size
+        self.lease_seconds = lease_seconds
+        self.owner = f"run_{uuid.uuid4().hex[:10]}"
+
+    async def _take_lease(self, campaign_id: str) -> bool:
+        """Take (or renew) the campaign's lease; False while another run holds it."""
+        now = datetime.now(timezone.utc)
+        leased = await self.db.campaigns.find_one_and_update(
+            {"campaign_id": campaign_id, "status": {"$ne": COMPLETED}, "$or": [
+                {"lease_owner": self.owner},
+                {"lease_until": {"$exists": False}},
+                {"lease_until": {"$lt": now}},
+            ]},
+            {"$set": {"lease_owner": self.owner, "lease_until": now + timedelta(seconds=self.lease_seconds)}},
+            projection={"_id": 0, "campaign_id": 1},
+        )
+        return leased is not None
+
+    async def _release_lease(self, campaign_id: str):
+        await self.db.campaigns.update_one(
+            {"campaign_id": campaign_id, "lease_owner": self.owner},
+            {"$unset": {"lease_owner": "", "lease_until": ""}}
+        )
+
+    async def _claim_chunk(self, campaign_id: str) -> List[dict]:
+        """Move up to chunk_size pending recipients to sending under a fresh token and return them."""
+        pending = await self.db.campaign_recipients.find(
+            {"campaign_id": campaign_id, "status": PENDING}, {"_id": 0, "booking_id": 1}
+        ).to_list(self.chunk_size)
+        if not pending:
+            return []
+        claim = uuid.uuid4().hex
+        await self.db.campaign_recipients.update_many(
+            {"campaign_id": campaign_id, "status": PENDING, "booking_id": {"$in": [r["booking_id"] for r in pending]}},
+            {"$set": {"status": SENDING, "claim": claim}}
+        )
+        return await self.db.campaign_recipients.find(
+            {"campaign_id": campaign_id, "status": SENDING, "claim": claim}, {"_id": 0}
+        ).to_list(None)
+
+    async def _send(self, semaphore: asyncio.Semaphore, recipient: dict) -> dict:
+        async with semaphore:
+            if self.limiter:
+                await self.limiter.acquire()
+            try:
+                ok, detail = await self.transport.send_whatsapp(recipient["phone"], recipient["message"])
+            except Exception as e:
+                ok, detail = False, str(e)
+        return {"ok": ok, "sid": detail if ok else None, "error": None if ok else detail}
+
+    async def run(self, campaign_id: str) -> Optional[dict]:
+        """Send everything still pending and return the final campaign document."""
+        campaign = await self.db.campaigns.find_one({"campaign_id": campaign_id}, {"_id": 0})
+        if not campaign or campaign["status"] == COMPLETED:
+            return campaign
+        if not await self._take_lease(campaign_id):
+            logger.info(f"📣 Campaign {campaign_id} is being sent by another run")
+            return campaign
+
+        # A previous run stopped with these in flight - they may have been delivered
+        stale = await self.db.campaign_recipients.update_many(
+            {"campaign_id": campaign_id, "status": SENDING}, {"$set": {"status": UNKNOWN}}
+        )
+        await self.db.campaigns.update_one({"campaign_id": campaign_id}, {
+            "$set": {"status": RUNNING, "updated_at": datetime.now(timezone.utc)},
+            "$inc": {"unknown": stale.modified_count},
+        })
+
+        semaphore = asyncio.Semaphore(self.window)
+        try:
+            while True:
+                if not await self._take_lease(campaign_id):
+                    logger.warning(f"Campaign {campaign_id} lease lost, another run takes over")
+                    return await self.db.campaigns.find_one({"campaign_id": campaign_id}, {"_id": 0})
+                chunk = await self._claim_chunk(campaign_id)
+                if not chunk:
+                    break
+                await self._send_chunk(campaign, chunk, semaphore)
+        except Exception as e:
+            logger.error(f"Campaign {campaign_id} interrupted: {e}")
+            await self.db.campaigns.update_one({"campaign_id": campaign_id}, {"$set": {"status": INTERRUPTED}})
+            await self._release_lease(campaign_id)
+            raise
+
+        await self.db.campaigns.update_one({"campaign_id": campaign_id, "lease_owner": self.owner}, {
+            "$set": {"status": COMPLETED, "completed_at": datetime.now(timezone.utc)},
+            "$unset": {"lease_owner": "", "lease_until": ""},
+        })
+        campaign = await self.db.campaigns.find_one({"campaign_id": campaign_id}, {"_id": 0})
+        logger.info(f"📣 Campaign {campaign_id} completed: {campaign['sent']} sent, {campaign['failed']} failed")
+        return campaign
+
+    async def _send_chunk(self, campaign: dict, chunk: List[dict], semaphore: asyncio.Semaphore):
+        campaign_id = campaign["campaign_id"]
+        results = await asyncio.gather(*(self._send(semaphore, r) for r in chunk))
+        now = datetime.now(timezone.utc)
+
+        logs, updates = [], []
+        for recipient, result in zip(chunk, results):
+            status = SENT if result["ok"] else FAILED
+            updates.append(UpdateOne(
+                {"campaign_id": campaign_id, "booking_id": recipient["booking_id"], "claim": recipient["claim"]},
+                {"$set": {"status": status, "message_sid": result["sid"], "error": result["error"], "finished_at": now}}
+            ))
+            logs.append({
+                "log_id": f"wl_{uuid.uuid4().hex[:8]}",
+                "game_id": campaign["game_id"],
+                "campaign_id": campaign_id,
+                "message_type": campaign["message_type"],
+                "template_name": campaign["template_name"],
+                "recipient_user_id": recipient.get("user_id"),
+                "recipient_phone": recipient["phone"],
+                "recipient_name": recipient.get("name", "Player"),
+                "booking_id": recipient["booking_id"],
+                "message_sid": result["sid"],
+                "sent_at": now,
+                "sent_by_admin": True,
+                "status": status,
+                "delivery_status": "pending" if result["ok"] else "failed",
+                "failure_reason": result["error"],
+            })
+
+        await self.db.campaign_recipients.bulk_write(updates, ordered=False)
+        await self.db.whatsapp_logs.insert_many(logs, ordered=False)
+        sent = sum(1 for r in results if r["ok"])
+        await self.db.campaigns.update_one({"campaign_id": campaign_id}, {
+            "$inc": {"sent": sent, "failed": len(results) - sent},
+            "$set": {"updated_at": now},
+        })
+
+
+def campaign_window() -> int:
+    return int(os.environ.get("CAMPAIGN_WINDOW", DEFAULT_WINDOW))
+
+
+async def unfinished_campaign_ids(db) -> List[str]:
+    """Campaigns a previous process left running or interrupted."""
+    campaigns = await db.campaigns.find(
+        {"status": {"$in": [RUNNING, INTERRUPTED]}}, {"_id": 0, "campaign_id": 1}
+    ).to_list(None)
+    return [c["campaign_id"] for c in campaigns]
+
+
+async def retry_failed_recipients(db, campaign_id: str) -> int:
+    """
+    Put a campaign's failed recipients back to pending (and the campaign back
+    to running) so the next run sends them again. Returns how many.
+    """
+    result = await db.campaign_recipients.update_many(
+        {"campaign_id": campaign_id, "status": FAILED},
+        {"$set": {"status": PENDING}, "$unset": {"error": "", "message_sid": "", "finished_at": ""}}
+    )
+    retried = result.modified_count
+    if retried:
+        await db.campaigns.update_one({"campaign_id": campaign_id}, {
+            "$set": {"status": RUNNING, "updated_at": datetime.now(timezone.utc)},
+            "$inc": {"failed": -retried, "retried": retried},
+        })
+        logger.info(f"📣 Campaign {campaign_id}: {retried} failed recipients queued for retry")
+    return retried
+
+
+def campaign_progress(campaign: Dict) -> Dict:
+    """Campaign document plus how many recipients are still to be sent."""
+    done = campaign["sent"] + campaign["failed"] + campaign["skipped"] + campaign.get("unknown", 0)
+    return {**campaign, "remaining": max(campaign["total"] - done, 0)}
@@ -0,0 +1,159 @@
+# DELIVERY STATUS CALLBACKS
+# Twilio posts a status callback per message state change (queued, sent,
+# delivered, read, failed...). A reminder blast produces thousands within
+# seconds, so the webhook only validates and queues them; a background
+# flusher coalesces the queue per message SID and applies it to whatsapp_logs
+# with one unordered bulk_write per batch. A callback can beat the SID onto
+# its log entry, so unmatched SIDs are retried for a few flushes.
+import asyncio
+import base64
+import hashlib
+import hmac
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Dict, Mapping, Optional
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+# Flushes an update for an unknown SID is kept before it is dropped
+MAX_UNMATCHED_FLUSHES = 3
+
+# Later states win; callbacks can arrive out of order
+DELIVERY_RANK = {
+    "accepted": 0, "queued": 0, "sending": 1, "sent": 2,
+    "delivered": 3, "undelivered": 3, "failed": 3, "read": 4,
+}
+
+
+def validate_twilio_signature(auth_token: str, url: str, params: Mapping[str, str], signature: str) -> bool:
+    """
+    Check X-Twilio-Signature: base64 HMAC-SHA1 of the full callback URL
+    followed by every POST parameter name and value, sorted by name.
+    """
+    payload = url + "".join(f"{key}{params[key]}" for key in sorted(params))
+    digest = hmac.new(auth_token.encode(), payload.encode(), hashlib.sha1).digest()
+    return hmac.compare_digest(base64.b64encode(digest).decode(), signature or "")
+
+
+class DeliveryStatusQueue:
+    """
+    Pending status updates keyed by message SID; only the most advanced
+    state per SID is kept until the next flush.
+    """
+
+    def __init__(self, db, log_writer=None, batch_size: int = 500, flush_interval: float = 1.0,
+                 max_pending: int = 50000):
+        self.db = db
+        self.log_writer = log_writer    # BufferedLogWriter; a log may not be flushed yet
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.pending: Dict[str, dict] = {}
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"received": 0, "coalesced": 0, "rejected": 0, "applied": 0, "flushes": 0, "last_flush_ms": 0.0}
+
+    def enqueue(self, message_sid: str, status: str, error_code: Optional[str] = None) -> bool:
+        """Queue one callback; False when the queue is full (the caller should ask Twilio to retry)."""
+        status = (status or "").lower()
+        if not message_sid or status not in DELIVERY_RANK:
+            return True   # nothing to record, but not worth a retry either
+        self.stats["received"] += 1
+
+        if message_sid in self.pending:
+            self.stats["coalesced"] += 1
+        elif len(self.pending) >= self.max_pending:
+            self.stats["rejected"] += 1
+            return False
+        self._merge(message_sid, {"status": status, "error_code": error_code, "at": datetime.now(timezone.utc), "tries": 0})
+        if len(self.pending) >= self.batch_size:
+            self._wake.set()
+        return True
+
+    def _merge(self, message_sid: str, update: dict):
+        current = self.pending.get(message_sid)
+        if current is not None and DELIVERY_RANK[current["status"]] >= DELIVERY_RANK[update["status"]]:
+            return
+        self.pending[message_sid] = update
+
+    @staticmethod
+    def _fields(update: dict) -> dict:
+        fields = {
+            "delivery_status": update["status"],
+            "delivery_rank": DELIVERY_RANK[update["status"]],
+            "delivery_updated_at": update["at"],
+        }
+        if update["error_code"]:
+            fields["delivery_error_code"] = update["error_code"]
+        return fields
+
+    def _operation(self, message_sid: str, update: dict) -> UpdateOne:
+        rank = DELIVERY_RANK[update["status"]]
+        return UpdateOne(
+            {"message_sid": message_sid,
+             "$or": [{"delivery_rank": {"$exists": False}}, {"delivery_rank": {"$lt": rank}}]},
+            {"$set": self._fields(update)}
+        )
+
+    async def flush(self):
+        """Apply everything queued, batch_size SIDs per bulk_write."""
+        if not self.pending:
+            return
+        started = time.perf_counter()
+        updates, self.pending = self.pending, {}
+
+        if self.log_writer is not None:
+            for message_sid, update in updates.items():
+                for log in self.log_writer.pending("whatsapp_logs", {"message_sid": message_sid}):
+                    if DELIVERY_RANK[update["status"]] > log.get("delivery_rank", -1):
+                        log.update(self._fields(update))
+
+        sids = list(updates)
+        for i in range(0, len(sids), self.batch_size):
+            batch = sids[i:i + self.batch_size]
+            try:
+                result = await self.db.whatsapp_logs.bulk_write(
+                    [self._operation(sid, updates[sid]) for sid in batch], ordered=False
+                )
+                self.stats["applied"] += result.modified_count
+                if result.matched_count < len(batch):
+                    await self._requeue_unknown(batch, updates)
+            except Exception as e:
+                logger.error(f"Delivery status flush failed ({len(batch)} updates): {e}")
+        self.stats["flushes"] += 1
+        self.stats["last_flush_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+    async def _requeue_unknown(self, batch, updates: Dict[str, dict]):
+        """Keep updates whose SID is on no log yet; stale updates that matched nothing are dropped."""
+        known = await self.db.whatsapp_logs.find(
+            {"message_sid": {"$in": batch}}, {"_id": 0, "message_sid": 1}
+        ).to_list(None)
+        known = {log["message_sid"] for log in known}
+        for sid in batch:
+            if sid not in known and updates[sid]["tries"] + 1 < MAX_UNMATCHED_FLUSHES:
+                self._merge(sid, {**updates[sid], "tries": updates[sid]["tries"] + 1})
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "pending": len(self.pending)}
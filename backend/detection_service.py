@@ -0,0 +1,240 @@
+# WINNER DETECTION SERVICE
+# The one place prizes are awarded. Manual calls (auto_detect_winners), the
+# admin auto-caller and the user-game auto-caller all load their tickets their
+# own way, then hand them here. Admin games come with their incremental
+# DetectionState, whose completed sets and FSB tracker already say which
+# tickets won; other games are evaluated in one batched pass
+# (batch_detection.py). Prizes are awarded by the game type's GameRules.
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from batch_detection import evaluate_games
+from detection_state import NEAR_WIN_PATTERNS, DetectionState, resolve_full_sheet_id
+from pattern_engine import PatternMasks, check_custom_pattern
+from prize_plan import FULL_HOUSE, FULL_SHEET_BONUS
+from ticket_generator import get_ticket_grid
+
+logger = logging.getLogger(__name__)
+
+
+class GameRules:
+    """
+    How a game type awards prizes.
+
+    full_house: "shared" - every ticket completing on the same call shares
+                the next Full House; "sequential" - those tickets take the
+                next Full Houses one each, in ticket order
+    fsb_*:      Full Sheet Bonus: a holder's sheet of exactly 6 tickets with
+                fsb_min_marks_per_ticket marks on each and fsb_min_total_marks
+                in total. fsb_always checks the bonus even when the game has
+                no such prize; fsb_group_by_user_id groups sheets by user_id
+                before the holder name; fsb_infer_sheet_id groups tickets
+                without a full_sheet_id by ticket number;
+                fsb_require_positions needs sheet positions 1-6
+    holder:     ticket fields holding the player's display name, in order
+    """
+
+    def __init__(self, name: str, full_house: str, fsb_min_marks_per_ticket: int, fsb_min_total_marks: int,
+                 fsb_always: bool, fsb_group_by_user_id: bool, fsb_infer_sheet_id: bool,
+                 fsb_require_positions: bool, holder: Tuple[str, ...]):
+        self.name = name
+        self.full_house = full_house
+        self.fsb_min_marks_per_ticket = fsb_min_marks_per_ticket
+        self.fsb_min_total_marks = fsb_min_total_marks
+        self.fsb_always = fsb_always
+        self.fsb_group_by_user_id = fsb_group_by_user_id
+        self.fsb_infer_sheet_id = fsb_infer_sheet_id
+        self.fsb_require_positions = fsb_require_positions
+        self.holder = holder
+
+    def holder_name(self, ticket: dict) -> Optional[str]:
+        for field in self.holder:
+            if ticket.get(field):
+                return ticket[field]
+        return None
+
+
+ADMIN_GAME_RULES = GameRules(
+    "admin", full_house="shared", fsb_min_marks_per_ticket=1, fsb_min_total_marks=6,
+    fsb_always=True, fsb_group_by_user_id=True, fsb_infer_sheet_id=True, fsb_require_positions=False,
+    holder=("holder_name", "booked_by_name"),
+)
+
+USER_GAME_RULES = GameRules(
+    "user", full_house="sequential", fsb_min_marks_per_ticket=2, fsb_min_total_marks=0,
+    fsb_always=False, fsb_group_by_user_id=False, fsb_infer_sheet_id=False, fsb_require_positions=True,
+    holder=("assigned_to",),
+)
+
+
+def _winner_entry(ticket: dict, rules: GameRules, prize_name: str, won_at: str) -> dict:
+    holder_name = rules.holder_name(ticket)
+    return {
+        "user_id": ticket.get("user_id"),
+        "ticket_id": ticket.get("ticket_id"),
+        "ticket_number": ticket.get("ticket_number"),
+        "holder_name": holder_name,
+        "name": holder_name,
+        "pattern": prize_name,
+        "won_at": won_at,
+    }
+
+
+def _pattern_positions(pattern: str, completed: Dict[str, List[int]], tickets: List[dict], called_set: set,
+                       plan: dict, pattern_masks: Optional[PatternMasks]) -> List[int]:
+    """Positions of tickets completing a pattern; custom patterns use the game's masks when built."""
+    if pattern in completed:
+        return completed[pattern]
+    if pattern not in plan["custom_patterns"]:
+        return []
+    if pattern_masks is not None and pattern_masks.definitions == plan["custom_patterns"]:
+        called_mask = sum(1 << n for n in called_set)
+        return [i for i, t in enumerate(tickets) if pattern_masks.is_complete(pattern, t.get("ticket_id"), called_mask)]
+    return [i for i, t in enumerate(tickets)
+            if check_custom_pattern(get_ticket_grid(t), called_set, pattern, plan["custom_patterns"])]
+
+
+def _full_house_ticket_ids(plan: dict, winners: dict) -> set:
+    """Tickets that already won any Full House; they cannot win another."""
+    ticket_ids = set()
+    for prize_name in plan["full_house_order"]:
+        winner_data = winners.get(prize_name) or {}
+        for w in (winner_data.get("winners", []) if winner_data.get("shared") else [winner_data]):
+            if w.get("ticket_id"):
+                ticket_ids.add(w["ticket_id"])
+    return ticket_ids
+
+
+def _open_single_prizes(plan: dict, winners: dict) -> Dict[str, str]:
+    """Pattern -> prize name of the single-winner prizes not won yet, in evaluation order."""
+    return {
+        pattern: prize_name for pattern, prize_name in plan["by_pattern"].items()
+        if pattern != FULL_SHEET_BONUS and prize_name not in winners
+    }
+
+
+def full_sheet_bonus_winner(tickets: List[dict], marks: List[int], rules: GameRules) -> Optional[dict]:
+    """The first sheet (in ticket order) that meets the rules' Full Sheet Bonus conditions, or None."""
+    sheets: Dict[Tuple[str, str], List[int]] = {}
+    for i, ticket in enumerate(tickets):
+        holder = rules.holder_name(ticket)
+        if rules.fsb_group_by_user_id:
+            holder = ticket.get("user_id") or holder
+        if rules.fsb_infer_sheet_id:
+            sheet_id, _ = resolve_full_sheet_id(ticket)
+        else:
+            sheet_id = ticket.get("full_sheet_id")
+        if holder and sheet_id:
+            sheets.setdefault((holder, sheet_id), []).append(i)
+
+    for (holder, sheet_id), positions in sheets.items():
+        if len(positions) != 6:
+            continue
+        if rules.fsb_require_positions and {tickets[i].get("ticket_position_in_sheet") for i in positions} != {1, 2, 3, 4, 5, 6}:
+            continue
+        sheet_marks = [marks[i] for i in positions]
+        if min(sheet_marks) >= rules.fsb_min_marks_per_ticket and sum(sheet_marks) >= rules.fsb_min_total_marks:
+            first = tickets[positions[0]]
+            # Without a name on the ticket admin callers resolve it from user_id
+            holder_name = rules.holder_name(first) or (None if rules.fsb_group_by_user_id else holder)
+            return {
+                "user_id": first.get("user_id"),
+                "full_sheet_id": sheet_id,
+                "holder_name": holder_name,
+                "name": holder_name,
+                "pattern": "Full Sheet Bonus",
+            }
+    return None
+
+
+def award_prizes(plan: dict, rules: GameRules, tickets: List[dict], result: dict, called_numbers: Sequence[int],
+                 existing_winners: dict, pattern_masks: Optional[PatternMasks] = None) -> Dict[str, dict]:
+    """
+    New winners for one game on this call. result is the game's entry from
+    batch_detection.evaluate_games() or incremental_result(); tickets are in
+    the same order.
+    """
+    called_set = set(called_numbers)
+    won_at = datetime.now(timezone.utc).isoformat()
+    new_winners: Dict[str, dict] = {}
+    completed = result["completed"]
+
+    # Single-winner patterns - the first ticket found takes the prize. Aliased
+    # prize names share one pattern; only the plan's by_pattern name is awarded
+    for pattern, prize_name in _open_single_prizes(plan, existing_winners).items():
+        positions = _pattern_positions(pattern, completed, tickets, called_set, plan, pattern_masks)
+        if positions:
+            new_winners[prize_name] = _winner_entry(tickets[positions[0]], rules, prize_name, won_at)
+
+    # Full House - tickets completing on this call, minus earlier Full House winners
+    open_houses = [name for name in plan["full_house_order"] if name not in existing_winners]
+    already_won = _full_house_ticket_ids(plan, existing_winners)
+    candidates = [tickets[i] for i in completed.get(FULL_HOUSE, []) if tickets[i].get("ticket_id") not in already_won]
+    if open_houses and candidates:
+        if rules.full_house == "sequential":
+            for prize_name, ticket in zip(open_houses, candidates):
+                new_winners[prize_name] = _winner_entry(ticket, rules, prize_name, won_at)
+        elif len(candidates) == 1:
+            new_winners[open_houses[0]] = _winner_entry(candidates[0], rules, open_houses[0], won_at)
+        else:
+            # Multiple winners on the same call SHARE the prize
+            shared = [_winner_entry(ticket, rules, open_houses[0], won_at) for ticket in candidates]
+            for w in shared:
+                del w["pattern"], w["won_at"]
+            new_winners[open_houses[0]] = {
+                "shared": True,
+                "winners": shared,
+                "holder_name": ", ".join([w["holder_name"] or "Player" for w in shared]),
+                "pattern": open_houses[0],
+                "won_at": won_at,
+            }
+
+    # Full Sheet Bonus
+    fsb_prize = plan["full_sheet_bonus"] if rules.fsb_always else plan["by_pattern"].get(FULL_SHEET_BONUS)
+    if fsb_prize and fsb_prize not in existing_winners:
+        winner = result["fsb"] if "fsb" in result else full_sheet_bonus_winner(tickets, result["marks"], rules)
+        if winner:
+            new_winners[fsb_prize] = {**winner, "won_at": won_at}
+
+    return new_winners
+
+
+def incremental_result(state: DetectionState, plan: dict, existing_winners: dict) -> dict:
+    """
+    The evaluate_games() entry for a game with a DetectionState synced to its
+    calls: completed positions of the built-in patterns still open, and the
+    Full Sheet Bonus winner from the tracker instead of per-ticket marks.
+    """
+    open_patterns = set(_open_single_prizes(plan, existing_winners))
+    if any(name not in existing_winners for name in plan["full_house_order"]):
+        open_patterns.add(FULL_HOUSE)
+    return {
+        "completed": {pattern: state.completed_positions(pattern)
+                      for pattern in NEAR_WIN_PATTERNS if pattern in open_patterns},
+        "fsb": state.tracker.first_eligible(),
+    }
+
+
+def detect_winners(games: Sequence[dict]) -> Dict[str, Dict[str, dict]]:
+    """
+    Award prizes for several games. Each game is a dict with key, plan, rules,
+    called_numbers, existing_winners and either state (a DetectionState synced
+    to called_numbers) or tickets; games without a state are evaluated in one
+    batched pass. Returns new winners per key.
+    """
+    batched = [g for g in games if g.get("state") is None]
+    results = evaluate_games([(g["key"], g["tickets"], g["called_numbers"]) for g in batched]) if batched else {}
+    new_winners = {}
+    for g in games:
+        state = g.get("state")
+        if state is not None:
+            tickets, result, masks = state.tickets, incremental_result(state, g["plan"], g["existing_winners"]), state.masks
+        else:
+            tickets, result, masks = g["tickets"], results[g["key"]], None
+        new_winners[g["key"]] = award_prizes(
+            g["plan"], g["rules"], tickets, result, g["called_numbers"], g["existing_winners"], masks
+        )
+        for prize_name, winner in new_winners[g["key"]].items():
+            logger.info(f"🎉 Winner: {winner.get('holder_name')} - {prize_name} ({g['rules'].name} game {g['key']})")
+    return new_winners
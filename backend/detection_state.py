@@ -0,0 +1,516 @@
+# INCREMENTAL DETECTION STATE
+# In-memory state kept per live game so each call only touches the tickets
+# that contain the called number, instead of regrouping and recounting every
+# booked ticket on every call. A game's DetectionState is built once (at go
+# live, or on the first call a process handles) and is what admin game prizes
+# are awarded from; it is rebuilt only when the game's bookings change. Every
+# write that changes a game's booked tickets or their holders calls
+# touch_bookings(), which bumps the game's bookings_version so the states
+# other workers hold stop being current.
+import logging
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from ticket_generator import get_ticket_grid
+from ticket_store import TicketStore, fill_ticket_grids
+from pattern_engine import PatternMasks
+from prize_plan import (
+    EARLY_FIVE, FOUR_CORNERS, TOP_LINE, MIDDLE_LINE, BOTTOM_LINE, FULL_HOUSE, get_prize_plan
+)
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_full_sheet_id(ticket: dict) -> Tuple[Optional[str], bool]:
+    """
+    Return (full_sheet_id, inferred). Tickets without a full_sheet_id get one
+    inferred from their ticket_number: T001-T006 = FS001, T007-T012 = FS002...
+    """
+    full_sheet_id = ticket.get("full_sheet_id")
+    if full_sheet_id:
+        return full_sheet_id, False
+
+    num_str = "".join(filter(str.isdigit, ticket.get("ticket_number") or ""))
+    if not num_str:
+        return None, False
+    sheet_num = ((int(num_str) - 1) // 6) + 1
+    return f"FS{sheet_num:03d}", True
+
+
+# ============ FULL SHEET BONUS ============
+
+class _SheetState:
+    __slots__ = ("group_key", "sheet_id", "user_id", "holder_name", "inferred", "order", "marks", "ticket_numbers",
+                 "qualified_at")
+
+    def __init__(self, group_key: str, sheet_id: str, user_id: Optional[str], holder_name: str, inferred: bool,
+                 order: int):
+        self.group_key = group_key
+        self.sheet_id = sheet_id
+        self.user_id = user_id                   # of the sheet's first ticket
+        self.holder_name = holder_name
+        self.inferred = inferred
+        self.order = order                       # position of the sheet's first ticket among all sheets
+        self.marks: Dict[str, int] = {}          # ticket_id -> marked count
+        self.ticket_numbers: Dict[str, str] = {}  # ticket_id -> ticket_number
+        self.qualified_at: Optional[int] = None  # call count when the sheet became eligible
+
+
+class FullSheetBonusTracker:
+    """
+    Per-sheet, per-ticket mark counters for one game's Full Sheet Bonus.
+
+    Tickets are grouped by holder (user_id, else holder name) and full sheet.
+    A sheet qualifies once it holds exactly 6 tickets, each with at least
+    min_marks_per_ticket marks and min_total_marks in total; see
+    check_full_sheet_bonus() for the rule itself.
+    """
+
+    def __init__(self, game_id: str, min_marks_per_ticket: int = 1, min_total_marks: int = 6):
+        self.game_id = game_id
+        self.min_marks_per_ticket = min_marks_per_ticket
+        self.min_total_marks = min_total_marks
+        self.called: Set[int] = set()
+        self.sheets: Dict[Tuple[str, str], _SheetState] = {}
+        self._by_number: Dict[int, List[Tuple[_SheetState, str]]] = {}
+        self._eligible: List[_SheetState] = []
+
+    def add_ticket(self, ticket: dict, grid: List[List[Optional[int]]], holder_name: str):
+        """Register a booked ticket. Call before any numbers are marked."""
+        group_key = ticket.get("user_id") or holder_name
+        sheet_id, inferred = resolve_full_sheet_id(ticket)
+        if not group_key or not sheet_id:
+            return
+
+        sheet = self.sheets.get((group_key, sheet_id))
+        if sheet is None:
+            sheet = self.sheets[(group_key, sheet_id)] = _SheetState(
+                group_key, sheet_id, ticket.get("user_id"), holder_name, inferred, len(self.sheets)
+            )
+
+        ticket_id = ticket.get("ticket_id")
+        sheet.marks[ticket_id] = 0
+        sheet.ticket_numbers[ticket_id] = ticket.get("ticket_number", "")
+        for row in grid:
+            for num in row:
+                if num:
+                    self._by_number.setdefault(num, []).append((sheet, ticket_id))
+
+    def _qualifies(self, sheet: _SheetState) -> bool:
+        marks = sheet.marks.values()
+        return (
+            len(sheet.marks) == 6
+            and min(marks) >= self.min_marks_per_ticket
+            and sum(marks) >= self.min_total_marks
+        )
+
+    def mark(self, number: int) -> List[_SheetState]:
+        """Apply one called number; returns sheets that qualified on this call."""
+        if number in self.called:
+            return []
+        self.called.add(number)
+
+        newly_eligible = []
+        for sheet, ticket_id in self._by_number.get(number, ()):
+            sheet.marks[ticket_id] += 1
+            if sheet.qualified_at is None and self._qualifies(sheet):
+                sheet.qualified_at = len(self.called)
+                newly_eligible.append(sheet)
+        # Sheets qualifying on the same call rank in ticket order
+        newly_eligible.sort(key=lambda sheet: sheet.order)
+        self._eligible.extend(newly_eligible)
+        return newly_eligible
+
+    def sync(self, called_numbers: Iterable[int]) -> List[_SheetState]:
+        """Mark any called numbers this tracker has not seen yet, in call order."""
+        newly_eligible = []
+        for number in called_numbers:
+            if number not in self.called:
+                newly_eligible.extend(self.mark(number))
+        return newly_eligible
+
+    def first_eligible(self) -> Optional[dict]:
+        """Winner info for the earliest sheet to qualify (first in ticket order on a tie), or None."""
+        if not self._eligible:
+            return None
+        sheet = self._eligible[0]
+        return {
+            "user_id": sheet.user_id,
+            "full_sheet_id": sheet.sheet_id,
+            "holder_name": sheet.holder_name,
+            "name": sheet.holder_name,
+            "pattern": "Full Sheet Bonus"
+        }
+
+    def sheet_summaries(self) -> List[dict]:
+        """Eligibility breakdown for every complete (6-ticket) sheet."""
+        summaries = []
+        for sheet in self.sheets.values():
+            if len(sheet.marks) != 6:
+                continue
+            marks_per_ticket = list(sheet.marks.values())
+            total_marks = sum(marks_per_ticket)
+            without_marks = [sheet.ticket_numbers[t] for t, m in sheet.marks.items() if m < self.min_marks_per_ticket]
+            eligible = not without_marks and total_marks >= self.min_total_marks
+            summaries.append({
+                "user_id": sheet.group_key,
+                "sheet_id": sheet.sheet_id,
+                "sheet_id_was_inferred": sheet.inferred,
+                "tickets": list(sheet.ticket_numbers.values()),
+                "marks_per_ticket": marks_per_ticket,
+                "total_marks": total_marks,
+                "all_have_1_plus_mark": not without_marks,
+                "tickets_without_marks": without_marks,
+                "fsb_eligible": eligible,
+                "qualified_at_call": sheet.qualified_at,
+                "reason_if_not_eligible": None if eligible else (
+                    f"Tickets {without_marks} have 0 marks" if without_marks else f"Total marks {total_marks} < {self.min_total_marks}"
+                )
+            })
+        return summaries
+
+
+# ============ NEAR-WIN INDEX ============
+
+def _row_numbers(row: List[Optional[int]]) -> List[int]:
+    return [num for num in row if num]
+
+
+def _corner_numbers(grid: List[List[Optional[int]]]) -> List[int]:
+    """First and last numbers of the top and bottom rows, as in check_four_corners()."""
+    top, bottom = _row_numbers(grid[0]), _row_numbers(grid[2])
+    if len(top) < 2 or len(bottom) < 2:
+        return []
+    return [top[0], top[-1], bottom[0], bottom[-1]]
+
+
+def _all_numbers(grid: List[List[Optional[int]]]) -> List[int]:
+    return [num for row in grid for num in row if num]
+
+
+# Canonical pattern ID (see prize_plan.py) -> (numbers the pattern uses, how
+# many of them must be marked). Prizes map onto these through the game's plan
+NEAR_WIN_PATTERNS = {
+    EARLY_FIVE: lambda grid: (_all_numbers(grid), 5),
+    TOP_LINE: lambda grid: (_row_numbers(grid[0]), 5),
+    MIDDLE_LINE: lambda grid: (_row_numbers(grid[1]), 5),
+    BOTTOM_LINE: lambda grid: (_row_numbers(grid[2]), 5),
+    FOUR_CORNERS: lambda grid: (_corner_numbers(grid), 4),
+    FULL_HOUSE: lambda grid: (_all_numbers(grid), 15),
+}
+
+
+class _PatternProgress:
+    __slots__ = ("unmarked", "marked", "need")
+
+    def __init__(self, numbers: List[int], need: int):
+        self.unmarked = set(numbers)
+        self.marked = 0
+        self.need = need
+
+
+class NearWinIndex:
+    """
+    For every pattern, a map from a missing number to the tickets that would
+    complete the pattern when that number is called. Maintained per call, so
+    the next call's winners are waiting[pattern][number].
+    """
+
+    def __init__(self, game_id: str):
+        self.game_id = game_id
+        self.called: Set[int] = set()
+        self.holders: Dict[str, str] = {}  # ticket_id -> user_id / holder name
+        self.waiting: Dict[str, Dict[int, Set[str]]] = {pattern: {} for pattern in NEAR_WIN_PATTERNS}
+        self.completed: Dict[str, Set[str]] = {pattern: set() for pattern in NEAR_WIN_PATTERNS}
+        self._by_number: Dict[int, List[Tuple[str, str, _PatternProgress]]] = {}
+
+    def add_ticket(self, ticket: dict, grid: List[List[Optional[int]]], holder_name: str):
+        """Register a booked ticket. Call before any numbers are marked."""
+        ticket_id = ticket.get("ticket_id")
+        self.holders[ticket_id] = ticket.get("user_id") or holder_name
+        for pattern, numbers_for in NEAR_WIN_PATTERNS.items():
+            numbers, need = numbers_for(grid)
+            if len(numbers) < need:
+                continue
+            progress = _PatternProgress(numbers, need)
+            for num in numbers:
+                self._by_number.setdefault(num, []).append((pattern, ticket_id, progress))
+            if need == 1:
+                self._wait(pattern, ticket_id, progress)
+
+    def _wait(self, pattern: str, ticket_id: str, progress: _PatternProgress):
+        for num in progress.unmarked:
+            self.waiting[pattern].setdefault(num, set()).add(ticket_id)
+
+    def _unwait(self, pattern: str, ticket_id: str, numbers: Iterable[int]):
+        for num in numbers:
+            waiting = self.waiting[pattern].get(num)
+            if waiting:
+                waiting.discard(ticket_id)
+                if not waiting:
+                    del self.waiting[pattern][num]
+
+    def mark(self, number: int) -> Dict[str, Set[str]]:
+        """Apply one called number; returns the tickets that completed each pattern on it."""
+        if number in self.called:
+            return {}
+        self.called.add(number)
+
+        completed_now: Dict[str, Set[str]] = {}
+        for pattern, ticket_id, progress in self._by_number.get(number, ()):
+            if progress.marked >= progress.need:
+                continue
+            progress.unmarked.discard(number)
+            progress.marked += 1
+            if progress.marked == progress.need - 1:
+                self._wait(pattern, ticket_id, progress)
+            elif progress.marked == progress.need:
+                self._unwait(pattern, ticket_id, progress.unmarked | {number})
+                self.completed[pattern].add(ticket_id)
+                completed_now.setdefault(pattern, set()).add(ticket_id)
+        return completed_now
+
+    def sync(self, called_numbers: Iterable[int]):
+        """Mark any called numbers this index has not seen yet."""
+        for number in called_numbers:
+            if number not in self.called:
+                self.mark(number)
+
+    def counts(self, pattern: str) -> dict:
+        """How many tickets and players are one number away from a pattern."""
+        tickets = set().union(*self.waiting[pattern].values()) if self.waiting[pattern] else set()
+        return {
+            "tickets": len(tickets),
+            "players": len({self.holders[t] for t in tickets}),
+            "by_number": {num: len(ids) for num, ids in sorted(self.waiting[pattern].items())},
+        }
+
+
+# ============ PLAYER CACHE ============
+
+PLAYER_FIELDS = {"_id": 0, "user_id": 1, "name": 1, "phone": 1, "email": 1}
+
+
+class PlayerCache:
+    """
+    Name, phone and email of a game's players, filled at game start with one
+    users query so winner enrichment and notifications never look players up
+    per ticket or per winner.
+    """
+
+    def __init__(self, game_id: str):
+        self.game_id = game_id
+        self.players: Dict[str, dict] = {}  # user_id -> user fields ({} if the user no longer exists)
+
+    def missing(self, user_ids: Iterable[Optional[str]]) -> List[str]:
+        return list({uid for uid in user_ids if uid and uid not in self.players})
+
+    def add(self, users: Iterable[dict], requested: Iterable[str] = ()):
+        """Store fetched users; requested ids without a user are remembered as unknown."""
+        for uid in requested:
+            self.players.setdefault(uid, {})
+        for user in users:
+            self.players[user["user_id"]] = user
+
+    def get(self, user_id: Optional[str]) -> dict:
+        return self.players.get(user_id, {}) if user_id else {}
+
+    def name(self, user_id: Optional[str], default: str = "Player") -> str:
+        return self.get(user_id).get("name") or default
+
+
+async def fetch_players(db, user_ids: List[str]) -> List[dict]:
+    """One $in query for the given users."""
+    if not user_ids:
+        return []
+    return await db.users.find({"user_id": {"$in": user_ids}}, PLAYER_FIELDS).to_list(None)
+
+
+# ============ LIVE GAME STATE ============
+
+GRID_FIELDS = ("numbers", "numbers_packed")
+
+# Ticket fields detection builds winners and sheets from
+DETECTION_TICKET_FIELDS = {
+    "_id": 0, "ticket_id": 1, "ticket_number": 1, "game_id": 1, "user_id": 1, "holder_name": 1,
+    "booked_by_name": 1, "assigned_to": 1, "full_sheet_id": 1, "ticket_position_in_sheet": 1,
+}
+
+
+class DetectionState:
+    """
+    A live admin game's booked tickets (without their grids, in ticket order)
+    with the game's FSB tracker, near-win index and custom pattern masks.
+    sync() advances everything by the newly called numbers; prizes are then
+    awarded from the index's completed sets and the tracker's first eligible
+    sheet (see detection_service.incremental_result).
+    """
+
+    def __init__(self, game_id: str, tickets: List[dict], custom_patterns: Dict[str, dict], players: PlayerCache,
+                 bookings_version: int = 0):
+        self.game_id = game_id
+        self.booked_count = len(tickets)      # a different booked count means the bookings changed
+        self.bookings_version = bookings_version
+        self.custom_patterns = custom_patterns
+        self.tickets: List[dict] = []
+        self.positions: Dict[str, int] = {}   # ticket_id -> index in self.tickets
+        self.tracker = FullSheetBonusTracker(game_id)
+        self.index = NearWinIndex(game_id)
+        self.masks = PatternMasks(game_id, custom_patterns)
+
+        for ticket in tickets:
+            grid = get_ticket_grid(ticket)
+            if not grid or len(grid) < 3:
+                continue
+            holder_name = ticket.get("holder_name") or ticket.get("booked_by_name") or players.name(ticket.get("user_id"))
+            doc = {k: v for k, v in ticket.items() if k not in GRID_FIELDS}
+            doc["holder_name"] = holder_name
+            self.positions[doc.get("ticket_id")] = len(self.tickets)
+            self.tickets.append(doc)
+            self.tracker.add_ticket(doc, grid, holder_name)
+            self.index.add_ticket(doc, grid, holder_name)
+            self.masks.add_ticket(doc.get("ticket_id"), grid)
+
+    def is_current(self, booked_count: int, plan: dict, bookings_version: int = 0) -> bool:
+        """Whether the state still matches the game's bookings and custom patterns."""
+        return (self.booked_count == booked_count and self.bookings_version == bookings_version
+                and self.custom_patterns == plan["custom_patterns"])
+
+    def sync(self, called_numbers: Iterable[int]):
+        """Mark the called numbers this state has not seen yet, in call order."""
+        called_numbers = list(called_numbers)
+        self.index.sync(called_numbers)
+        for sheet in self.tracker.sync(called_numbers):
+            logger.info(f"Full Sheet Bonus: sheet {sheet.sheet_id} of {sheet.holder_name or sheet.group_key} "
+                        f"qualified at call {sheet.qualified_at} in {self.game_id}")
+
+    def completed_positions(self, pattern: str) -> List[int]:
+        """Positions (in self.tickets) of the tickets that have completed a built-in pattern."""
+        return sorted(self.positions[ticket_id] for ticket_id in self.index.completed.get(pattern, ()))
+
+
+# ============ REGISTRY ============
+
+_states: Dict[str, DetectionState] = {}
+_player_caches: Dict[str, PlayerCache] = {}
+
+
+def get_detection_state(game_id: str) -> Optional[DetectionState]:
+    return _states.get(game_id)
+
+
+def get_player_cache(game_id: str) -> PlayerCache:
+    """The game's player cache, created empty if the game has none yet."""
+    cache = _player_caches.get(game_id)
+    if cache is None:
+        cache = _player_caches[game_id] = PlayerCache(game_id)
+    return cache
+
+
+async def resolve_players(db, game_id: str, user_ids: Iterable[Optional[str]]) -> PlayerCache:
+    """The game's player cache, with any of user_ids it lacks fetched in one query."""
+    cache = get_player_cache(game_id)
+    missing = cache.missing(user_ids)
+    if missing:
+        cache.add(await fetch_players(db, missing), requested=missing)
+    return cache
+
+
+def drop_detection_state(game_id: str):
+    """Forget a game's incremental state (game ended or its bookings changed)."""
+    _states.pop(game_id, None)
+    _player_caches.pop(game_id, None)
+
+
+async def touch_bookings(db, game_id: str):
+    """
+    Record that a game's booked tickets (or their holders) changed: bumps
+    bookings_version for every worker and drops this worker's state.
+    """
+    await db.games.update_one({"game_id": game_id}, {"$inc": {"bookings_version": 1}})
+    drop_detection_state(game_id)
+
+
+async def get_bookings_version(db, game_id: str) -> int:
+    game = await db.games.find_one({"game_id": game_id}, {"_id": 0, "bookings_version": 1})
+    return (game or {}).get("bookings_version", 0)
+
+
+async def load_booked_ticket_docs(db, game_id: str, compact: bool = False,
+                                  ticket_store: Optional[TicketStore] = None) -> List[dict]:
+    """
+    A game's booked tickets with their grids: from the ticket store when one
+    is given, else only "numbers_packed" for compact games, else "numbers".
+    """
+    grid_field = {} if ticket_store is not None else {"numbers_packed" if compact else "numbers": 1}
+    fields = {**DETECTION_TICKET_FIELDS, **grid_field}
+    tickets = await db.tickets.find({"game_id": game_id, "is_booked": True}, fields).to_list(None)
+    if ticket_store is not None:
+        missing = fill_ticket_grids(ticket_store, tickets)
+        if missing:
+            logger.warning(f"Ticket store for {game_id} lacks {len(missing)} tickets, loading them from Mongo")
+            grids = await db.tickets.find(
+                {"ticket_id": {"$in": missing}},
+                {"_id": 0, "ticket_id": 1, "numbers": 1, "numbers_packed": 1}
+            ).to_list(len(missing))
+            grids_by_id = {g["ticket_id"]: g for g in grids}
+            for ticket in tickets:
+                ticket.update(grids_by_id.get(ticket["ticket_id"], {}))
+    return tickets
+
+
+async def load_detection_state(db, game_id: str, called_numbers: Iterable[int] = (), plan: Optional[dict] = None,
+                               tickets: Optional[List[dict]] = None, compact: bool = False,
+                               ticket_store: Optional[TicketStore] = None, keep: bool = True,
+                               bookings_version: Optional[int] = None) -> DetectionState:
+    """
+    Build a game's detection state and player cache from its booked tickets
+    (loaded here unless given), replay the calls so far and register it.
+    With keep=False neither the state nor the players are kept in memory -
+    for one-off reads of games that are not live. bookings_version must be
+    read before the tickets; it is read here unless given.
+    """
+    if plan is None or bookings_version is None:
+        game = await db.games.find_one(
+            {"game_id": game_id}, {"_id": 0, "prizes": 1, "prize_plan": 1, "custom_patterns": 1, "bookings_version": 1}
+        ) or {}
+        plan = plan or get_prize_plan(game)
+        bookings_version = game.get("bookings_version", 0) if bookings_version is None else bookings_version
+    if tickets is None:
+        tickets = await load_booked_ticket_docs(db, game_id, compact, ticket_store)
+
+    user_ids = [t.get("user_id") for t in tickets]
+    if keep:
+        players = await resolve_players(db, game_id, user_ids)
+    else:
+        players = PlayerCache(game_id)
+        missing = players.missing(user_ids)
+        players.add(await fetch_players(db, missing), requested=missing)
+    state = DetectionState(game_id, tickets, plan["custom_patterns"], players, bookings_version)
+    state.sync(called_numbers)
+    if not keep:
+        return state
+    _states[game_id] = state
+    logger.info(f"Detection state built for {game_id}: {len(state.tickets)} tickets, {len(state.tracker.sheets)} sheet groups")
+    return state
+
+
+async def ensure_detection_state(db, game_id: str, called_numbers: Iterable[int], plan: dict,
+                                 booked_count: Optional[int] = None, compact: bool = False,
+                                 ticket_store: Optional[TicketStore] = None,
+                                 bookings_version: Optional[int] = None) -> DetectionState:
+    """
+    The game's detection state caught up to called_numbers. It is (re)built
+    when this process has none or the game's bookings_version, booked ticket
+    count or custom patterns changed since it was built (bookings may change
+    in any worker).
+    """
+    if bookings_version is None:
+        bookings_version = await get_bookings_version(db, game_id)
+    if booked_count is None:
+        booked_count = await db.tickets.count_documents({"game_id": game_id, "is_booked": True})
+    state = _states.get(game_id)
+    if state is None or not state.is_current(booked_count, plan, bookings_version):
+        return await load_detection_state(db, game_id, called_numbers, plan, compact=compact,
+                                          ticket_store=ticket_store, bookings_version=bookings_version)
+    state.sync(called_numbers)
+    return state
@@ -0,0 +1,119 @@
+# FAKE NOTIFICATION PROVIDER
+# A local stand-in for the Twilio Messages and SendGrid Mail Send APIs that
+# records every message and can add latency and failures, for load-testing
+# notification throughput offline.
+#
+#   uvicorn fake_provider:app --port 9911
+#   TWILIO_API_BASE=http://localhost:9911 SENDGRID_API_BASE=http://localhost:9911 ...
+#
+#   python fake_provider.py --messages 2000 --concurrency 50 --latency-ms 40
+#       runs the transport against the fake in-process and prints messages/sec
+#
+# Behaviour can be changed at runtime with POST /_fake/config
+# {"latency_ms": 50, "failure_rate": 0.1}; GET /_fake/messages lists what was
+# received and DELETE /_fake/messages clears it.
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from urllib.parse import parse_qs
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+app = FastAPI(title="Fake notification provider")
+
+fake_config = {"latency_ms": 0.0, "failure_rate": 0.0}
+received = []
+
+
+async def _simulate() -> bool:
+    """Apply the configured latency; False when this request should fail."""
+    if fake_config["latency_ms"]:
+        await asyncio.sleep(fake_config["latency_ms"] / 1000)
+    return random.random() >= fake_config["failure_rate"]
+
+
+@app.post("/2010-04-01/Accounts/{account_sid}/Messages.json")
+async def twilio_messages(account_sid: str, request: Request):
+    form = {k: v[0] for k, v in parse_qs((await request.body()).decode()).items()}
+    if not await _simulate():
+        return JSONResponse({"code": 20500, "message": "Injected failure"}, status_code=500)
+    sid = f"SM{uuid.uuid4().hex}"
+    received.append({"provider": "twilio", "sid": sid, "to": form.get("To"), "body": form.get("Body"),
+                     "received_at": time.time()})
+    return JSONResponse({"sid": sid, "status": "queued"}, status_code=201)
+
+
+@app.post("/v3/mail/send")
+async def sendgrid_mail_send(request: Request):
+    payload = await request.json()
+    if not await _simulate():
+        return JSONResponse({"errors": [{"message": "Injected failure"}]}, status_code=500)
+    message_id = uuid.uuid4().hex
+    received.append({"provider": "sendgrid", "sid": message_id,
+                     "to": payload["personalizations"][0]["to"][0]["email"], "body": payload.get("subject"),
+                     "received_at": time.time()})
+    return JSONResponse(None, status_code=202, headers={"X-Message-Id": message_id})
+
+
+@app.post("/_fake/config")
+async def set_fake_config(request: Request):
+    fake_config.update({k: float(v) for k, v in (await request.json()).items() if k in fake_config})
+    return fake_config
+
+
+@app.get("/_fake/messages")
+async def list_fake_messages():
+    return {"count": len(received), "messages": received[-100:]}
+
+
+@app.delete("/_fake/messages")
+async def clear_fake_messages():
+    received.clear()
+    return {"count": 0}
+
+
+async def measure_throughput(messages: int, concurrency: int) -> dict:
+    """Send `messages` WhatsApp messages through NotifyTransport to this app, in-process."""
+    import httpx
+    from notify_transport import NotifyTransport
+
+    transport = NotifyTransport(twilio_base="http://fake", transport=httpx.ASGITransport(app=app))
+    transport.twilio_sid, transport.twilio_token, transport.whatsapp_from = "ACfake", "fake", "+10000000000"
+    semaphore = asyncio.Semaphore(concurrency)
+    results = []
+
+    async def send(i: int):
+        async with semaphore:
+            results.append((await transport.send_whatsapp(f"+91{9000000000 + i}", f"Load test {i}"))[0])
+
+    started = time.perf_counter()
+    await asyncio.gather(*(send(i) for i in range(messages)))
+    elapsed = time.perf_counter() - started
+    await transport.close()
+    return {
+        "messages": messages,
+        "delivered": sum(results),
+        "failed": messages - sum(results),
+        "seconds": round(elapsed, 3),
+        "per_second": round(messages / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Notification throughput against the fake provider")
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    fake_config.update({"latency_ms": args.latency_ms, "failure_rate": args.failure_rate})
+    print(json.dumps(asyncio.run(measure_throughput(args.messages, args.concurrency)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
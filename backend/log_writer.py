@@ -0,0 +1,219 @@
+# BUFFERED LOG WRITER
+# Audit entries (whatsapp_logs, game_control_logs) are appended to an in-memory
+# buffer on the request path and written by a background flusher with
+# insert_many, when a collection's batch is full or every flush_interval
+# seconds. A full buffer makes writers wait (backpressure) instead of growing
+# without bound, and the buffer is flushed on shutdown.
+#
+# Entries are still visible before they reach the database: find_one() and
+# update_one() look in the buffer first, so "already sent" checks and
+# delivery-status updates behave as if every entry were written immediately.
+# A batch that is being written stays visible to reads until insert_many
+# returns, so a lookup never misses an entry on its way to the database.
+#
+# insert_many(ordered=False) can store part of a batch and fail the rest. Only
+# the entries it reports as failed are retried; a duplicate key means the
+# entry was stored by an earlier attempt, and an entry that keeps failing is
+# moved to dead_letters so it cannot hold the buffer (and its writers) forever.
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional
+
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+LATENCY_SAMPLES = 500
+DUPLICATE_KEY = 11000
+MAX_DEAD_LETTERS = 500
+
+
+def _matches(doc: dict, query: dict) -> bool:
+    """Equality, $ne and $in on top-level fields - the filters audit lookups use."""
+    for key, cond in query.items():
+        value = doc.get(key)
+        if isinstance(cond, dict) and "$ne" in cond:
+            if value == cond["$ne"]:
+                return False
+        elif isinstance(cond, dict) and "$in" in cond:
+            if value not in cond["$in"]:
+                return False
+        elif value != cond:
+            return False
+    return True
+
+
+def _apply_update(doc: dict, update: dict):
+    doc.update(update.get("$set", {}))
+    for key, inc in update.get("$inc", {}).items():
+        doc[key] = doc.get(key, 0) + inc
+
+
+class BufferedLogWriter:
+    """
+    Per-collection write buffers flushed with insert_many. start() launches
+    the flusher, stop() cancels it and flushes what is left.
+    """
+
+    def __init__(self, db, max_batch: int = 200, flush_interval: float = 1.0, max_buffer: int = 5000,
+                 max_attempts: int = 5):
+        self.db = db
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.max_attempts = max_attempts
+        self.buffers: Dict[str, List[dict]] = {}
+        self.inflight: Dict[str, List[dict]] = {}   # batches insert_many is writing
+        self.dead_letters: List[dict] = []          # {"collection", "doc", "error"} of entries given up on
+        self._failures: Dict[int, int] = {}         # id(entry) -> rejected insert attempts
+        self._lock = asyncio.Lock()        # held while a flush is writing
+        self._wake = asyncio.Event()
+        self._space = asyncio.Event()
+        self._space.set()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"written": 0, "flushes": 0, "errors": 0, "backpressure_waits": 0, "max_batch_written": 0,
+                      "dead_lettered": 0}
+        self._latencies: List[float] = []
+
+    @property
+    def buffered(self) -> int:
+        return sum(len(b) for b in self.buffers.values())
+
+    # ============ WRITES ============
+
+    async def write(self, collection: str, doc: dict):
+        """Queue one entry; waits while the buffer is full."""
+        while self.buffered >= self.max_buffer:
+            self.stats["backpressure_waits"] += 1
+            self._space.clear()
+            self._wake.set()
+            await self._space.wait()
+        buffer = self.buffers.setdefault(collection, [])
+        buffer.append(doc)
+        if len(buffer) >= self.max_batch:
+            self._wake.set()
+
+    async def flush(self):
+        """Write every buffered entry now."""
+        async with self._lock:
+            for collection in list(self.buffers):
+                batch, self.buffers[collection] = self.buffers[collection], []
+                if not batch:
+                    continue
+                started = time.perf_counter()
+                self.inflight[collection] = batch
+                try:
+                    await self.db[collection].insert_many(batch, ordered=False)
+                except BulkWriteError as e:
+                    self.stats["errors"] += 1
+                    retry = self._partial_failure(collection, batch, e.details.get("writeErrors", []))
+                    self.buffers[collection] = retry + self.buffers[collection]
+                    self._record(len(batch) - len(retry), (time.perf_counter() - started) * 1000)
+                    continue
+                except Exception as e:
+                    # Keep the entries for the next flush rather than losing the audit trail
+                    self.stats["errors"] += 1
+                    self.buffers[collection] = batch + self.buffers[collection]
+                    logger.error(f"Log flush to {collection} failed ({len(batch)} entries): {e}")
+                    continue
+                finally:
+                    del self.inflight[collection]
+                for doc in batch:
+                    self._failures.pop(id(doc), None)
+                self._record(len(batch), (time.perf_counter() - started) * 1000)
+        if self.buffered < self.max_buffer:
+            self._space.set()
+
+    def _partial_failure(self, collection: str, batch: List[dict], write_errors: List[dict]) -> List[dict]:
+        """
+        Entries of a partly written batch to insert again. Entries without an
+        error, or rejected as duplicates (stored by an earlier attempt), are
+        done; one rejected max_attempts times is dead-lettered.
+        """
+        errors = {error["index"]: error for error in write_errors if error.get("code") != DUPLICATE_KEY}
+        retry = []
+        for index, doc in enumerate(batch):
+            error = errors.get(index)
+            if error is None:
+                self._failures.pop(id(doc), None)
+                continue
+            attempts = self._failures.get(id(doc), 0) + 1
+            if attempts < self.max_attempts:
+                self._failures[id(doc)] = attempts
+                retry.append(doc)
+                continue
+            self._failures.pop(id(doc), None)
+            self.stats["dead_lettered"] += 1
+            self.dead_letters.append({"collection": collection, "doc": doc, "error": error.get("errmsg")})
+            del self.dead_letters[:-MAX_DEAD_LETTERS]
+            logger.error(f"Log entry dropped from {collection} after {attempts} attempts: {error.get('errmsg')}")
+        logger.error(f"Log flush to {collection} partly failed: {len(errors)} of {len(batch)} entries rejected, "
+                     f"{len(retry)} will be retried")
+        return retry
+
+    def _record(self, count: int, latency_ms: float):
+        self.stats["written"] += count
+        self.stats["flushes"] += 1
+        self.stats["max_batch_written"] = max(self.stats["max_batch_written"], count)
+        self._latencies.append(latency_ms)
+        if len(self._latencies) > LATENCY_SAMPLES:
+            self._latencies = self._latencies[-LATENCY_SAMPLES:]
+
+    # ============ READS AND UPDATES ============
+
+    def pending(self, collection: str, query: dict) -> List[dict]:
+        """Buffered and in-flight entries of a collection matching a simple query."""
+        docs = self.inflight.get(collection, []) + self.buffers.get(collection, [])
+        return [doc for doc in docs if _matches(doc, query)]
+
+    async def find_one(self, collection: str, query: dict, projection: Optional[dict] = None) -> Optional[dict]:
+        """Like collection.find_one, but sees entries that are not flushed yet."""
+        pending = self.pending(collection, query)
+        if pending:
+            # insert_many may already have added an ObjectId _id to an in-flight entry
+            return {k: v for k, v in pending[0].items() if k != "_id"}
+        return await self.db[collection].find_one(query, projection)
+
+    async def update_one(self, collection: str, query: dict, update: dict):
+        """Update a buffered entry in place, or the stored one once it is flushed."""
+        async with self._lock:
+            pending = self.pending(collection, query)
+            if pending:
+                _apply_update(pending[0], update)
+                return
+            await self.db[collection].update_one(query, update)
+
+    # ============ FLUSHER ============
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+        logger.info(f"Log writer stopped; {self.stats['written']} entries written")
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    def get_stats(self) -> dict:
+        latencies = sorted(self._latencies)
+        flushes = self.stats["flushes"]
+        return {
+            **self.stats,
+            "buffered": self.buffered,
+            "avg_batch": round(self.stats["written"] / flushes, 1) if flushes else 0.0,
+            "flush_ms_avg": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+            "flush_ms_p95": round(latencies[int(0.95 * (len(latencies) - 1))], 2) if latencies else 0.0,
+            "flush_ms_max": round(latencies[-1], 2) if latencies else 0.0,
+        }
@@ -0,0 +1,265 @@
+# NOTIFICATION OUTBOX
+# Handlers never talk to Twilio/SendGrid themselves: they insert a message into
+# the notification_outbox collection and return. A small pool of async workers
+# claims queued messages, delivers them through the pooled async transport
+# (notify_transport.py) with bounded concurrency and a per-provider rate limit,
+# retries failures with exponential backoff and keeps the matching
+# whatsapp_logs entry up to date.
+import asyncio
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from pymongo import ReturnDocument
+
+from notify_transport import NotifyTransport
+
+logger = logging.getLogger(__name__)
+
+# Outbox message status: queued -> sending -> sent | failed | expired
+QUEUED, SENDING, SENT, FAILED, EXPIRED = "queued", "sending", "sent", "failed", "expired"
+
+CHANNEL_PROVIDERS = {"whatsapp": "twilio", "email": "sendgrid"}
+
+MAX_ATTEMPTS = 5
+BASE_RETRY_DELAY = 2.0      # seconds; doubles per attempt
+MAX_RETRY_DELAY = 300.0
+STALE_SENDING_AFTER = 120   # seconds a claimed message may stay "sending" before it is requeued
+
+
+def retry_delay(attempts: int, base: float = BASE_RETRY_DELAY, cap: float = MAX_RETRY_DELAY) -> float:
+    """Backoff before the next try after `attempts` failed deliveries."""
+    return min(cap, base * (2 ** max(attempts - 1, 0)))
+
+
+class TokenBucket:
+    """Allows `rate` sends per second on average, with bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        async with self._lock:
+            self._refill()
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+
+class NotificationOutbox:
+    """
+    Outbox collection plus its worker pool. enqueue_*() only writes the
+    message; start() launches `workers` delivery tasks, stop() drains them.
+    Without a transport, start() opens a NotifyTransport and stop() closes it.
+    """
+
+    def __init__(self, db, workers: int = 4, rate_limits: Optional[Dict[str, float]] = None,
+                 max_attempts: int = MAX_ATTEMPTS, poll_interval: float = 5.0,
+                 transport: Optional[NotifyTransport] = None, log_writer=None):
+        self.db = db
+        self.log_writer = log_writer    # BufferedLogWriter; whatsapp_logs entries may still be buffered
+        self.transport = transport
+        self._owns_transport = transport is None
+        self.collection = db.notification_outbox
+        self.workers = workers
+        self.limiters = {provider: TokenBucket(rate) for provider, rate in (rate_limits or {}).items()}
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.stats = {SENT: 0, FAILED: 0, EXPIRED: 0, "retries": 0}
+        self._wake = asyncio.Event()
+        self._tasks = []
+        self._running = False
+
+    @classmethod
+    def from_env(cls, db, log_writer=None) -> "NotificationOutbox":
+        return cls(
+            db,
+            log_writer=log_writer,
+            workers=int(os.environ.get("NOTIFY_WORKERS", 4)),
+            rate_limits={
+                "twilio": float(os.environ.get("NOTIFY_RATE_TWILIO", 10)),
+                "sendgrid": float(os.environ.get("NOTIFY_RATE_SENDGRID", 10)),
+            },
+        )
+
+    # ============ ENQUEUE ============
+
+    async def enqueue(self, channel: str, to: str, body: Optional[str] = None, payload: Optional[dict] = None,
+                      log_id: Optional[str] = None, expires_in: Optional[int] = None) -> str:
+        """
+        Queue one message and wake a worker. log_id ties it to a whatsapp_logs
+        entry; expires_in (seconds) drops it if it cannot go out in time.
+        """
+        now = datetime.now(timezone.utc)
+        outbox_id = f"ob_{uuid.uuid4().hex[:12]}"
+        await self.collection.insert_one({
+            "outbox_id": outbox_id,
+            "channel": channel,
+            "provider": CHANNEL_PROVIDERS[channel],
+            "to": to,
+            "body": body,
+            "payload": payload or {},
+            "log_id": log_id,
+            "status": QUEUED,
+            "attempts": 0,
+            "next_attempt_at": now,
+            "expires_at": now + timedelta(seconds=expires_in) if expires_in else None,
+            "created_at": now,
+            "last_error": None,
+        })
+        self._wake.set()
+        return outbox_id
+
+    async def enqueue_whatsapp(self, to: str, message: str, log_id: Optional[str] = None,
+                               expires_in: Optional[int] = None) -> str:
+        return await self.enqueue("whatsapp", to, body=message, log_id=log_id, expires_in=expires_in)
+
+    async def enqueue_winner_email(self, to: str, user_name: str, prize_type: str, prize_amount, game_name: str) -> str:
+        return await self.enqueue("email", to, payload={
+            "user_name": user_name, "prize_type": prize_type, "prize_amount": prize_amount, "game_name": game_name
+        })
+
+    # ============ WORKERS ============
+
+    async def start(self):
+        """Requeue messages a previous process left mid-delivery and start the workers."""
+        stale = datetime.now(timezone.utc) - timedelta(seconds=STALE_SENDING_AFTER)
+        await self.collection.update_many(
+            {"status": SENDING, "claimed_at": {"$lt": stale}},
+            {"$set": {"status": QUEUED}}
+        )
+        if self.transport is None:
+            self.transport = NotifyTransport()
+        self._running = True
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"📬 Notification outbox started with {self.workers} workers")
+
+    async def stop(self):
+        self._running = False
+        self._wake.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._owns_transport and self.transport is not None:
+            await self.transport.close()
+            self.transport = None
+
+    async def _claim(self) -> Optional[dict]:
+        now = datetime.now(timezone.utc)
+        return await self.collection.find_one_and_update(
+            {"status": QUEUED, "next_attempt_at": {"$lte": now}},
+            {"$set": {"status": SENDING, "claimed_at": now}},
+            sort=[("next_attempt_at", 1)],
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _worker(self, number: int):
+        while self._running:
+            try:
+                doc = await self._claim()
+                if doc is None:
+                    self._wake.clear()
+                    try:
+                        await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                await self.process(doc)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Outbox worker {number} error: {e}")
+                await asyncio.sleep(self.poll_interval)
+
+    async def process(self, doc: dict):
+        """Deliver one claimed message and record the outcome."""
+        now = datetime.now(timezone.utc)
+        expires_at = doc.get("expires_at")
+        if expires_at is not None and expires_at.replace(tzinfo=expires_at.tzinfo or timezone.utc) <= now:
+            await self._finish(doc, EXPIRED, doc["attempts"], "Expired before it could be delivered")
+            return
+
+        limiter = self.limiters.get(doc["provider"])
+        if limiter:
+            await limiter.acquire()
+        try:
+            ok, detail = await self.transport.deliver(doc)
+            error = None if ok else detail
+        except Exception as e:
+            ok, error = False, str(e)
+
+        attempts = doc["attempts"] + 1
+        if ok:
+            await self._finish(doc, SENT, attempts, message_sid=detail)
+            return
+        if attempts >= self.max_attempts:
+            await self._finish(doc, FAILED, attempts, error)
+            return
+        self.stats["retries"] += 1
+        await self.collection.update_one({"outbox_id": doc["outbox_id"]}, {"$set": {
+            "status": QUEUED,
+            "attempts": attempts,
+            "last_error": error,
+            "next_attempt_at": now + timedelta(seconds=retry_delay(attempts)),
+        }})
+
+    async def _finish(self, doc: dict, status: str, attempts: int, error: Optional[str] = None,
+                      message_sid: Optional[str] = None):
+        now = datetime.now(timezone.utc)
+        self.stats[status] += 1
+        await self.collection.update_one({"outbox_id": doc["outbox_id"]}, {"$set": {
+            "status": status,
+            "attempts": attempts,
+            "last_error": error,
+            "message_sid": message_sid,
+            "finished_at": now,
+        }})
+        if not doc.get("log_id"):
+            if status != SENT:
+                logger.warning(f"Notification {doc['outbox_id']} to {doc['to']} {status}: {error}")
+            return
+
+        # A log may cover several messages (game reminders): it reads "sent"
+        # once any of them is delivered, "failed" only while none is. The SID
+        # links the log to Twilio's status callbacks (delivery_status.py)
+        if status == SENT:
+            await self._update_log({"log_id": doc["log_id"]}, {
+                "$set": {"status": "sent", "delivery_status": "pending", "sent_at": now, "failure_reason": None,
+                         "message_sid": message_sid},
+                "$inc": {"sent_count": 1},
+            })
+        else:
+            await self._update_log({"log_id": doc["log_id"]}, {"$inc": {"failed_count": 1}})
+            await self._update_log(
+                {"log_id": doc["log_id"], "status": {"$ne": "sent"}},
+                {"$set": {"status": "failed", "delivery_status": "failed", "failure_reason": error}}
+            )
+
+    async def _update_log(self, query: dict, update: dict):
+        if self.log_writer is not None:
+            await self.log_writer.update_one("whatsapp_logs", query, update)
+        else:
+            await self.db.whatsapp_logs.update_one(query, update)
+
+    async def get_stats(self) -> dict:
+        counts = await self.collection.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]).to_list(None)
+        return {
+            "workers": len(self._tasks),
+            "processed": dict(self.stats),
+            "by_status": {c["_id"]: c["count"] for c in counts},
+        }
@@ -46,9 +46,9 @@ def send_whatsapp_message(to_number, message):
         return False
 
 
-def send_winner_whatsapp(phone_number, user_name, prize_type, prize_amount, game_name):
-    """Send winner notification via WhatsApp"""
-    message = f"""🎉 *Congratulations {user_name}!*
+def winner_whatsapp_message(user_name, prize_type, prize_amount, game_name):
+    """Text of the winner notification WhatsApp message"""
+    return f"""🎉 *Congratulations {user_name}!*
 
 You won *{prize_type}* worth *₹{prize_amount:,.0f}* in *{game_name}*!
 
@@ -65,24 +65,18 @@ Reply to this message with your:
 4. UPI ID (optional)
 
 Congratulations again! 🎊"""
-    
+
+
+def send_winner_whatsapp(phone_number, user_name, prize_type, prize_amount, game_name):
+    """Send winner notification via WhatsApp"""
+    message = winner_whatsapp_message(user_name, prize_type, prize_amount, game_name)
     return send_whatsapp_message(phone_number, message)
 
 
-def send_winner_email(user_email, user_name, prize_type, prize_amount, game_name):
-    """Send congratulations email to winner using SendGrid"""
-    try:
-        # Check if SendGrid is configured
-        sendgrid_key = os.environ.get('SENDGRID_API_KEY')
-        if sendgrid_key and sendgrid_key != 'your_sendgrid_key_here':
-            from sendgrid import SendGridAPIClient
-            from sendgrid.helpers.mail import Mail
-            
-            message = Mail(
-                from_email=os.environ.get('SENDGRID_FROM_EMAIL', 'noreply@tambola.com'),
-                to_emails=user_email,
-                subject=f'🎉 Congratulations! You Won {prize_type}!',
-                html_content=f'''
+def winner_email_content(user_name, prize_type, prize_amount, game_name):
+    """Subject and HTML body of the winner congratulations email"""
+    subject = f'🎉 Congratulations! You Won {prize_type}!'
+    html = f'''
                     <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
                         <h1 style="color: #F59E0B;">🎉 Congratulations {user_name}!</h1>
                         <p style="font-size: 18px;">You won <strong>{prize_type}</strong> worth <strong>₹{prize_amount:,.0f}</strong> in {game_name}!</p>
@@ -100,6 +94,24 @@ def send_winner_email(user_email, user_name, prize_type, prize_amount, game_name
                         <p>Best regards,<br>Tambola Team</p>
                     </div>
                 '''
+    return subject, html
+
+
+def send_winner_email(user_email, user_name, prize_type, prize_amount, game_name):
+    """Send congratulations email to winner using SendGrid"""
+    try:
+        # Check if SendGrid is configured
+        sendgrid_key = os.environ.get('SENDGRID_API_KEY')
+        if sendgrid_key and sendgrid_key != 'your_sendgrid_key_here':
+            from sendgrid import SendGridAPIClient
+            from sendgrid.helpers.mail import Mail
+            
+            subject, html = winner_email_content(user_name, prize_type, prize_amount, game_name)
+            message = Mail(
+                from_email=os.environ.get('SENDGRID_FROM_EMAIL', 'noreply@tambola.com'),
+                to_emails=user_email,
+                subject=subject,
+                html_content=html
             )
             
             sg = SendGridAPIClient(sendgrid_key)
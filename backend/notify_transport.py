@@ -0,0 +1,132 @@
+# NOTIFICATION TRANSPORT
+# Async WhatsApp/SMS/email delivery over the providers' REST APIs, sharing one
+# long-lived pooled httpx.AsyncClient (keep-alive, HTTP/2 via h2, which is in
+# requirements.txt) instead of building a Twilio/SendGrid SDK client per message.
+#
+# Provider endpoints come from TWILIO_API_BASE / SENDGRID_API_BASE, so the
+# whole pipeline can be pointed at fake_provider.py for offline load tests.
+# Without credentials messages are logged instead of sent, as in
+# notifications.py.
+import logging
+import os
+from typing import Optional, Tuple
+
+import httpx
+
+from notifications import winner_email_content
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TWILIO_API_BASE = "https://api.twilio.com"
+DEFAULT_SENDGRID_API_BASE = "https://api.sendgrid.com"
+
+# (delivered, provider message id or error)
+SendResult = Tuple[bool, Optional[str]]
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class NotifyTransport:
+    """
+    One pooled HTTP client for every provider call. Create once at startup,
+    close() at shutdown. `transport` is passed to httpx, e.g. an ASGITransport
+    serving fake_provider.app in tests.
+    """
+
+    def __init__(self, twilio_base: Optional[str] = None, sendgrid_base: Optional[str] = None,
+                 max_connections: int = 20, timeout: float = 10.0,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.twilio_base = (twilio_base or os.environ.get("TWILIO_API_BASE") or DEFAULT_TWILIO_API_BASE).rstrip("/")
+        self.sendgrid_base = (sendgrid_base or os.environ.get("SENDGRID_API_BASE") or DEFAULT_SENDGRID_API_BASE).rstrip("/")
+        self.twilio_sid = os.environ.get("TWILIO_ACCOUNT_SID")
+        self.twilio_token = os.environ.get("TWILIO_AUTH_TOKEN")
+        self.whatsapp_from = os.environ.get("TWILIO_WHATSAPP_NUMBER")
+        # Public URL of the status webhook; Twilio reports delivery states there
+        self.status_callback = os.environ.get("TWILIO_STATUS_CALLBACK_URL")
+        self.sendgrid_key = os.environ.get("SENDGRID_API_KEY")
+        if self.sendgrid_key == "your_sendgrid_key_here":
+            self.sendgrid_key = None
+        self.from_email = os.environ.get("SENDGRID_FROM_EMAIL", "noreply@tambola.com")
+
+        self.client = httpx.AsyncClient(
+            http2=transport is None and _http2_available(),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=timeout,
+            transport=transport,
+        )
+
+    async def close(self):
+        await self.client.aclose()
+
+    # ============ TWILIO ============
+
+    async def send_whatsapp(self, to_number: str, message: str) -> SendResult:
+        """Send a WhatsApp message through Twilio's Messages API."""
+        if not self.twilio_sid or not self.twilio_token:
+            logger.info(f"📱 [MOCKED WhatsApp] To: {to_number}")
+            logger.info(f"   Message: {message}")
+            return True, None
+
+        to_whatsapp = to_number if to_number.startswith("whatsapp:") else f"whatsapp:{to_number}"
+        data = {"From": f"whatsapp:{self.whatsapp_from}", "To": to_whatsapp, "Body": message}
+        if self.status_callback:
+            data["StatusCallback"] = self.status_callback
+        try:
+            response = await self.client.post(
+                f"{self.twilio_base}/2010-04-01/Accounts/{self.twilio_sid}/Messages.json",
+                data=data,
+                auth=(self.twilio_sid, self.twilio_token),
+            )
+        except httpx.HTTPError as e:
+            return False, f"Twilio request failed: {e}"
+        if response.status_code >= 400:
+            return False, f"Twilio {response.status_code}: {response.text[:200]}"
+
+        sid = response.json().get("sid")
+        logger.info(f"✅ WhatsApp sent to {to_number} - SID: {sid}")
+        return True, sid
+
+    # ============ SENDGRID ============
+
+    async def send_winner_email(self, user_email: str, user_name: str, prize_type: str, prize_amount,
+                                game_name: str) -> SendResult:
+        """Send the winner congratulations email through SendGrid's Mail Send API."""
+        subject, html = winner_email_content(user_name, prize_type, prize_amount, game_name)
+        if not self.sendgrid_key:
+            logger.info(f"📧 [MOCKED EMAIL] To: {user_email}")
+            logger.info(f"   Subject: {subject}")
+            return True, None
+
+        try:
+            response = await self.client.post(
+                f"{self.sendgrid_base}/v3/mail/send",
+                json={
+                    "personalizations": [{"to": [{"email": user_email}]}],
+                    "from": {"email": self.from_email},
+                    "subject": subject,
+                    "content": [{"type": "text/html", "value": html}],
+                },
+                headers={"Authorization": f"Bearer {self.sendgrid_key}"},
+            )
+        except httpx.HTTPError as e:
+            return False, f"SendGrid request failed: {e}"
+        if response.status_code >= 400:
+            return False, f"SendGrid {response.status_code}: {response.text[:200]}"
+
+        message_id = response.headers.get("X-Message-Id")
+        logger.info(f"✅ Email sent to {user_email} - Status: {response.status_code}")
+        return True, message_id
+
+    async def deliver(self, doc: dict) -> SendResult:
+        """Send one notification_outbox message."""
+        if doc["channel"] == "whatsapp":
+            return await self.send_whatsapp(doc["to"], doc["body"])
+        if doc["channel"] == "email":
+            return await self.send_winner_email(doc["to"], **doc["payload"])
+        raise ValueError(f"Unknown notification channel {doc['channel']!r}")
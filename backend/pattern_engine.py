@@ -0,0 +1,237 @@
+# CUSTOM PATTERN ENGINE
+# Declarative prize patterns (pyramid, star, breakfast, ...) that hosts can
+# register per game without code changes. A definition is compiled, per
+# ticket, into (mask, need) clauses over the ticket's numbers (bit n = number
+# n), so checking a custom pattern is a popcount per clause.
+#
+# Definition format:
+#
+#   {"name": "Star",
+#    "clauses": [{"cells": [{"row": 0, "position": "first"}, ...], "need": 5}]}
+#
+# "cells"/"need" may be given at the top level for a single clause. "need"
+# defaults to every selected number. Cell selectors:
+#
+#   {"all": true}                          every number on the ticket
+#   {"row": r}                             every number in row r (0-2)
+#   {"column": c}                          every number in column c (0-8)
+#   {"columns": [c, ...]}                  every number in these columns
+#   {"row": r, "position": p}              p-th number of row r; p is an
+#   {"column": c, "position": p}           index (0-based, negative from the
+#                                          end) or "first"/"middle"/"last"
+#   {"cell": [r, c]}                       a physical cell, if it holds a number
+import logging
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CUSTOM_PREFIX = "custom:"
+
+# (mask, need) per clause; a pattern is complete when every clause is
+Clauses = Tuple[Tuple[int, int], ...]
+
+_NAMED_POSITIONS = {"first": 0, "last": -1}
+
+
+def pattern_id_for(name: str) -> str:
+    """Pattern ID for a custom pattern name ("Breakfast Special" -> "custom:breakfast_special")."""
+    return CUSTOM_PREFIX + re.sub(r"[^a-z0-9]+", "_", (name or "").lower()).strip("_")
+
+
+def is_custom_pattern(pattern: Optional[str]) -> bool:
+    return bool(pattern) and pattern.startswith(CUSTOM_PREFIX)
+
+
+# ============ VALIDATION ============
+
+def _validate_selector(selector) -> dict:
+    if not isinstance(selector, dict):
+        raise ValueError(f"Cell selector must be an object, got {selector!r}")
+    if selector.get("all"):
+        return {"all": True}
+    if "cell" in selector:
+        cell = selector["cell"]
+        if not (isinstance(cell, (list, tuple)) and len(cell) == 2 and all(isinstance(c, int) for c in cell)
+                and 0 <= cell[0] <= 2 and 0 <= cell[1] <= 8):
+            raise ValueError(f"Cell must be [row 0-2, column 0-8], got {cell!r}")
+        return {"cell": [int(cell[0]), int(cell[1])]}
+    if "columns" in selector:
+        columns = selector["columns"]
+        if not columns or not all(isinstance(c, int) and 0 <= c <= 8 for c in columns):
+            raise ValueError(f"Columns must be a list of 0-8, got {columns!r}")
+        return {"columns": list(columns)}
+
+    if ("row" in selector) == ("column" in selector):
+        raise ValueError(f"Selector needs exactly one of row/column/columns/cell/all: {selector!r}")
+    axis, limit = ("row", 2) if "row" in selector else ("column", 8)
+    index = selector[axis]
+    if not isinstance(index, int) or not 0 <= index <= limit:
+        raise ValueError(f"{axis} must be 0-{limit}, got {index!r}")
+
+    result = {axis: index}
+    if "position" in selector:
+        position = selector["position"]
+        if position not in ("first", "middle", "last") and not isinstance(position, int):
+            raise ValueError(f"Position must be an index or first/middle/last, got {position!r}")
+        result["position"] = position
+    return result
+
+
+def validate_pattern_definition(definition: dict) -> dict:
+    """Check a pattern definition and return it in canonical clause form. Raises ValueError."""
+    if not isinstance(definition, dict) or not str(definition.get("name") or "").strip():
+        raise ValueError("Pattern needs a name")
+    name = definition["name"].strip()
+
+    raw_clauses = definition.get("clauses")
+    if raw_clauses is None:
+        raw_clauses = [{"cells": definition.get("cells"), "need": definition.get("need")}]
+    if not raw_clauses:
+        raise ValueError(f"Pattern {name!r} has no clauses")
+
+    clauses = []
+    for clause in raw_clauses:
+        cells = clause.get("cells") if isinstance(clause, dict) else None
+        if not cells:
+            raise ValueError(f"Pattern {name!r} has a clause without cells")
+        need = clause.get("need")
+        if need is not None and (not isinstance(need, int) or not 1 <= need <= 15):
+            raise ValueError(f"Pattern {name!r}: need must be 1-15, got {need!r}")
+        clauses.append({"cells": [_validate_selector(s) for s in cells], "need": need})
+
+    return {"name": name, "clauses": clauses}
+
+
+# ============ COMPILATION ============
+
+def _pick(numbers: List[int], position) -> List[int]:
+    if not numbers:
+        return []
+    if position == "middle":
+        index = len(numbers) // 2
+    else:
+        index = _NAMED_POSITIONS.get(position, position)
+    if -len(numbers) <= index < len(numbers):
+        return [numbers[index]]
+    return []
+
+
+def _select(grid: List[List[Optional[int]]], selector: dict) -> List[int]:
+    """Numbers on a ticket grid picked by one selector."""
+    if selector.get("all"):
+        return [num for row in grid for num in row if num]
+    if "cell" in selector:
+        num = grid[selector["cell"][0]][selector["cell"][1]]
+        return [num] if num else []
+    if "columns" in selector:
+        return [row[c] for c in selector["columns"] for row in grid if row[c]]
+
+    if "row" in selector:
+        numbers = [num for num in grid[selector["row"]] if num]
+    else:
+        numbers = [row[selector["column"]] for row in grid if row[selector["column"]]]
+    return _pick(numbers, selector["position"]) if "position" in selector else numbers
+
+
+def numbers_mask(numbers: Iterable[int]) -> int:
+    """Bitmask with bit n set for every number n."""
+    mask = 0
+    for num in numbers:
+        if num:
+            mask |= 1 << num
+    return mask
+
+
+def compile_pattern(definition: dict, grid: List[List[Optional[int]]]) -> Optional[Clauses]:
+    """
+    Compile a validated definition against one ticket grid. Returns None when
+    the ticket cannot complete the pattern (a clause selects fewer numbers
+    than it needs).
+    """
+    compiled = []
+    for clause in definition["clauses"]:
+        mask = 0
+        for selector in clause["cells"]:
+            mask |= numbers_mask(_select(grid, selector))
+        selected = mask.bit_count()
+        need = clause["need"] or selected
+        if selected == 0 or selected < need:
+            return None
+        compiled.append((mask, need))
+    return tuple(compiled)
+
+
+def is_complete(compiled: Optional[Clauses], called_mask: int) -> bool:
+    """Whether a compiled pattern is complete for the called-numbers mask."""
+    return bool(compiled) and all((mask & called_mask).bit_count() >= need for mask, need in compiled)
+
+
+def check_custom_pattern(grid: List[List[Optional[int]]], called_numbers: Iterable[int], pattern: str,
+                         custom_patterns: Optional[Dict[str, dict]]) -> bool:
+    """Whether a ticket grid completes a custom pattern ID, compiled for this grid on the spot."""
+    definition = (custom_patterns or {}).get(pattern)
+    return bool(definition) and is_complete(compile_pattern(definition, grid), numbers_mask(called_numbers))
+
+
+class PatternMasks:
+    """
+    One game's custom patterns compiled for each booked ticket. Part of the
+    game's detection state (detection_state.py), rebuilt with it when the
+    bookings or the definitions change.
+    """
+
+    def __init__(self, game_id: str, definitions: Dict[str, dict]):
+        self.game_id = game_id
+        self.definitions = definitions               # pattern ID -> validated definition
+        self.masks: Dict[str, Dict[str, Clauses]] = {pattern: {} for pattern in definitions}
+
+    def add_ticket(self, ticket_id: str, grid: List[List[Optional[int]]]):
+        for pattern, definition in self.definitions.items():
+            compiled = compile_pattern(definition, grid)
+            if compiled:
+                self.masks[pattern][ticket_id] = compiled
+
+    def is_complete(self, pattern: str, ticket_id: str, called_mask: int) -> bool:
+        return is_complete(self.masks.get(pattern, {}).get(ticket_id), called_mask)
+
+
+# ============ BUILT-IN AND PRESET DEFINITIONS ============
+
+def _first_last(row: int) -> List[dict]:
+    return [{"row": row, "position": "first"}, {"row": row, "position": "last"}]
+
+
+# The hard-coded checks in winner_detection.py, expressed in this format
+BUILTIN_DEFINITIONS = {
+    "early_five": {"name": "Early Five", "clauses": [{"cells": [{"all": True}], "need": 5}]},
+    "four_corners": {"name": "Four Corners", "clauses": [{"cells": _first_last(0) + _first_last(2), "need": None}]},
+    "top_line": {"name": "Top Line", "clauses": [{"cells": [{"row": 0}], "need": None}]},
+    "middle_line": {"name": "Middle Line", "clauses": [{"cells": [{"row": 1}], "need": None}]},
+    "bottom_line": {"name": "Bottom Line", "clauses": [{"cells": [{"row": 2}], "need": None}]},
+    "full_house": {"name": "Full House", "clauses": [{"cells": [{"all": True}], "need": None}]},
+}
+
+# Ready-made definitions hosts can register as-is
+PRESET_PATTERNS = [
+    {"name": "Pyramid", "cells": [
+        {"row": 0, "position": "middle"},
+        {"row": 1, "position": 1}, {"row": 1, "position": 3},
+        {"row": 2, "position": 0}, {"row": 2, "position": "middle"}, {"row": 2, "position": -1},
+    ]},
+    {"name": "Star", "cells": _first_last(0) + _first_last(2) + [{"row": 1, "position": "middle"}]},
+    {"name": "First Column", "cells": [{"row": r, "position": "first"} for r in range(3)]},
+    {"name": "Last Column", "cells": [{"row": r, "position": "last"} for r in range(3)]},
+    {"name": "Breakfast", "cells": [{"columns": [0, 1, 2]}]},
+    {"name": "Lunch", "cells": [{"columns": [3, 4, 5]}]},
+    {"name": "Dinner", "cells": [{"columns": [6, 7, 8]}]},
+]
+
+
+def validate_custom_patterns(definitions: List[dict]) -> List[dict]:
+    """Validate a game's custom pattern list; names must be unique. Raises ValueError."""
+    validated = [validate_pattern_definition(d) for d in definitions or []]
+    ids = [pattern_id_for(d["name"]) for d in validated]
+    if len(set(ids)) != len(ids):
+        raise ValueError("Custom pattern names must be unique")
+    return validated
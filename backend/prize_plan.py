@@ -0,0 +1,159 @@
+# PRIZE PLAN
+# Resolves a game's free-form prize names ("Quick Five", "1st Full House",
+# "top_line", ...) to canonical pattern IDs once, when the game is created,
+# edited or started. Detection reads the stored plan instead of matching
+# prize-name strings for every ticket on every call.
+import logging
+import re
+from typing import Dict, List, Optional
+
+from pattern_engine import is_custom_pattern, pattern_id_for
+
+logger = logging.getLogger(__name__)
+
+PRIZE_PLAN_VERSION = 1
+
+# Canonical pattern IDs, in the order detection evaluates them
+EARLY_FIVE = "early_five"
+FOUR_CORNERS = "four_corners"
+TOP_LINE = "top_line"
+MIDDLE_LINE = "middle_line"
+BOTTOM_LINE = "bottom_line"
+FULL_SHEET_BONUS = "full_sheet_bonus"
+FULL_HOUSE = "full_house"
+
+PATTERN_ORDER = [EARLY_FIVE, FOUR_CORNERS, TOP_LINE, MIDDLE_LINE, BOTTOM_LINE, FULL_SHEET_BONUS, FULL_HOUSE]
+
+# Prizes checked when a game has no prize dict at all
+DEFAULT_PRIZES = [
+    "Quick Five", "Early Five", "Four Corners", "Full Sheet Bonus",
+    "Top Line", "Middle Line", "Bottom Line",
+    "1st Full House", "2nd Full House", "3rd Full House"
+]
+
+_ORDINALS = {"1st": 1, "first": 1, "1": 1, "2nd": 2, "second": 2, "2": 2, "3rd": 3, "third": 3, "3": 3}
+
+
+def normalize_prize_name(name: str) -> str:
+    """Lowercase with "_" and "-" as spaces."""
+    return (name or "").lower().replace("_", " ").replace("-", " ").strip()
+
+
+def resolve_pattern(prize_name: str) -> Optional[str]:
+    """Canonical pattern ID for a prize name, or None if it is not a known pattern."""
+    name = normalize_prize_name(prize_name)
+    if "sheet" in name:
+        return FULL_SHEET_BONUS
+    if "full" in name and "house" in name:
+        return FULL_HOUSE
+    if "corner" in name:
+        return FOUR_CORNERS
+    if "quick" in name or "early" in name or "five" in name or re.search(r"\b5\b", name):
+        return EARLY_FIVE
+    if "top" in name or "first" in name:
+        return TOP_LINE
+    if "middle" in name or "second" in name:
+        return MIDDLE_LINE
+    if "bottom" in name or "third" in name:
+        return BOTTOM_LINE
+    return None
+
+
+def _full_house_rank(prize_name: str) -> Optional[int]:
+    for word in normalize_prize_name(prize_name).split():
+        if word in _ORDINALS:
+            return _ORDINALS[word]
+    return None
+
+
+def _pattern_rank(pattern: str) -> int:
+    # Custom patterns are checked after the built-in lines, before the bonus
+    if is_custom_pattern(pattern):
+        return PATTERN_ORDER.index(FULL_SHEET_BONUS)
+    return PATTERN_ORDER.index(pattern)
+
+
+def _custom_pattern_map(custom_patterns: Optional[List[dict]]) -> Dict[str, dict]:
+    return {pattern_id_for(d["name"]): d for d in custom_patterns or []}
+
+
+def compile_prize_plan(prizes: Optional[Dict[str, float]], custom_patterns: Optional[List[dict]] = None) -> dict:
+    """
+    Compile a game's prizes dict into a plan. A prize named like one of the
+    game's custom patterns (see pattern_engine.py) resolves to that pattern
+    before the built-in name rules apply.
+
+    - prizes: [{name, pattern, amount, sharing}] in evaluation order, full
+      houses last and sorted by rank (1st, 2nd, 3rd; unranked after)
+    - by_pattern: pattern ID -> prize name for single-winner patterns
+      (the first prize in the dict wins when two names map to one pattern)
+    - full_house_order: full house prize names in award order; tickets
+      completing on the same call share the next one
+    - full_sheet_bonus: the FSB prize name, "Full Sheet Bonus" if the game
+      has none (the bonus is always checked)
+    - unmatched: prize names that map to no pattern and are never detected
+    - custom_patterns: pattern ID -> definition for the game's custom patterns
+    """
+    source = list(prizes.keys()) if prizes else list(DEFAULT_PRIZES)
+    custom = _custom_pattern_map(custom_patterns)
+
+    entries = []
+    unmatched = []
+    for index, name in enumerate(source):
+        pattern = pattern_id_for(name) if pattern_id_for(name) in custom else resolve_pattern(name)
+        if pattern is None:
+            unmatched.append(name)
+            continue
+        entries.append({
+            "name": name,
+            "pattern": pattern,
+            "amount": (prizes or {}).get(name, 0),
+            "sharing": "same_call" if pattern == FULL_HOUSE else "first_found",
+            "_sort": (
+                _pattern_rank(pattern),
+                (_full_house_rank(name) or 99) if pattern == FULL_HOUSE else 0,
+                index,
+            ),
+        })
+    entries.sort(key=lambda e: e["_sort"])
+    for entry in entries:
+        entry.pop("_sort")
+
+    by_pattern: Dict[str, str] = {}
+    for entry in entries:
+        if entry["pattern"] != FULL_HOUSE:
+            by_pattern.setdefault(entry["pattern"], entry["name"])
+
+    if unmatched:
+        logger.warning(f"Prize plan: no pattern for {unmatched}")
+
+    return {
+        "version": PRIZE_PLAN_VERSION,
+        "source": source,
+        "prizes": entries,
+        "by_pattern": by_pattern,
+        "full_house_order": [e["name"] for e in entries if e["pattern"] == FULL_HOUSE],
+        "full_sheet_bonus": by_pattern.get(FULL_SHEET_BONUS, "Full Sheet Bonus"),
+        "unmatched": unmatched,
+        "custom_patterns": custom,
+    }
+
+
+def get_prize_plan(game: Optional[dict], prizes_field: str = "prizes") -> dict:
+    """
+    The game's stored plan, or a freshly compiled one when the game has no
+    plan yet or its prizes or custom patterns changed since the plan was stored.
+    """
+    game = game or {}
+    prizes = game.get(prizes_field) or {}
+    plan = game.get("prize_plan")
+    source = list(prizes.keys()) if prizes else list(DEFAULT_PRIZES)
+    if (plan and plan.get("version") == PRIZE_PLAN_VERSION and plan.get("source") == source
+            and plan.get("custom_patterns", {}) == _custom_pattern_map(game.get("custom_patterns"))):
+        return plan
+    return compile_prize_plan(prizes, game.get("custom_patterns"))
+
+
+def unclaimed_prizes(plan: dict, winners: dict) -> List[dict]:
+    """Plan entries whose prize has not been won yet, in evaluation order."""
+    return [entry for entry in plan["prizes"] if entry["name"] not in winners]
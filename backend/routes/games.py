@@ -9,6 +9,7 @@ import logging
 from services.database import get_db
 from routes.auth import get_current_user, User
 from ticket_generator import generate_full_sheet
+from detection_state import touch_bookings
 
 router = APIRouter(prefix="/games", tags=["Games"])
 db = get_db()
@@ -134,7 +135,7 @@ async def get_game_tickets(game_id: str, page: int = 1, limit: int = 60):
     
     tickets = await db.tickets.find(
         {"game_id": game_id},
-        {"_id": 0}
+        {"_id": 0, "numbers_packed": 0}
     ).skip(skip).limit(limit).to_list(limit)
     
     total = await db.tickets.count_documents({"game_id": game_id})
@@ -195,6 +196,7 @@ async def book_tickets(
         {"ticket_id": {"$in": ticket_ids}},
         {"$set": update_data}
     )
+    await touch_bookings(db, game_id)
     
     # Update game available tickets
     await db.games.update_one(
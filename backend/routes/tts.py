@@ -2,11 +2,13 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import List, Optional
+import base64
 import random
 import logging
 
 from services.database import get_db
 from emergentintegrations.llm.openai import OpenAITextToSpeech
+from tts_cache import get_tts_cache, tts_cache_key
 
 router = APIRouter(prefix="/tts", tags=["Text-to-Speech"])
 db = get_db()
@@ -93,15 +95,18 @@ async def generate_tts(text: str, include_prefix: bool = True):
             full_text = f"{prefix} {text}"
         
         try:
-            tts = OpenAITextToSpeech()
-            audio_base64 = await tts.text_to_speech(
-                text=full_text,
-                voice=settings.get("voice", "nova"),
-                speed=settings.get("speed", 1.0)
-            )
+            voice = settings.get("voice", "nova")
+            speed = settings.get("speed", 1.0)
+            
+            async def synthesize() -> bytes:
+                tts = OpenAITextToSpeech()
+                return base64.b64decode(await tts.text_to_speech(text=full_text, voice=voice, speed=speed))
+            
+            # Same content-addressed cache as server.py
+            audio, _ = await get_tts_cache().get_or_generate(tts_cache_key(full_text, voice, speed, "tts-1"), synthesize)
             
             return {
-                "audio": audio_base64,
+                "audio": base64.b64encode(audio).decode(),
                 "text": full_text,
                 "voice": settings.get("voice", "nova"),
                 "use_browser_tts": False
@@ -3,11 +3,13 @@ from fastapi.responses import JSONResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure, PyMongoError
 import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator
 import uuid
 from datetime import datetime, timezone, timedelta
 import httpx
@@ -15,8 +17,36 @@ import random
 import base64
 import hashlib
 import asyncio
+from itertools import islice
 from emergentintegrations.llm.openai import OpenAITextToSpeech
-from ticket_generator import generate_full_sheet, generate_user_game_tickets, generate_authentic_ticket
+from ticket_generator import (
+    generate_full_sheet, generate_user_game_tickets, generate_authentic_ticket,
+    encode_ticket_compact, get_ticket_grid, ticket_fingerprint, generate_unique_full_sheets,
+    iter_unique_full_sheets
+)
+from detection_state import (
+    NEAR_WIN_PATTERNS, DetectionState, get_detection_state, load_detection_state, ensure_detection_state,
+    drop_detection_state, touch_bookings, get_player_cache, resolve_players, fetch_players
+)
+from ticket_store import open_ticket_store, write_ticket_store, verify_ticket_store, fill_ticket_grids
+from ticket_audit import audit_game_tickets
+from detection_service import ADMIN_GAME_RULES, USER_GAME_RULES, detect_winners
+from notification_outbox import NotificationOutbox
+from log_writer import BufferedLogWriter
+from caller_settings import CallerSettingsCache
+from tts_cache import (
+    audio_etag, audio_url, etag_matches, get_tts_cache, is_cache_key, parse_byte_range, tts_cache_key
+)
+from tts_prerender import cancel_prerender_jobs, get_prerender_job, prerender_progress, prerender_texts, start_prerender
+from tts_sprite import cancel_sprite_builds, get_sprite_manifest, sprite_build_status, start_sprite_build
+from delivery_status import DeliveryStatusQueue, validate_twilio_signature
+from campaigns import (
+    CampaignRunner, campaign_progress, campaign_window, create_campaign, retry_failed_recipients, snapshot_recipients,
+    unfinished_campaign_ids
+)
+from call_commit import CallCommit, record_call_writes, get_call_write_stats
+from prize_plan import compile_prize_plan, get_prize_plan, unclaimed_prizes
+from pattern_engine import PRESET_PATTERNS, BUILTIN_DEFINITIONS, validate_custom_patterns, pattern_id_for
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -26,6 +56,15 @@ mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
+# Audit log entries are buffered and written in batches; flushed on shutdown
+log_writer = BufferedLogWriter(db)
+
+# Outgoing WhatsApp/email messages; workers start with the app
+notification_outbox = NotificationOutbox.from_env(db, log_writer=log_writer)
+
+# Twilio delivery-status callbacks, applied to whatsapp_logs in batches
+delivery_status_queue = DeliveryStatusQueue(db, log_writer=log_writer)
+
 app = FastAPI()
 api_router = APIRouter(prefix="/api")
 
@@ -120,6 +159,9 @@ class CreateGameRequest(BaseModel):
     total_tickets: int = 600
     prizes: Dict[str, float]
 
+class CustomPatternsRequest(BaseModel):
+    patterns: List[Dict[str, Any]]
+
 class BookTicketsRequest(BaseModel):
     game_id: str
     ticket_ids: List[str]
@@ -486,6 +528,7 @@ async def release_booking_tickets(booking_id: str, game_id: str, ticket_ids: Lis
             }
         }
     )
+    await touch_bookings(db, game_id)
 
 async def check_and_expire_pending_bookings():
     """Background task to expire pending bookings after 10 minutes"""
@@ -1121,6 +1164,7 @@ async def create_booking_with_agent(
             }
         }
     )
+    await touch_bookings(db, game_id)
     
     # Update agent pending count
     if assigned_agent:
@@ -1181,8 +1225,6 @@ def format_phone(phone: str) -> str:
 @api_router.post("/auth/send-otp")
 async def send_otp(request: SendOTPRequest):
     """Send OTP via WhatsApp"""
-    from notifications import send_whatsapp_message
-    
     phone = format_phone(request.phone)
     otp = generate_otp()
     
@@ -1206,12 +1248,9 @@ Do not share this code with anyone.
 
 If you didn't request this, please ignore."""
     
-    result = send_whatsapp_message(phone, message)
-    
-    if result:
-        return {"success": True, "message": "OTP sent to your WhatsApp"}
-    else:
-        raise HTTPException(status_code=500, detail="Failed to send OTP. Please try again.")
+    # Delivered by the outbox workers; an OTP nobody could deliver before it expires is dropped
+    await notification_outbox.enqueue_whatsapp(phone, message, expires_in=600)
+    return {"success": True, "message": "OTP sent to your WhatsApp"}
 
 @api_router.post("/auth/verify-otp")
 async def verify_otp(request: VerifyOTPRequest, response: Response):
@@ -1420,6 +1459,7 @@ async def create_game(game_data: CreateGameRequest):
         "price": game_data.price,
         "prize_pool": prize_pool,
         "prizes": prizes,
+        "prize_plan": compile_prize_plan(prizes),
         "status": "upcoming",
         "ticket_count": total_tickets,
         "available_tickets": total_tickets,
@@ -1430,30 +1470,8 @@ async def create_game(game_data: CreateGameRequest):
     
     # Auto-generate tickets for the game using full sheet rule
     # Each full sheet has 6 tickets containing all numbers 1-90
-    tickets = []
-    ticket_counter = 1
     num_sheets = total_tickets // 6  # Exact number of full sheets
-    
-    for sheet_num in range(1, num_sheets + 1):
-        full_sheet = generate_full_sheet()
-        sheet_id = f"FS{sheet_num:03d}"
-        
-        for ticket_num_in_sheet, ticket_numbers in enumerate(full_sheet, 1):
-            ticket = {
-                "ticket_id": f"{game_id}_T{ticket_counter:03d}",
-                "game_id": game_id,
-                "ticket_number": f"T{ticket_counter:03d}",
-                "full_sheet_id": sheet_id,
-                "ticket_position_in_sheet": ticket_num_in_sheet,
-                "numbers": ticket_numbers,
-                "is_booked": False,
-                "booking_status": "available"
-            }
-            tickets.append(ticket)
-            ticket_counter += 1
-    
-    if tickets:
-        await db.tickets.insert_many(tickets)
+    await stream_game_tickets(game_id, num_sheets)
     
     return Game(**game)
 
@@ -1475,7 +1493,8 @@ async def update_game(game_id: str, game_data: CreateGameRequest):
         "time": game_data.time,
         "price": game_data.price,
         "prize_pool": prize_pool,
-        "prizes": game_data.prizes
+        "prizes": game_data.prizes,
+        "prize_plan": compile_prize_plan(game_data.prizes, game.get("custom_patterns"))
     }
     
     await db.games.update_one(
@@ -1491,41 +1510,131 @@ async def update_game(game_id: str, game_data: CreateGameRequest):
 # Ticket generation now uses ticket_generator.py module
 # The generate_full_sheet function is imported from there
 
-@api_router.post("/games/{game_id}/generate-tickets")
-async def generate_tickets(game_id: str):
-    """Generate 600 tickets (100 Full Sheets × 6 tickets each) for a game"""
-    game = await db.games.find_one({"game_id": game_id}, {"_id": 0})
-    if not game:
-        raise HTTPException(status_code=404, detail="Game not found")
-    
-    # Check if tickets already exist
-    existing_count = await db.tickets.count_documents({"game_id": game_id})
-    if existing_count > 0:
-        return {"message": f"Tickets already generated ({existing_count} tickets)"}
-    
-    tickets = []
+# Tickets returned to clients never include the binary "numbers_packed" field
+TICKET_PUBLIC_PROJECTION = {"_id": 0, "numbers_packed": 0}
+
+# Streaming generation: tickets are written in unordered insert_many batches,
+# at most TICKET_INSERT_IN_FLIGHT at a time, so memory stays bounded by
+# batch size rather than game size
+TICKET_INSERT_BATCH_SIZE = int(os.environ.get("TICKET_INSERT_BATCH_SIZE", "600"))
+TICKET_INSERT_IN_FLIGHT = int(os.environ.get("TICKET_INSERT_IN_FLIGHT", "3"))
+TICKET_INSERT_RETRIES = 3
+
+def iter_sheet_ticket_docs(game_id: str, full_sheets) -> Iterator[dict]:
+    """Yield ticket documents for a game's full sheets (FS001, T001 onwards)"""
     ticket_counter = 1
     
-    # Generate 100 Full Sheets (each with 6 tickets)
-    for sheet_num in range(1, 101):
-        full_sheet = generate_full_sheet()
+    for sheet_num, full_sheet in enumerate(full_sheets, 1):
         sheet_id = f"FS{sheet_num:03d}"
         
         for ticket_num_in_sheet, ticket_numbers in enumerate(full_sheet, 1):
-            ticket = {
+            yield {
                 "ticket_id": f"{game_id}_T{ticket_counter:03d}",
                 "game_id": game_id,
                 "ticket_number": f"T{ticket_counter:03d}",
                 "full_sheet_id": sheet_id,
                 "ticket_position_in_sheet": ticket_num_in_sheet,
                 "numbers": ticket_numbers,
+                "numbers_packed": encode_ticket_compact(ticket_numbers),
+                "fingerprint": ticket_fingerprint(ticket_numbers),
                 "is_booked": False,
                 "booking_status": "available"
             }
-            tickets.append(ticket)
             ticket_counter += 1
+
+async def _insert_ticket_batch(game_id: str, batch: List[dict], batch_number: int):
+    """Insert one batch of tickets, retrying transient failures"""
+    for attempt in range(1, TICKET_INSERT_RETRIES + 1):
+        try:
+            await db.tickets.insert_many(batch, ordered=False)
+            return
+        except BulkWriteError as e:
+            write_errors = e.details.get("writeErrors", [])
+            # A retry may find part of the batch already written by the failed attempt
+            if attempt > 1 and write_errors and all(err.get("code") == 11000 for err in write_errors):
+                return
+            error = e
+        except PyMongoError as e:
+            error = e
+        
+        logger.warning(f"Ticket batch {batch_number} for {game_id} failed (attempt {attempt}): {error}")
+        if attempt < TICKET_INSERT_RETRIES:
+            await asyncio.sleep(0.5 * attempt)
+    
+    raise error
+
+async def stream_game_tickets(game_id: str, num_sheets: int) -> int:
+    """
+    Generate and insert a game's tickets without holding them all in memory.
+    Sheets are generated off the event loop one batch at a time; progress is
+    kept on the game document under "ticket_generation". The game is marked
+    "tickets_compact" only once every ticket has been written packed.
+    """
+    docs = iter_sheet_ticket_docs(game_id, iter_unique_full_sheets(num_sheets))
+    window = asyncio.Semaphore(TICKET_INSERT_IN_FLIGHT)
+    in_flight = set()
+    failures = []
+    
+    await db.games.update_one(
+        {"game_id": game_id},
+        {"$set": {"ticket_generation": {"status": "running", "inserted": 0, "total": num_sheets * 6}}}
+    )
+    
+    async def write_batch(batch: List[dict], batch_number: int):
+        try:
+            await _insert_ticket_batch(game_id, batch, batch_number)
+            await db.games.update_one(
+                {"game_id": game_id},
+                {"$inc": {"ticket_generation.inserted": len(batch)}}
+            )
+        except Exception as e:
+            failures.append(e)
+        finally:
+            window.release()
+    
+    batch_number = 0
+    while not failures:
+        batch = await asyncio.to_thread(lambda: list(islice(docs, TICKET_INSERT_BATCH_SIZE)))
+        if not batch:
+            break
+        batch_number += 1
+        await window.acquire()
+        task = asyncio.create_task(write_batch(batch, batch_number))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+    
+    await asyncio.gather(*in_flight)
     
-    await db.tickets.insert_many(tickets)
+    if failures:
+        # Not compact: the migration sweep will pack whatever was written
+        await db.games.update_one(
+            {"game_id": game_id},
+            {"$set": {"ticket_generation.status": "failed", "tickets_compact": False}}
+        )
+        logger.error(f"❌ Ticket generation failed for {game_id}: {failures[0]}")
+        raise HTTPException(status_code=500, detail="Ticket generation failed, please retry")
+    
+    await db.games.update_one(
+        {"game_id": game_id},
+        {"$set": {"ticket_generation.status": "complete", "tickets_compact": True}}
+    )
+    logger.info(f"✅ Generated {num_sheets * 6} tickets for {game_id} in {batch_number} batches")
+    return num_sheets * 6
+
+@api_router.post("/games/{game_id}/generate-tickets")
+async def generate_tickets(game_id: str):
+    """Generate 600 tickets (100 Full Sheets × 6 tickets each) for a game"""
+    game = await db.games.find_one({"game_id": game_id}, {"_id": 0})
+    if not game:
+        raise HTTPException(status_code=404, detail="Game not found")
+    
+    # Check if tickets already exist
+    existing_count = await db.tickets.count_documents({"game_id": game_id})
+    if existing_count > 0:
+        return {"message": f"Tickets already generated ({existing_count} tickets)"}
+    
+    # Generate 100 Full Sheets (each with 6 tickets)
+    await stream_game_tickets(game_id, 100)
     return {"message": f"Generated 600 tickets (100 Full Sheets × 6 tickets) for game {game_id}"}
 
 @api_router.get("/games/{game_id}/tickets")
@@ -1540,7 +1649,7 @@ async def get_game_tickets(
     if available_only:
         query["is_booked"] = False
     
-    tickets = await db.tickets.find(query, {"_id": 0}).skip(skip).limit(limit).to_list(limit)
+    tickets = await db.tickets.find(query, TICKET_PUBLIC_PROJECTION).skip(skip).limit(limit).to_list(limit)
     total = await db.tickets.count_documents(query)
     
     return {
@@ -1550,6 +1659,217 @@ async def get_game_tickets(
         "pages": (total + limit - 1) // limit
     }
 
+async def migrate_game_tickets_to_compact(game_id: str, batch_size: int = 500) -> dict:
+    """Add "numbers_packed" to every ticket of a game that only has the "numbers" grid"""
+    migrated = 0
+    invalid = []
+
+    cursor = db.tickets.find(
+        {"game_id": game_id, "numbers_packed": {"$exists": False}},
+        {"_id": 0, "ticket_id": 1, "numbers": 1}
+    ).batch_size(batch_size)
+
+    operations = []
+    async for ticket in cursor:
+        try:
+            packed = encode_ticket_compact(ticket.get("numbers") or [])
+        except (ValueError, IndexError, TypeError):
+            invalid.append(ticket["ticket_id"])
+            continue
+        operations.append(UpdateOne({"ticket_id": ticket["ticket_id"]}, {"$set": {"numbers_packed": packed}}))
+        if len(operations) >= batch_size:
+            await db.tickets.bulk_write(operations, ordered=False)
+            migrated += len(operations)
+            operations = []
+
+    if operations:
+        await db.tickets.bulk_write(operations, ordered=False)
+        migrated += len(operations)
+
+    # Detection may only skip the "numbers" grid once every ticket is packed
+    if not invalid:
+        await db.games.update_one({"game_id": game_id}, {"$set": {"tickets_compact": True}})
+
+    return {"game_id": game_id, "migrated": migrated, "invalid_tickets": invalid, "tickets_compact": not invalid}
+
+@api_router.post("/admin/tickets/compact-migration")
+async def migrate_tickets_to_compact(request: Request, game_id: Optional[str] = None, _: bool = Depends(verify_admin)):
+    """Backfill the compact "numbers_packed" ticket encoding for one game or all legacy games"""
+    if game_id:
+        game_ids = [game_id]
+    else:
+        games = await db.games.find({"tickets_compact": {"$ne": True}}, {"_id": 0, "game_id": 1}).to_list(1000)
+        game_ids = [g["game_id"] for g in games]
+
+    results = [await migrate_game_tickets_to_compact(gid) for gid in game_ids]
+    return {
+        "games": results,
+        "total_migrated": sum(r["migrated"] for r in results)
+    }
+
+TICKET_STORE_PROJECTION = {
+    "_id": 0, "ticket_id": 1, "ticket_number": 1, "full_sheet_id": 1,
+    "ticket_position_in_sheet": 1, "numbers": 1, "numbers_packed": 1
+}
+
+async def write_game_ticket_store(game_id: str) -> Optional[dict]:
+    """Snapshot a game's tickets into its memory-mapped ticket store file"""
+    try:
+        tickets = await db.tickets.find({"game_id": game_id}, TICKET_STORE_PROJECTION).to_list(None)
+        path = await asyncio.to_thread(write_ticket_store, game_id, tickets)
+        return {"game_id": game_id, "tickets": len(tickets), "path": str(path)}
+    except Exception as e:
+        # The store only speeds up readers; Mongo stays the source of truth
+        logger.warning(f"Could not write ticket store for {game_id}: {e}")
+        return None
+
+@api_router.post("/admin/games/{game_id}/ticket-store")
+async def rebuild_ticket_store(game_id: str, request: Request, _: bool = Depends(verify_admin)):
+    """(Re)write the memory-mapped ticket store for a game"""
+    game = await db.games.find_one({"game_id": game_id}, {"_id": 0, "game_id": 1})
+    if not game:
+        raise HTTPException(status_code=404, detail="Game not found")
+
+    result = await write_game_ticket_store(game_id)
+    if not result:
+        raise HTTPException(status_code=500, detail="Failed to write ticket store")
+    return result
+
+@api_router.get("/admin/games/{game_id}/ticket-store/verify")
+async def verify_game_ticket_store(game_id: str, request: Request, _: bool = Depends(verify_admin)):
+    """Check a game's ticket store file against the tickets in Mongo"""
+    store = open_ticket_store(game_id)
+    if store is None:
+        raise HTTPException(status_code=404, detail="No ticket store for this game")
+
+    tickets = await db.tickets.find({"game_id": game_id}, TICKET_STORE_PROJECTION).to_list(None)
+    return await asyncio.to_thread(verify_ticket_store, store, tickets)
+
+@api_router.get("/admin/games/{game_id}/patterns")
+async def get_game_patterns(game_id: str, request: Request, _: bool = Depends(verify_admin)):
+    """A game's custom prize patterns, the built-ins and the ready-made presets."""
+    game = await db.games.find_one({"game_id": game_id}, {"_id": 0, "custom_patterns": 1, "prizes": 1, "prize_plan": 1})
+    if not game:
+        raise HTTPException(status_code=404, detail="Game not found")
+    
+    plan = get_prize_plan(game)
+    return {
+        "custom_patterns": game.get("custom_patterns", []),
+        "prize_patterns": {entry["name"]: entry["pattern"] for entry in plan["prizes"]},
+        "unmatched_prizes": plan["unmatched"],
+        "builtin_patterns": BUILTIN_DEFINITIONS,
+        "presets": PRESET_PATTERNS
+    }
+
+@api_router.put("/admin/games/{game_id}/patterns")
+async def set_game_patterns(game_id: str, data: CustomPatternsRequest, request: Request, _: bool = Depends(verify_admin)):
+    """
+    Register a game's custom prize patterns (see pattern_engine.py for the
+    definition format). A prize whose name matches a pattern's name is
+    detected with it. Only upcoming games can be changed.
+    """
+    game = await db.games.find_one({"game_id": game_id}, {"_id": 0})
+    if not game:
+        raise HTTPException(status_code=404, detail="Game not found")
+    if game["status"] != "upcoming":
+        raise HTTPException(status_code=400, detail="Can only change patterns of upcoming games")
+    
+    try:
+        patterns = validate_custom_patterns(data.patterns)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    plan = compile_prize_plan(game.get("prizes", {}), patterns)
+    await db.games.update_one(
+        {"game_id": game_id},
+        {"$set": {"custom_patterns": patterns, "prize_plan": plan}}
+    )
+    logger.info(f"Custom patterns for {game_id}: {[pattern_id_for(p['name']) for p in patterns]}")
+    return {
+        "custom_patterns": patterns,
+        "prize_patterns": {entry["name"]: entry["pattern"] for entry in plan["prizes"]},
+        "unmatched_prizes": plan["unmatched"]
+    }
+
+@api_router.get("/admin/metrics/call-writes")
+async def get_call_write_metrics(request: Request, _: bool = Depends(verify_admin)):
+    """Database writes per number call (call, winners and status) since startup."""
+    return get_call_write_stats()
+
+@api_router.get("/admin/metrics/notifications")
+async def get_notification_metrics(request: Request, _: bool = Depends(verify_admin)):
+    """Outbox backlog by status and what the workers delivered since startup."""
+    return await notification_outbox.get_stats()
+
+@api_router.get("/admin/metrics/tts-cache")
+async def get_tts_cache_metrics(request: Request, _: bool = Depends(verify_admin)):
+    """TTS audio cache hit rate and size of each tier."""
+    return get_tts_cache().get_stats()
+
+@api_router.get("/admin/metrics/log-writer")
+async def get_log_writer_metrics(request: Request, _: bool = Depends(verify_admin)):
+    """Buffered audit log writes: batch sizes, flush latency and backpressure."""
+    return log_writer.get_stats()
+
+@api_router.get("/admin/games/{game_id}/tickets/duplicates")
+async def audit_duplicate_tickets(game_id: str, request: Request, _: bool = Depends(verify_admin)):
+    """
+    Find tickets in a game holding the same 15 numbers, and rows shared by
+    several tickets (which lead to shared line wins). Single pass over the
+    game's fingerprints and packed grids.
+    """
+    tickets_by_fingerprint: Dict[str, List[str]] = {}
+    tickets_by_row: Dict[tuple, List[str]] = {}
+    scanned = 0
+    unchecked = 0
+    
+    cursor = db.tickets.find(
+        {"game_id": game_id},
+        {"_id": 0, "ticket_number": 1, "fingerprint": 1, "numbers_packed": 1}
+    ).batch_size(2000)
+    
+    async for ticket in cursor:
+        scanned += 1
+        grid = get_ticket_grid(ticket)
+        fingerprint = ticket.get("fingerprint") or (ticket_fingerprint(grid) if grid else None)
+        if not fingerprint:
+            # Legacy ticket without packed numbers - run the compact migration first
+            unchecked += 1
+            continue
+        
+        tickets_by_fingerprint.setdefault(fingerprint, []).append(ticket["ticket_number"])
+        for row_index, row in enumerate(grid):
+            row_key = (row_index, tuple(n for n in row if n))
+            tickets_by_row.setdefault(row_key, []).append(ticket["ticket_number"])
+    
+    duplicate_tickets = [t for t in tickets_by_fingerprint.values() if len(t) > 1]
+    shared_rows = [
+        {"row": ["top", "middle", "bottom"][row_index], "numbers": list(numbers), "tickets": t}
+        for (row_index, numbers), t in tickets_by_row.items() if len(t) > 1
+    ]
+    
+    return {
+        "game_id": game_id,
+        "tickets_scanned": scanned,
+        "tickets_unchecked": unchecked,
+        "duplicate_tickets": duplicate_tickets,
+        "shared_row_count": len(shared_rows),
+        "shared_rows": shared_rows[:100]
+    }
+
+@api_router.get("/admin/games/{game_id}/tickets/audit")
+async def audit_game_ticket_rules(game_id: str, request: Request, _: bool = Depends(verify_admin)):
+    """Check every ticket and full sheet of a game against the Tambola rules before opening sales"""
+    tickets = await db.tickets.find(
+        {"game_id": game_id},
+        {"_id": 0, "ticket_number": 1, "full_sheet_id": 1, "numbers_packed": 1, "numbers": 1}
+    ).to_list(None)
+    if not tickets:
+        raise HTTPException(status_code=404, detail="No tickets found for this game")
+    
+    result = await asyncio.to_thread(audit_game_tickets, tickets)
+    return {"game_id": game_id, **result}
+
 # ============ BOOKING ROUTES ============
 
 @api_router.post("/bookings", response_model=Booking)
@@ -1651,6 +1971,7 @@ async def create_booking(
         {"game_id": booking_data.game_id},
         {"$inc": {"available_tickets": -len(booking_data.ticket_ids)}}
     )
+    await touch_bookings(db, booking_data.game_id)
     
     if full_sheet_bonus:
         toast_msg = f"Booking created! 🎉 Full Sheet Bonus eligible for {bonus_sheet_id}!"
@@ -1673,7 +1994,7 @@ async def get_booking_tickets(booking_id: str, user: User = Depends(get_current_
     
     tickets = await db.tickets.find(
         {"ticket_id": {"$in": booking["ticket_ids"]}},
-        {"_id": 0}
+        TICKET_PUBLIC_PROJECTION
     ).to_list(len(booking["ticket_ids"]))
     
     game = await db.games.find_one({"game_id": booking["game_id"]}, {"_id": 0})
@@ -1724,6 +2045,7 @@ async def confirm_booking(booking_id: str, request: Request, _: bool = Depends(v
             "booked_by_name": holder_name
         }}
     )
+    await touch_bookings(db, booking["game_id"])
     
     return {"message": "Booking confirmed"}
 
@@ -1759,7 +2081,7 @@ async def get_game_tickets_admin(game_id: str, request: Request, status: Optiona
         elif status == "available":
             query["is_booked"] = False
     
-    tickets = await db.tickets.find(query, {"_id": 0}).to_list(1000)
+    tickets = await db.tickets.find(query, TICKET_PUBLIC_PROJECTION).to_list(1000)
     
     # Enrich with user info for booked tickets
     for ticket in tickets:
@@ -1783,6 +2105,7 @@ async def update_ticket_holder_name(ticket_id: str, data: EditTicketHolderReques
         {"ticket_id": ticket_id},
         {"$set": {"holder_name": data.holder_name}}
     )
+    await touch_bookings(db, ticket["game_id"])
     
     return {"message": f"Ticket holder updated to {data.holder_name}"}
 
@@ -1821,6 +2144,9 @@ async def cancel_ticket(ticket_id: str, request: Request, _: bool = Depends(veri
         {"$pull": {"ticket_ids": ticket_id}}
     )
     
+    # The cancelled ticket must no longer count towards a Full Sheet Bonus or near-wins
+    await touch_bookings(db, game_id)
+    
     return {"message": "Ticket cancelled and returned to available pool"}
 
 # ============ BOOKING REQUEST (APPROVAL WORKFLOW) ============
@@ -1950,6 +2276,7 @@ async def approve_booking_request(request_id: str, request: Request, data: Appro
         {"game_id": req["game_id"]},
         {"$inc": {"available_tickets": -len(req["ticket_ids"])}}
     )
+    await touch_bookings(db, req["game_id"])
     
     # Update request status
     update_data = {"status": "approved", "approved_at": datetime.now(timezone.utc)}
@@ -2013,25 +2340,22 @@ VOICE_MAP = {
     "male": ["onyx", "echo", "fable", "ash"]
 }
 
+DEFAULT_CALLER_SETTINGS = {
+    "voice": "nova",
+    "gender": "female",
+    "speed": 1.0,
+    "accent": "indian",
+    "prefix_lines": DEFAULT_PREFIX_LINES.copy(),
+    "enabled": True
+}
+
+# Read on every TTS request; all writes below go through it
+caller_settings_cache = CallerSettingsCache.from_env(db, DEFAULT_CALLER_SETTINGS)
+
 @api_router.get("/admin/caller-settings")
 async def get_caller_settings(request: Request, _: bool = Depends(verify_admin)):
     """Get global caller voice settings"""
-    settings = await db.caller_settings.find_one({"settings_id": "global"}, {"_id": 0})
-    
-    if not settings:
-        # Create default settings
-        settings = {
-            "settings_id": "global",
-            "voice": "nova",
-            "gender": "female",
-            "speed": 1.0,
-            "accent": "indian",
-            "prefix_lines": DEFAULT_PREFIX_LINES.copy(),
-            "enabled": True
-        }
-        await db.caller_settings.insert_one(settings)
-    
-    return settings
+    return await caller_settings_cache.get(fresh=True)
 
 @api_router.put("/admin/caller-settings")
 async def update_caller_settings(data: UpdateCallerSettingsRequest, request: Request, _: bool = Depends(verify_admin)):
@@ -2045,31 +2369,26 @@ async def update_caller_settings(data: UpdateCallerSettingsRequest, request: Req
             update_data["voice"] = voices[0]
     
     if update_data:
-        await db.caller_settings.update_one(
-            {"settings_id": "global"},
-            {"$set": update_data},
-            upsert=True
-        )
+        settings = await caller_settings_cache.update({"$set": update_data})
+    else:
+        settings = await caller_settings_cache.get(fresh=True)
     
-    # Fetch and return updated settings
-    settings = await db.caller_settings.find_one({"settings_id": "global"}, {"_id": 0})
+    # A new voice or speed needs its own sprite before the next game
+    if {"voice", "speed"} & update_data.keys():
+        build_call_sprite(settings)
     return settings
 
 @api_router.post("/admin/caller-settings/prefix-lines")
 async def add_prefix_line(line: str, request: Request, _: bool = Depends(verify_admin)):
     """Add a custom prefix line"""
-    await db.caller_settings.update_one(
-        {"settings_id": "global"},
-        {"$push": {"prefix_lines": line}},
-        upsert=True
-    )
+    await caller_settings_cache.update({"$push": {"prefix_lines": line}})
     return {"message": "Prefix line added"}
 
 @api_router.delete("/admin/caller-settings/prefix-lines/{index}")
 async def delete_prefix_line(index: int, request: Request, _: bool = Depends(verify_admin)):
     """Delete a prefix line by index"""
-    settings = await db.caller_settings.find_one({"settings_id": "global"}, {"_id": 0})
-    if not settings or "prefix_lines" not in settings:
+    settings = await caller_settings_cache.get(fresh=True)
+    if "prefix_lines" not in settings:
         raise HTTPException(status_code=404, detail="No prefix lines found")
     
     if index < 0 or index >= len(settings["prefix_lines"]):
@@ -2078,36 +2397,158 @@ async def delete_prefix_line(index: int, request: Request, _: bool = Depends(ver
     prefix_lines = settings["prefix_lines"]
     del prefix_lines[index]
     
-    await db.caller_settings.update_one(
-        {"settings_id": "global"},
-        {"$set": {"prefix_lines": prefix_lines}}
-    )
+    await caller_settings_cache.update({"$set": {"prefix_lines": prefix_lines}})
     return {"message": "Prefix line deleted"}
 
 @api_router.post("/admin/caller-settings/reset-prefix-lines")
 async def reset_prefix_lines(request: Request, _: bool = Depends(verify_admin)):
     """Reset prefix lines to defaults"""
-    await db.caller_settings.update_one(
-        {"settings_id": "global"},
-        {"$set": {"prefix_lines": DEFAULT_PREFIX_LINES.copy()}},
-        upsert=True
-    )
+    await caller_settings_cache.update({"$set": {"prefix_lines": DEFAULT_PREFIX_LINES.copy()}})
     return {"message": "Prefix lines reset to defaults"}
 
 # ============ TTS ENDPOINT ============
 
+TTS_MODEL = "tts-1"
+
+async def load_caller_settings() -> dict:
+    return await caller_settings_cache.get()
+
+async def synthesize_speech(text: str, voice: str, speed: float) -> bytes:
+    """One OpenAI TTS synthesis via emergentintegrations, as mp3 bytes"""
+    tts = OpenAITextToSpeech(api_key=os.environ.get("EMERGENT_LLM_KEY"))
+    audio_base64 = await tts.generate_speech_base64(
+        text=text,
+        model=TTS_MODEL,
+        voice=voice,
+        speed=speed
+    )
+    return base64.b64decode(audio_base64)
+
+async def prerender_call_audio(game_id: str):
+    """Render every number call for a game that just went live into the TTS cache, in the background"""
+    try:
+        settings = await load_caller_settings()
+        if not settings.get("enabled") or not os.environ.get("EMERGENT_LLM_KEY"):
+            return
+        include_prefixes = os.environ.get("TTS_PRERENDER_PREFIXES", "false").lower() == "true"
+        start_prerender(
+            game_id,
+            prerender_texts(settings.get("prefix_lines"), include_prefixes),
+            settings.get("voice", "nova"),
+            settings.get("speed", 1.0),
+            TTS_MODEL,
+            synthesize_speech
+        )
+    except Exception as e:
+        logger.error(f"Failed to start TTS pre-render for {game_id}: {e}")
+
+_live_game_preps: Dict[str, asyncio.Task] = {}
+
+async def prepare_live_game(game_id: str):
+    """
+    Go-live work for an admin game, in order: its ticket store, the detection
+    state (grids read from that store), then the call audio. Calls made before
+    it finishes build the detection state themselves.
+    """
+    try:
+        await write_game_ticket_store(game_id)
+        if get_detection_state(game_id) is None:
+            await load_detection_state(db, game_id, ticket_store=open_ticket_store(game_id))
+        await prerender_call_audio(game_id)
+    except Exception as e:
+        logger.error(f"Go-live prep for {game_id} failed: {e}")
+    finally:
+        _live_game_preps.pop(game_id, None)
+
+def start_live_game_prep(game_id: str) -> asyncio.Task:
+    """Run prepare_live_game() in the background so going live does not wait on it"""
+    task = _live_game_preps.get(game_id)
+    if task is None:
+        task = _live_game_preps[game_id] = asyncio.create_task(prepare_live_game(game_id))
+    return task
+
+async def cancel_live_game_preps():
+    tasks = list(_live_game_preps.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+def build_call_sprite(settings: dict):
+    """Start building the call sprite for the caller's voice in the background, if TTS is available"""
+    if not settings.get("enabled", True) or not os.environ.get("EMERGENT_LLM_KEY"):
+        return None
+    return start_sprite_build(
+        db, settings.get("voice", "nova"), settings.get("speed", 1.0), TTS_MODEL, synthesize_speech
+    )
+
+@api_router.get("/tts/sprite")
+async def get_tts_sprite():
+    """Sprite of all 90 calls in the caller's voice; clients load it once and play offsets locally"""
+    settings = await load_caller_settings()
+    if not settings.get("enabled"):
+        return {"available": False}
+    manifest = await get_sprite_manifest(db, settings.get("voice", "nova"), settings.get("speed", 1.0), TTS_MODEL)
+    if manifest:
+        return {"available": True, **manifest}
+    # Not built yet (or evicted) - build it for the next request, clients use per-call audio meanwhile
+    return {"available": False, "building": build_call_sprite(settings) is not None}
+
+@api_router.get("/admin/tts/sprite")
+async def get_tts_sprite_status(request: Request, _: bool = Depends(verify_admin)):
+    """Stored sprite manifests and running or failed builds"""
+    manifests = await db.tts_sprites.find({}, {"_id": 0, "sprite": 0}).to_list(100)
+    return {"sprites": manifests, **sprite_build_status()}
+
+@api_router.post("/admin/tts/sprite/build")
+async def build_tts_sprite(request: Request, _: bool = Depends(verify_admin)):
+    """Rebuild the call sprite for the current caller settings"""
+    settings = await load_caller_settings()
+    if build_call_sprite(settings) is None:
+        raise HTTPException(status_code=400, detail="Server TTS is disabled or not configured")
+    return {"message": "Sprite build started", "voice": settings.get("voice", "nova"), "speed": settings.get("speed", 1.0)}
+
+@api_router.get("/admin/tts/prerender")
+async def get_tts_prerender_jobs(request: Request, _: bool = Depends(verify_admin)):
+    """Progress and failures of call-audio pre-render jobs"""
+    return {"jobs": prerender_progress()}
+
+@api_router.get("/admin/tts/prerender/{game_id}")
+async def get_tts_prerender_job(game_id: str, request: Request, _: bool = Depends(verify_admin)):
+    job = get_prerender_job(game_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="No pre-render job for this game")
+    return job.progress()
+
+TTS_AUDIO_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+@api_router.get("/tts/audio/{key}.mp3")
+async def get_tts_audio(key: str, request: Request):
+    """Serve a cached clip as mp3; keys are content hashes, so the URL never changes meaning"""
+    audio = await get_tts_cache().get(key, count=False) if is_cache_key(key) else None
+    if audio is None:
+        raise HTTPException(status_code=404, detail="Audio not found")
+    
+    etag = audio_etag(audio)
+    headers = {"ETag": etag, "Cache-Control": TTS_AUDIO_CACHE_CONTROL, "Accept-Ranges": "bytes"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    
+    try:
+        byte_range = parse_byte_range(request.headers.get("range"), len(audio))
+    except ValueError:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{len(audio)}"})
+    if byte_range is None:
+        return Response(content=audio, media_type="audio/mpeg", headers=headers)
+    
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{len(audio)}"
+    return Response(content=audio[start:end + 1], status_code=206, media_type="audio/mpeg", headers=headers)
+
 @api_router.post("/tts/generate")
 async def generate_tts(text: str, include_prefix: bool = True):
     """Generate TTS audio for a number call using OpenAI TTS via emergentintegrations"""
     try:
-        settings = await db.caller_settings.find_one({"settings_id": "global"}, {"_id": 0})
-        if not settings:
-            settings = {
-                "voice": "nova",
-                "speed": 1.0,
-                "prefix_lines": DEFAULT_PREFIX_LINES.copy(),
-                "enabled": True
-            }
+        settings = await load_caller_settings()
         
         if not settings.get("enabled"):
             return {"enabled": False, "audio": None}
@@ -2118,27 +2559,28 @@ async def generate_tts(text: str, include_prefix: bool = True):
             prefix = random.choice(settings["prefix_lines"])
             full_text = f"{prefix} {text}"
         
-        # TTS generation using emergentintegrations
+        # TTS generation using emergentintegrations; clips are cached by text, voice, speed and model
+        # and number calls are usually pre-rendered when the game starts
         api_key = os.environ.get("EMERGENT_LLM_KEY")
         
         if api_key:
             try:
-                tts = OpenAITextToSpeech(api_key=api_key)
-                
-                # Generate speech as base64
-                audio_base64 = await tts.generate_speech_base64(
-                    text=full_text,
-                    model="tts-1",
-                    voice=settings.get("voice", "nova"),
-                    speed=settings.get("speed", 1.0)
+                voice = settings.get("voice", "nova")
+                speed = settings.get("speed", 1.0)
+                key = tts_cache_key(full_text, voice, speed, TTS_MODEL)
+                audio, cached = await get_tts_cache().get_or_generate(
+                    key, lambda: synthesize_speech(full_text, voice, speed)
                 )
                 
+                # Only the URL - the audio itself is fetched (and HTTP-cached) from /tts/audio
                 return {
                     "enabled": True,
-                    "audio": audio_base64,
+                    "audio_url": audio_url(key),
+                    "cache_key": key,
                     "text": full_text,
                     "format": "mp3",
-                    "use_browser_tts": False
+                    "use_browser_tts": False,
+                    "cached": cached
                 }
             except Exception as e:
                 logger.warning(f"OpenAI TTS failed, using browser fallback: {str(e)}")
@@ -2168,10 +2610,11 @@ async def start_game(game_id: str):
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
     
-    # Update game status
+    # Update game status; the prize plan is (re)compiled once here so
+    # detection never resolves prize names per call
     await db.games.update_one(
         {"game_id": game_id},
-        {"$set": {"status": "live"}}
+        {"$set": {"status": "live", "prize_plan": get_prize_plan(game)}}
     )
     
     # Create game session
@@ -2184,82 +2627,89 @@ async def start_game(game_id: str):
     }
     
     await db.game_sessions.insert_one(session)
+    start_live_game_prep(game_id)
     return {"message": "Game started"}
 
+CALL_ATTEMPTS = 3
+
 @api_router.post("/games/{game_id}/call-number")
 async def call_number(game_id: str):
-    session = await db.game_sessions.find_one({"game_id": game_id}, {"_id": 0})
-    if not session:
-        raise HTTPException(status_code=404, detail="Game session not found")
-    
-    called_numbers = session["called_numbers"]
-    
-    # Generate next number (1-90)
-    available_numbers = [n for n in range(1, 91) if n not in called_numbers]
-    if not available_numbers:
-        return {" message": "All numbers called"}
-    
-    next_number = random.choice(available_numbers)
-    
-    # Update session
-    await db.game_sessions.update_one(
-        {"game_id": game_id},
-        {
-            "$push": {"called_numbers": next_number},
-            "$set": {"current_number": next_number}
-        }
-    )
-    
     # Auto-detect winners after calling number
     from winner_detection import auto_detect_winners
-    from notifications import send_winner_email, send_winner_sms
-    
-    existing_winners = session.get("winners", {})
+    from notifications import winner_whatsapp_message
     
     # Get game prizes (dividends) for proper detection
     game = await db.games.find_one({"game_id": game_id}, {"_id": 0})
     game_dividends = game.get("prizes", {}) if game else {}
     
-    new_winners = await auto_detect_winners(db, game_id, called_numbers + [next_number], existing_winners, game_dividends)
-    
-    # Update winners and send notifications
-    if new_winners:
-        game = await db.games.find_one({"game_id": game_id}, {"_id": 0})
-        all_winners = {**existing_winners, **new_winners}
+    # The call and its winners are one write that only applies if no other
+    # call got in first; on a conflict the number is drawn again
+    for attempt in range(CALL_ATTEMPTS):
+        session = await db.game_sessions.find_one({"game_id": game_id}, {"_id": 0})
+        if not session:
+            raise HTTPException(status_code=404, detail="Game session not found")
         
-        await db.game_sessions.update_one(
-            {"game_id": game_id},
-            {"$set": {"winners": all_winners}}
+        called_numbers = session["called_numbers"]
+        
+        # Generate next number (1-90)
+        available_numbers = [n for n in range(1, 91) if n not in called_numbers]
+        if not available_numbers:
+            return {" message": "All numbers called"}
+        
+        next_number = random.choice(available_numbers)
+        
+        existing_winners = session.get("winners", {})
+        commit = CallCommit("game_id", game_id, existing_winners)
+        commit.call(next_number, called_numbers + [next_number])
+        
+        new_winners = await auto_detect_winners(
+            db, game_id, called_numbers + [next_number], existing_winners, game_dividends,
+            compact=bool(game and game.get("tickets_compact")),
+            ticket_store=open_ticket_store(game_id),
+            prize_plan=get_prize_plan(game),
+            bookings_version=(game or {}).get("bookings_version", 0)
         )
         
-        # Send notifications to new winners
+        # One write for the number and its winners
+        commit.add_winners(new_winners)
+        result = await db.game_sessions.update_one(commit.filter(), commit.update())
+        record_call_writes(1)
+        if result.matched_count:
+            break
+        # The detection state already marked the number that was not written
+        drop_detection_state(game_id)
+        logger.warning(f"Call {next_number} for {game_id} lost a race with another call (attempt {attempt + 1})")
+    else:
+        raise HTTPException(status_code=409, detail="Another number was called at the same time, please retry")
+    
+    # Send notifications to new winners
+    if new_winners:
+        # Contact details for every winner come from the game's player cache
+        players = await resolve_players(db, game_id, [w.get("user_id") for w in new_winners.values()])
         for prize_type, winner_info in new_winners.items():
             prize_amount = game["prizes"].get(prize_type, 0)
             
             # Get winner name - check holder_name first (from winner_detection), then fallback
             winner_name = winner_info.get("holder_name") or winner_info.get("user_name") or winner_info.get("name") or "Player"
-            winner_email = winner_info.get("user_email", "")
+            player = players.get(winner_info.get("user_id"))
+            winner_email = winner_info.get("user_email") or player.get("email", "")
             
-            # Send email
-            send_winner_email(
-                winner_email,
-                winner_name,
-                prize_type,
-                prize_amount,
-                game["name"]
-            )
+            # Queue email and WhatsApp; the outbox workers deliver them after this call returns
+            if winner_email:
+                await notification_outbox.enqueue_winner_email(
+                    winner_email,
+                    winner_name,
+                    prize_type,
+                    prize_amount,
+                    game["name"]
+                )
             
-            # Send SMS (if phone number available)
-            user_id = winner_info.get("user_id")
-            if user_id:
-                user = await db.users.find_one({"user_id": user_id}, {"_id": 0})
-                if user and user.get("phone"):
-                    send_winner_sms(
-                        user["phone"],
-                        winner_name,
-                        prize_type,
-                        prize_amount
-                    )
+            # WhatsApp (if phone number available)
+            if player.get("phone"):
+                await notification_outbox.enqueue_whatsapp(
+                    player["phone"],
+                    winner_whatsapp_message(winner_name, prize_type, prize_amount, "Tambola")
+                )
             
             logger.info(f"🎉 Winner notified: {winner_name} - {prize_type} - ₹{prize_amount}")
     
@@ -2312,6 +2762,7 @@ async def end_game(game_id: str):
         {"game_id": game_id},
         {"$set": {"status": "completed", "completed_at": datetime.now(timezone.utc).isoformat()}}
     )
+    drop_detection_state(game_id)
     return {"message": "Game ended"}
 
 # ============ PROFILE ROUTES ============
@@ -2400,15 +2851,12 @@ async def create_user_game(
         share_code = generate_share_code()
     
     # Generate tickets with proper structure using Full Sheets
-    from ticket_generator import generate_full_sheet
-    
     tickets = []
     num_sheets = (game_data.max_tickets + 5) // 6  # Round up to full sheets
     actual_ticket_count = 0
     
-    for sheet_num in range(num_sheets):
+    for sheet_num, full_sheet in enumerate(generate_unique_full_sheets(num_sheets)):
         sheet_id = f"FS{sheet_num + 1:03d}"
-        full_sheet = generate_full_sheet()
         
         for position, ticket_numbers in enumerate(full_sheet, 1):
             if actual_ticket_count >= game_data.max_tickets:
@@ -2772,6 +3220,7 @@ async def start_user_game(
         {"user_game_id": user_game_id},
         {"$set": {"status": "live", "started_at": datetime.now(timezone.utc)}}
     )
+    await prerender_call_audio(user_game_id)
     
     return {"message": "Game started!"}
 
@@ -2853,7 +3302,7 @@ async def get_game_control_data(game_id: str, request: Request, _: bool = Depend
     
     # Get ticket sales summary
     total_tickets = game.get("ticket_count", 0)
-    tickets = await db.tickets.find({"game_id": game_id}, {"_id": 0}).to_list(1000)
+    tickets = await db.tickets.find({"game_id": game_id}, TICKET_PUBLIC_PROJECTION).to_list(1000)
     booked_tickets = [t for t in tickets if t.get("is_booked")]
     confirmed_tickets = [t for t in booked_tickets if t.get("booking_status") == "confirmed"]
     
@@ -2875,7 +3324,7 @@ async def get_game_control_data(game_id: str, request: Request, _: bool = Depend
         booking["whatsapp_opt_in"] = booking.get("whatsapp_opt_in", True)
         
         # Check if booking confirmation was sent and get details
-        confirmation_log = await db.whatsapp_logs.find_one({
+        confirmation_log = await log_writer.find_one("whatsapp_logs", {
             "booking_id": booking["booking_id"],
             "message_type": "booking_confirmation"
         }, {"_id": 0})
@@ -2884,10 +3333,8 @@ async def get_game_control_data(game_id: str, request: Request, _: bool = Depend
         booking["whatsapp_sent_at"] = confirmation_log.get("sent_at") if confirmation_log else None
     
     # Check if game reminder was sent
-    reminder_sent = await db.whatsapp_logs.find_one({
-        "game_id": game_id,
-        "message_type": "game_reminder"
-    })
+    reminder_sent = await db.campaigns.find_one({"game_id": game_id, "message_type": "game_reminder"}) or \
+        await log_writer.find_one("whatsapp_logs", {"game_id": game_id, "message_type": "game_reminder"})
     
     # Get WhatsApp message logs for this game
     whatsapp_logs = await db.whatsapp_logs.find(
@@ -2936,7 +3383,10 @@ async def get_game_control_data(game_id: str, request: Request, _: bool = Depend
         "has_sold_tickets": has_sold_tickets,
         "whatsapp_status": {
             "reminder_sent": reminder_sent is not None,
-            "reminder_sent_at": reminder_sent.get("sent_at") if reminder_sent else None,
+            # Campaigns record when they were created and completed; legacy reminder logs have sent_at
+            "reminder_sent_at": (
+                reminder_sent.get("completed_at") or reminder_sent.get("created_at") or reminder_sent.get("sent_at")
+            ) if reminder_sent else None,
             "can_send_reminder": can_send_reminder
         },
         "whatsapp_logs": whatsapp_logs,
@@ -2946,8 +3396,6 @@ async def get_game_control_data(game_id: str, request: Request, _: bool = Depend
 @api_router.post("/admin/games/{game_id}/whatsapp/booking-confirmation")
 async def send_booking_confirmation(game_id: str, data: SendBookingConfirmationRequest, request: Request, _: bool = Depends(verify_admin)):
     """Send booking confirmation to a specific booking (once per booking, after payment approved)"""
-    from notifications import send_whatsapp_message
-    
     # Get booking
     booking = await db.bookings.find_one({"booking_id": data.booking_id}, {"_id": 0})
     if not booking:
@@ -2961,7 +3409,7 @@ async def send_booking_confirmation(game_id: str, data: SendBookingConfirmationR
         raise HTTPException(status_code=400, detail="Can only send confirmation for approved/confirmed bookings")
     
     # Check if already sent
-    existing = await db.whatsapp_logs.find_one({
+    existing = await log_writer.find_one("whatsapp_logs", {
         "booking_id": data.booking_id,
         "message_type": "booking_confirmation"
     })
@@ -3004,12 +3452,9 @@ Your booking for *{game['name']}* has been confirmed!
 
 🎮 Join the game at the scheduled time. Good luck! 🍀"""
     
-    result = send_whatsapp_message(user["phone"], message)
-    failure_reason = None if result else "Twilio API error or invalid phone number"
-    
-    # Log the message (immutable)
+    # Log the message (immutable); the outbox worker records the outcome on it
     log_id = f"wl_{uuid.uuid4().hex[:8]}"
-    await db.whatsapp_logs.insert_one({
+    await log_writer.write("whatsapp_logs", {
         "log_id": log_id,
         "game_id": game_id,
         "message_type": "booking_confirmation",
@@ -3020,13 +3465,14 @@ Your booking for *{game['name']}* has been confirmed!
         "booking_id": data.booking_id,
         "sent_at": datetime.now(timezone.utc),
         "sent_by_admin": True,
-        "status": "sent" if result else "failed",
-        "delivery_status": "pending" if result else "failed",
-        "failure_reason": failure_reason
+        "status": "queued",
+        "delivery_status": "queued",
+        "failure_reason": None
     })
+    await notification_outbox.enqueue_whatsapp(user["phone"], message, log_id=log_id)
     
     # Also log to control logs
-    await db.game_control_logs.insert_one({
+    await log_writer.write("game_control_logs", {
         "log_id": f"gcl_{uuid.uuid4().hex[:8]}",
         "game_id": game_id,
         "action": "BOOKING_CONFIRMATION_SENT",
@@ -3039,25 +3485,18 @@ Your booking for *{game['name']}* has been confirmed!
         "timestamp": datetime.now(timezone.utc)
     })
     
-    if result:
-        return {"success": True, "message": "Booking confirmation sent"}
-    else:
-        raise HTTPException(status_code=500, detail="Failed to send WhatsApp message")
+    return {"success": True, "message": "Booking confirmation sent"}
 
 @api_router.post("/admin/games/{game_id}/whatsapp/game-reminder")
 async def send_game_reminder(game_id: str, request: Request, _: bool = Depends(verify_admin)):
     """Send game reminder to all confirmed bookings (once per game, within 24 hours)"""
-    from notifications import send_whatsapp_message
-    
     game = await db.games.find_one({"game_id": game_id}, {"_id": 0})
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
     
-    # Check if reminder already sent
-    existing = await db.whatsapp_logs.find_one({
-        "game_id": game_id,
-        "message_type": "game_reminder"
-    })
+    # Check if reminder already sent (or its campaign is under way)
+    existing = await db.campaigns.find_one({"game_id": game_id, "message_type": "game_reminder"}) or \
+        await log_writer.find_one("whatsapp_logs", {"game_id": game_id, "message_type": "game_reminder"})
     if existing:
         raise HTTPException(status_code=400, detail="Game reminder already sent for this game")
     
@@ -3075,77 +3514,42 @@ async def send_game_reminder(game_id: str, request: Request, _: bool = Depends(v
     except ValueError:
         pass  # If parsing fails, allow sending
     
-    # Get all confirmed bookings with WhatsApp opt-in
-    bookings = await db.bookings.find({
-        "game_id": game_id,
-        "status": "confirmed"
-    }, {"_id": 0}).to_list(100)
-    
-    # Filter for opt-in users only
-    opt_in_bookings = [b for b in bookings if b.get("whatsapp_opt_in", True)]
-    
-    if not opt_in_bookings:
+    # One aggregation for every confirmed, opted-in booking and its user
+    recipients = await snapshot_recipients(db, game_id)
+    if not recipients:
         raise HTTPException(status_code=400, detail="No confirmed bookings with WhatsApp opt-in to send reminders to")
     
-    sent_count = 0
-    failed_count = 0
-    skipped_count = 0
-    template_name = "game_reminder_v1"
-    
-    for booking in opt_in_bookings:
-        user = await db.users.find_one({"user_id": booking["user_id"]}, {"_id": 0})
-        if not user or not user.get("phone"):
-            skipped_count += 1
-            continue
-        
-        message = f"""⏰ *Game Reminder - Six Seven Tambola*
+    def render(recipient: dict) -> str:
+        return f"""⏰ *Game Reminder - Six Seven Tambola*
 
-Hi {user.get('name', 'Player')}! 🎲
+Hi {recipient.get('name', 'Player')}! 🎲
 
 Your game *{game['name']}* is starting soon!
 
 📅 *Game Details:*
 • Date: {game['date']}
 • Time: {game['time']}
-• Your Tickets: {len(booking.get('ticket_ids', []))}
+• Your Tickets: {recipient.get('ticket_count', 0)}
 
 🎮 Don't miss it! Join on time for the best experience.
 
 Good luck! 🍀"""
-        
-        result = send_whatsapp_message(user["phone"], message)
-        if result:
-            sent_count += 1
-        else:
-            failed_count += 1
     
-    # Log the reminder (immutable)
-    log_id = f"wl_{uuid.uuid4().hex[:8]}"
-    await db.whatsapp_logs.insert_one({
-        "log_id": log_id,
-        "game_id": game_id,
-        "message_type": "game_reminder",
-        "template_name": template_name,
-        "recipient_user_id": None,
-        "recipient_phone": "multiple",
-        "recipient_name": f"{sent_count} players",
-        "booking_id": None,
-        "sent_at": datetime.now(timezone.utc),
-        "sent_by_admin": True,
-        "status": "sent" if sent_count > 0 else "failed",
-        "delivery_status": "pending" if sent_count > 0 else "failed",
-        "failure_reason": f"{failed_count} failed, {skipped_count} skipped" if failed_count > 0 or skipped_count > 0 else None
-    })
+    # Messages go out in the background; each one is logged to whatsapp_logs as its chunk finishes
+    campaign = await create_campaign(db, game_id, "game_reminder", "game_reminder_v1", render, recipients)
+    queued_count = campaign["total"] - campaign["skipped"]
+    start_campaign(campaign["campaign_id"])
     
     # Log to control logs
-    await db.game_control_logs.insert_one({
+    await log_writer.write("game_control_logs", {
         "log_id": f"gcl_{uuid.uuid4().hex[:8]}",
         "game_id": game_id,
         "action": "GAME_REMINDER_SENT",
         "details": {
-            "sent_count": sent_count,
-            "failed_count": failed_count,
-            "total_bookings": len(bookings)
+            "campaign_id": campaign["campaign_id"],
+            "queued_count": queued_count,
+            "skipped_count": campaign["skipped"],
+            "total_bookings": campaign["total"]
         },
         "admin_user": "admin",
         "timestamp": datetime.now(timezone.utc)
@@ -3153,16 +3557,67 @@ Good luck! 🍀"""
     
     return {
         "success": True,
-        "message": f"Game reminder sent to {sent_count} players",
-        "sent_count": sent_count,
-        "failed_count": failed_count
+        "message": f"Game reminder sending to {queued_count} players",
+        "campaign_id": campaign["campaign_id"],
+        "sent_count": queued_count,
+        "skipped_count": campaign["skipped"]
     }
 
+# ============ CAMPAIGNS ============
+
+# Campaign runs in progress in this process
+active_campaigns: Dict[str, asyncio.Task] = {}
+
+def start_campaign(campaign_id: str) -> bool:
+    """
+    Run (or resume) a campaign in the background; False if it is already
+    running here. A run in another worker holds the campaign's lease, and
+    this one then stops without sending.
+    """
+    if campaign_id in active_campaigns:
+        return False
+    runner = CampaignRunner(db, notification_outbox.transport, window=campaign_window(),
+                            limiter=notification_outbox.limiters.get("twilio"))
+    task = asyncio.create_task(runner.run(campaign_id))
+    active_campaigns[campaign_id] = task
+    task.add_done_callback(lambda _: active_campaigns.pop(campaign_id, None))
+    return True
+
+@api_router.get("/admin/campaigns/{campaign_id}")
+async def get_campaign(campaign_id: str, request: Request, _: bool = Depends(verify_admin)):
+    """Campaign progress: sent, failed, skipped and remaining recipients."""
+    campaign = await db.campaigns.find_one({"campaign_id": campaign_id}, {"_id": 0})
+    if not campaign:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    return {**campaign_progress(campaign), "active": campaign_id in active_campaigns}
+
+@api_router.post("/admin/campaigns/{campaign_id}/resume")
+async def resume_campaign(campaign_id: str, request: Request, _: bool = Depends(verify_admin)):
+    """Send whatever an interrupted campaign has not sent yet."""
+    campaign = await db.campaigns.find_one({"campaign_id": campaign_id}, {"_id": 0})
+    if not campaign:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    if campaign["status"] == "completed":
+        raise HTTPException(status_code=400, detail="Campaign already completed")
+    if not start_campaign(campaign_id):
+        raise HTTPException(status_code=400, detail="Campaign is already running")
+    return {"success": True, "campaign_id": campaign_id}
+
+@api_router.post("/admin/campaigns/{campaign_id}/retry-failed")
+async def retry_failed_campaign_recipients(campaign_id: str, request: Request, _: bool = Depends(verify_admin)):
+    """Send the campaign's failed messages again (failed recipients are otherwise final)."""
+    campaign = await db.campaigns.find_one({"campaign_id": campaign_id}, {"_id": 0})
+    if not campaign:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    retried = await retry_failed_recipients(db, campaign_id)
+    if not retried:
+        raise HTTPException(status_code=400, detail="Campaign has no failed recipients")
+    start_campaign(campaign_id)
+    return {"success": True, "campaign_id": campaign_id, "retried": retried}
+
 @api_router.post("/admin/games/{game_id}/whatsapp/join-link")
 async def send_join_link(game_id: str, data: SendJoinLinkRequest, request: Request, _: bool = Depends(verify_admin)):
     """Send game join link to a specific user (can resend)"""
-    from notifications import send_whatsapp_message
-    
     game = await db.games.find_one({"game_id": game_id}, {"_id": 0})
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
@@ -3192,12 +3647,9 @@ Your game *{game['name']}* is ready!
 
 See you there! 🎉"""
     
-    result = send_whatsapp_message(user["phone"], message)
-    failure_reason = None if result else "Twilio API error or invalid phone number"
-    
-    # Log the message (immutable)
+    # Log the message (immutable); the outbox worker records the outcome on it
     log_id = f"wl_{uuid.uuid4().hex[:8]}"
-    await db.whatsapp_logs.insert_one({
+    await log_writer.write("whatsapp_logs", {
         "log_id": log_id,
         "game_id": game_id,
         "message_type": "join_link",
@@ -3208,13 +3660,14 @@ See you there! 🎉"""
         "booking_id": None,
         "sent_at": datetime.now(timezone.utc),
         "sent_by_admin": True,
-        "status": "sent" if result else "failed",
-        "delivery_status": "pending" if result else "failed",
-        "failure_reason": failure_reason
+        "status": "queued",
+        "delivery_status": "queued",
+        "failure_reason": None
     })
+    await notification_outbox.enqueue_whatsapp(user["phone"], message, log_id=log_id)
     
     # Log to control logs
-    await db.game_control_logs.insert_one({
+    await log_writer.write("game_control_logs", {
         "log_id": f"gcl_{uuid.uuid4().hex[:8]}",
         "game_id": game_id,
         "action": "JOIN_LINK_SENT",
@@ -3226,16 +3679,11 @@ See you there! 🎉"""
         "timestamp": datetime.now(timezone.utc)
     })
     
-    if result:
-        return {"success": True, "message": "Join link sent"}
-    else:
-        raise HTTPException(status_code=500, detail="Failed to send WhatsApp message")
+    return {"success": True, "message": "Join link sent"}
 
 @api_router.post("/admin/games/{game_id}/whatsapp/winner-announcement")
 async def send_winner_announcement(game_id: str, data: SendWinnerAnnouncementRequest, request: Request, _: bool = Depends(verify_admin)):
     """Send winner announcement WhatsApp message to a specific winner (one per prize, no bulk)"""
-    from notifications import send_whatsapp_message
-    
     game = await db.games.find_one({"game_id": game_id}, {"_id": 0})
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
@@ -3258,7 +3706,7 @@ async def send_winner_announcement(game_id: str, data: SendWinnerAnnouncementReq
         raise HTTPException(status_code=400, detail="Winner user_id mismatch")
     
     # Check if announcement already sent for this winner/prize
-    existing = await db.whatsapp_logs.find_one({
+    existing = await log_writer.find_one("whatsapp_logs", {
         "game_id": game_id,
         "message_type": "winner_announcement",
         "recipient_user_id": data.winner_user_id,
@@ -3296,12 +3744,9 @@ To claim your prize, please contact us on WhatsApp with your:
 
 Thank you for playing Six Seven Tambola! 🎲"""
     
-    result = send_whatsapp_message(user["phone"], message)
-    failure_reason = None if result else "Twilio API error or invalid phone number"
-    
-    # Log the message (immutable)
+    # Log the message (immutable); the outbox worker records the outcome on it
     log_id = f"wl_{uuid.uuid4().hex[:8]}"
-    await db.whatsapp_logs.insert_one({
+    await log_writer.write("whatsapp_logs", {
         "log_id": log_id,
         "game_id": game_id,
         "message_type": "winner_announcement",
@@ -3312,10 +3757,11 @@ Thank you for playing Six Seven Tambola! 🎲"""
         "booking_id": data.prize_type,  # Store prize_type for tracking
         "sent_at": datetime.now(timezone.utc),
         "sent_by_admin": True,
-        "status": "sent" if result else "failed",
-        "delivery_status": "pending" if result else "failed",
-        "failure_reason": failure_reason
+        "status": "queued",
+        "delivery_status": "queued",
+        "failure_reason": None
     })
+    await notification_outbox.enqueue_whatsapp(user["phone"], message, log_id=log_id)
     
     # Update winner info with announcement_sent flag
     winners[data.prize_type]["announcement_sent"] = True
@@ -3326,7 +3772,7 @@ Thank you for playing Six Seven Tambola! 🎲"""
     )
     
     # Log to control logs
-    await db.game_control_logs.insert_one({
+    await log_writer.write("game_control_logs", {
         "log_id": f"gcl_{uuid.uuid4().hex[:8]}",
         "game_id": game_id,
         "action": "WINNER_ANNOUNCEMENT_SENT",
@@ -3340,10 +3786,7 @@ Thank you for playing Six Seven Tambola! 🎲"""
         "timestamp": datetime.now(timezone.utc)
     })
     
-    if result:
-        return {"success": True, "message": f"Winner announcement sent for {data.prize_type}"}
-    else:
-        raise HTTPException(status_code=500, detail="Failed to send WhatsApp message")
+    return {"success": True, "message": f"Winner announcement sent for {data.prize_type}"}
 
 @api_router.get("/admin/games/{game_id}/winners")
 async def get_game_winners(game_id: str, request: Request, _: bool = Depends(verify_admin)):
@@ -3362,7 +3805,7 @@ async def get_game_winners(game_id: str, request: Request, _: bool = Depends(ver
         user = await db.users.find_one({"user_id": user_id}, {"_id": 0, "name": 1, "email": 1, "phone": 1}) if user_id else None
         
         # Check if announcement was sent
-        announcement_log = await db.whatsapp_logs.find_one({
+        announcement_log = await log_writer.find_one("whatsapp_logs", {
             "game_id": game_id,
             "message_type": "winner_announcement",
             "booking_id": prize_type  # We stored prize_type in booking_id field
@@ -3399,8 +3842,6 @@ async def get_game_winners(game_id: str, request: Request, _: bool = Depends(ver
 @api_router.put("/admin/bookings/{booking_id}/confirm-payment")
 async def confirm_booking_payment(booking_id: str, request: Request, _: bool = Depends(verify_admin)):
     """Confirm payment for a booking and auto-send WhatsApp confirmation if opted in"""
-    from notifications import send_whatsapp_message
-    
     booking = await db.bookings.find_one({"booking_id": booking_id}, {"_id": 0})
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
@@ -3418,7 +3859,7 @@ async def confirm_booking_payment(booking_id: str, request: Request, _: bool = D
     )
     
     # Log action
-    await db.game_control_logs.insert_one({
+    await log_writer.write("game_control_logs", {
         "log_id": f"gcl_{uuid.uuid4().hex[:8]}",
         "game_id": booking["game_id"],
         "action": "PAYMENT_CONFIRMED",
@@ -3438,7 +3879,7 @@ async def confirm_booking_payment(booking_id: str, request: Request, _: bool = D
             game = await db.games.find_one({"game_id": booking["game_id"]}, {"_id": 0})
             
             # Check if confirmation not already sent
-            existing = await db.whatsapp_logs.find_one({
+            existing = await log_writer.find_one("whatsapp_logs", {
                 "booking_id": booking_id,
                 "message_type": "booking_confirmation"
             })
@@ -3467,12 +3908,9 @@ Your booking for *{game['name']}* has been confirmed!
 
 🎮 Join the game at the scheduled time. Good luck! 🍀"""
                 
-                result = send_whatsapp_message(user["phone"], message)
-                whatsapp_sent = result
-                
-                # Log the message (immutable)
+                # Log the message (immutable); the outbox worker records the outcome on it
                 log_id = f"wl_{uuid.uuid4().hex[:8]}"
-                await db.whatsapp_logs.insert_one({
+                await log_writer.write("whatsapp_logs", {
                     "log_id": log_id,
                     "game_id": booking["game_id"],
                     "message_type": "booking_confirmation",
@@ -3483,10 +3921,12 @@ Your booking for *{game['name']}* has been confirmed!
                     "booking_id": booking_id,
                     "sent_at": datetime.now(timezone.utc),
                     "sent_by_admin": True,
-                    "status": "sent" if result else "failed",
-                    "delivery_status": "pending" if result else "failed",
-                    "failure_reason": None if result else "Twilio API error"
+                    "status": "queued",
+                    "delivery_status": "queued",
+                    "failure_reason": None
                 })
+                await notification_outbox.enqueue_whatsapp(user["phone"], message, log_id=log_id)
+                whatsapp_sent = True
     
     return {
         "success": True, 
@@ -3494,6 +3934,27 @@ Your booking for *{game['name']}* has been confirmed!
         "whatsapp_sent": whatsapp_sent
     }
 
+@api_router.post("/webhooks/twilio/status")
+async def twilio_status_callback(request: Request):
+    """Twilio message status callback. Validated and queued; applied to whatsapp_logs in batches."""
+    params = {key: str(value) for key, value in (await request.form()).items()}
+    auth_token = os.environ.get("TWILIO_AUTH_TOKEN")
+    if auth_token:
+        # Twilio signs the URL it was given, which differs from request.url behind a proxy
+        url = os.environ.get("TWILIO_STATUS_CALLBACK_URL") or str(request.url)
+        if not validate_twilio_signature(auth_token, url, params, request.headers.get("X-Twilio-Signature", "")):
+            raise HTTPException(status_code=403, detail="Invalid Twilio signature")
+    
+    if not delivery_status_queue.enqueue(params.get("MessageSid"), params.get("MessageStatus"), params.get("ErrorCode")):
+        # Twilio retries callbacks that fail
+        raise HTTPException(status_code=503, detail="Status queue is full")
+    return Response(status_code=204)
+
+@api_router.get("/admin/metrics/delivery-status")
+async def get_delivery_status_metrics(request: Request, _: bool = Depends(verify_admin)):
+    """Status callbacks received, coalesced and applied."""
+    return delivery_status_queue.get_stats()
+
 @api_router.get("/admin/whatsapp-logs")
 async def get_all_whatsapp_logs(
     request: Request, 
@@ -3534,6 +3995,52 @@ async def update_whatsapp_opt_in(booking_id: str, opt_in: bool, request: Request
     
     return {"success": True, "message": f"WhatsApp opt-in {'enabled' if opt_in else 'disabled'}"}
 
+async def game_detection_state(game: dict, called_numbers: List[int], plan: dict) -> DetectionState:
+    """
+    Detection state for a read endpoint. Live games use (and keep) the cached
+    state the callers maintain; any other game gets a one-off state that is
+    not kept, so reads of scheduled or finished games cannot pile states up
+    in memory.
+    """
+    game_id = game["game_id"]
+    version = game.get("bookings_version", 0)
+    if game.get("status") == "live":
+        return await ensure_detection_state(db, game_id, called_numbers, plan, ticket_store=open_ticket_store(game_id),
+                                            bookings_version=version)
+    return await load_detection_state(db, game_id, called_numbers, plan, ticket_store=open_ticket_store(game_id),
+                                      keep=False, bookings_version=version)
+
+@api_router.get("/games/{game_id}/near-wins")
+async def get_near_wins(game_id: str):
+    """How many tickets and players are one number away from each open prize"""
+    game = await db.games.find_one(
+        {"game_id": game_id}, {"_id": 0, "game_id": 1, "status": 1, "prizes": 1, "prize_plan": 1, "custom_patterns": 1, "bookings_version": 1}
+    )
+    if not game:
+        raise HTTPException(status_code=404, detail="Game not found")
+    
+    session = await db.game_sessions.find_one({"game_id": game_id}, {"_id": 0, "called_numbers": 1, "winners": 1})
+    called_numbers = session.get("called_numbers", []) if session else []
+    winners = session.get("winners", {}) if session else {}
+    
+    plan = get_prize_plan(game)
+    state = await game_detection_state(game, called_numbers, plan)
+    index = state.index
+    
+    # Prizes map onto index patterns through the game's compiled plan
+    near_wins = {}
+    for entry in unclaimed_prizes(plan, winners):
+        if entry["pattern"] in NEAR_WIN_PATTERNS and entry["name"] in game.get("prizes", {}):
+            near_wins[entry["name"]] = {
+                "pattern": BUILTIN_DEFINITIONS[entry["pattern"]]["name"], **index.counts(entry["pattern"])
+            }
+    
+    return {
+        "game_id": game_id,
+        "called_numbers_count": len(called_numbers),
+        "near_wins": near_wins
+    }
+
 # ============ FSB DIAGNOSTIC ENDPOINT ============
 @api_router.get("/admin/games/{game_id}/fsb-diagnostic")
 async def get_fsb_diagnostic(game_id: str, request: Request, _: bool = Depends(verify_admin)):
@@ -3547,79 +4054,11 @@ async def get_fsb_diagnostic(game_id: str, request: Request, _: bool = Depends(v
     # Get session
     session = await db.game_sessions.find_one({"game_id": game_id}, {"_id": 0})
     called_numbers = session.get("called_numbers", []) if session else []
-    called_set = set(called_numbers)
     
-    # Get booked tickets
-    tickets = await db.tickets.find(
-        {"game_id": game_id, "is_booked": True},
-        {"_id": 0}
-    ).to_list(1000)
-    
-    # Group by user and full_sheet_id (with inference)
-    user_sheets = {}
-    for t in tickets:
-        user_id = t.get("user_id") or t.get("holder_name") or "unknown"
-        sheet_id = t.get("full_sheet_id")
-        ticket_number = t.get("ticket_number", "")
-        
-        # Infer sheet_id from ticket_number if not set
-        inferred = False
-        if not sheet_id and ticket_number:
-            try:
-                num_str = ''.join(filter(str.isdigit, ticket_number))
-                if num_str:
-                    ticket_num = int(num_str)
-                    sheet_num = ((ticket_num - 1) // 6) + 1
-                    sheet_id = f"FS{sheet_num:03d}"
-                    inferred = True
-            except:
-                sheet_id = "none"
-        
-        if not sheet_id:
-            sheet_id = "none"
-            
-        key = (user_id, sheet_id)
-        if key not in user_sheets:
-            user_sheets[key] = {"inferred": inferred, "tickets": []}
-        
-        # Count marks for this ticket
-        marks = 0
-        for row in t.get("numbers", []):
-            for num in row:
-                if num and num in called_set:
-                    marks += 1
-        
-        user_sheets[key]["tickets"].append({
-            "ticket_number": ticket_number,
-            "marks": marks,
-            "has_full_sheet_id": bool(t.get("full_sheet_id")),
-            "original_sheet_id": t.get("full_sheet_id")
-        })
-    
-    # Analyze FSB eligibility
-    fsb_candidates = []
-    for (user_id, sheet_id), data in user_sheets.items():
-        sheet_tickets = data["tickets"]
-        if len(sheet_tickets) == 6 and sheet_id != "none":
-            marks_per_ticket = [t["marks"] for t in sheet_tickets]
-            total_marks = sum(marks_per_ticket)
-            all_have_1_plus = all(m >= 1 for m in marks_per_ticket)
-            tickets_without_marks = [t["ticket_number"] for t in sheet_tickets if t["marks"] == 0]
-            
-            fsb_candidates.append({
-                "user_id": user_id,
-                "sheet_id": sheet_id,
-                "sheet_id_was_inferred": data["inferred"],
-                "tickets": [t["ticket_number"] for t in sheet_tickets],
-                "marks_per_ticket": marks_per_ticket,
-                "total_marks": total_marks,
-                "all_have_1_plus_mark": all_have_1_plus,
-                "tickets_without_marks": tickets_without_marks,
-                "fsb_eligible": all_have_1_plus and total_marks >= 6,
-                "reason_if_not_eligible": None if (all_have_1_plus and total_marks >= 6) else (
-                    f"Tickets {tickets_without_marks} have 0 marks" if not all_have_1_plus else f"Total marks {total_marks} < 6"
-                )
-            })
+    # Per-sheet marks come from the game's incremental FSB tracker
+    state = await game_detection_state(game, called_numbers, get_prize_plan(game))
+    booked_count = state.booked_count
+    fsb_candidates = state.tracker.sheet_summaries()
     
     # Check existing winners
     existing_fsb = session.get("winners", {}).get("Full Sheet Bonus") if session else None
@@ -3629,7 +4068,7 @@ async def get_fsb_diagnostic(game_id: str, request: Request, _: bool = Depends(v
         "game_name": game.get("name"),
         "called_numbers_count": len(called_numbers),
         "called_numbers": sorted(called_numbers),
-        "total_booked_tickets": len(tickets),
+        "total_booked_tickets": booked_count,
         "fsb_in_prizes": "Full Sheet Bonus" in game.get("prizes", {}),
         "fsb_already_won": existing_fsb is not None,
         "fsb_winner": existing_fsb,
@@ -3732,7 +4171,7 @@ async def check_and_start_games():
                     # Start the game
                     await db.games.update_one(
                         {"game_id": game["game_id"]},
-                        {"$set": {"status": "live", "started_at": now.isoformat()}}
+                        {"$set": {"status": "live", "started_at": now.isoformat(), "prize_plan": get_prize_plan(game)}}
                     )
                     
                     # Create game session
@@ -3748,6 +4187,7 @@ async def check_and_start_games():
                         "last_call_time": now.isoformat(),
                         "created_at": now.isoformat()
                     })
+                    start_live_game_prep(game["game_id"])
                     logger.info(f"Auto-started admin game: {game['name']} ({game['game_id']})")
             except Exception as parse_error:
                 logger.error(f"Date parse error for admin game {game['game_id']}: {parse_error}")
@@ -3774,6 +4214,7 @@ async def auto_call_numbers():
             session["auto_call_enabled"] = True
             session["last_call_time"] = now.isoformat()
     
+    drawn = []  # (session, called_numbers, commit) for every game that called a number this tick
     for session in sessions:
         try:
             # Check if enough time has passed since last call (8 seconds)
@@ -3797,152 +4238,209 @@ async def auto_call_numbers():
                 next_number = random.choice(remaining)
                 called.append(next_number)
                 
-                await db.game_sessions.update_one(
-                    {"session_id": session["session_id"]},
-                    {"$set": {
-                        "called_numbers": called,
-                        "current_number": next_number,
-                        "last_call_time": now.isoformat()
-                    }}
-                )
-                
-                # Check for winners after each call
-                await check_winners_for_session(session["game_id"], called)
+                commit = CallCommit("session_id", session["session_id"], session.get("winners"))
+                commit.call(next_number, called, now.isoformat())
+                drawn.append((session, called, commit))
                 
         except Exception as e:
             logger.error(f"Auto-call error for session {session.get('session_id')}: {e}")
+    
+    if drawn:
+        # Check for winners in every game that called a number, in one pass,
+        # then write each game's call, winners and status as one update
+        completed_games = await detect_session_winners(drawn)
+        await commit_session_calls(drawn, completed_games)
 
 async def check_winners_for_session(game_id: str, called_numbers: List[int]):
     """Check for winners and auto-end game if all prizes won"""
-    from winner_detection import check_all_winners
+    session = await db.game_sessions.find_one({"game_id": game_id, "status": "active"}, {"_id": 0})
+    if session:
+        drawn = [(session, called_numbers, CallCommit("session_id", session["session_id"], session.get("winners")))]
+        await commit_session_calls(drawn, await detect_session_winners(drawn))
+
+async def commit_session_calls(drawn: List[tuple], completed_games: List[str]):
+    """Write each session's commit (one bulk_write) and mark finished games completed."""
+    operations = [op for op in (commit.operation() for _, _, commit in drawn) if op]
+    if operations:
+        result = await db.game_sessions.bulk_write(operations, ordered=False)
+        if result.matched_count < len(operations):
+            lost = await lost_session_calls(drawn)
+            completed_games = [game_id for game_id in completed_games if game_id not in lost]
+    if completed_games:
+        await db.games.update_many(
+            {"game_id": {"$in": completed_games}},
+            {"$set": {"status": "completed", "completed_at": datetime.now(timezone.utc).isoformat()}}
+        )
+    for session, _, commit in drawn:
+        if commit.number is not None:
+            record_call_writes(bool(commit.update()) + (session["game_id"] in completed_games))
+
+async def lost_session_calls(drawn: List[tuple]) -> List[str]:
+    """
+    Game_ids whose call was not written because another call moved the
+    session first. Their detection state already marked the lost number, so
+    it is dropped and rebuilt on the next call.
+    """
+    sessions = await db.game_sessions.find(
+        {"session_id": {"$in": [session["session_id"] for session, _, _ in drawn]}},
+        {"_id": 0, "session_id": 1, "called_numbers": 1}
+    ).to_list(None)
+    current = {s["session_id"]: s.get("called_numbers", []) for s in sessions}
+    lost = []
+    for session, _, commit in drawn:
+        if commit.number is not None and not commit.applied_in(current.get(session["session_id"], [])):
+            lost.append(session["game_id"])
+            drop_detection_state(session["game_id"])
+            logger.warning(f"Auto-call {commit.number} for {session['game_id']} lost a race with another call")
+    return lost
+
+async def load_booked_tickets(game_ids: List[str]) -> Dict[str, List[dict]]:
+    """
+    Booked tickets of several games, grouped by game_id, in at most three
+    queries. Grids come from each game's ticket store when one was written at
+    go-live, else from Mongo.
+    """
+    stores = {game_id: open_ticket_store(game_id) for game_id in game_ids}
+    stored_ids = [game_id for game_id, store in stores.items() if store is not None]
+    other_ids = [game_id for game_id, store in stores.items() if store is None]
     
+    tickets = []
+    if other_ids:
+        tickets += await db.tickets.find(
+            {"game_id": {"$in": other_ids}, "is_booked": True}, {"_id": 0}
+        ).to_list(None)
+    if stored_ids:
+        stored = await db.tickets.find(
+            {"game_id": {"$in": stored_ids}, "is_booked": True},
+            {"_id": 0, "numbers": 0, "numbers_packed": 0}
+        ).to_list(None)
+        missing = []
+        for game_id in stored_ids:
+            missing += fill_ticket_grids(stores[game_id], [t for t in stored if t["game_id"] == game_id])
+        if missing:
+            # Store is incomplete for some games - fall back to Mongo grids for those tickets
+            grids = await db.tickets.find(
+                {"ticket_id": {"$in": missing}},
+                {"_id": 0, "ticket_id": 1, "numbers": 1, "numbers_packed": 1}
+            ).to_list(None)
+            grids_by_id = {g["ticket_id"]: g for g in grids}
+            for ticket in stored:
+                ticket.update(grids_by_id.get(ticket["ticket_id"], {}))
+        tickets += stored
+    
+    tickets_by_game = {game_id: [] for game_id in game_ids}
+    for ticket in tickets:
+        tickets_by_game[ticket["game_id"]].append(ticket)
+    return tickets_by_game
+
+async def count_booked_tickets(game_ids: List[str]) -> Dict[str, int]:
+    """Booked ticket count of several games in one query; games without bookings are left out."""
+    counts = await db.tickets.aggregate([
+        {"$match": {"game_id": {"$in": game_ids}, "is_booked": True}},
+        {"$group": {"_id": "$game_id", "count": {"$sum": 1}}}
+    ]).to_list(None)
+    return {c["_id"]: c["count"] for c in counts}
+
+async def session_detection_states(drawn: List[tuple], games: Dict[str, dict],
+                                   plans: Dict[str, dict]) -> Dict[str, DetectionState]:
+    """
+    Each drawn game's DetectionState synced to its calls. States still
+    matching the game's bookings are only advanced; the others are rebuilt
+    from one load_booked_tickets() pass across those games. games were read
+    before the tickets, so their bookings_version is never newer than them.
+    """
+    booked_counts = await count_booked_tickets([session["game_id"] for session, _, _ in drawn])
+    versions = {game_id: game.get("bookings_version", 0) for game_id, game in games.items()}
+    states, stale = {}, []
+    for session, called, _ in drawn:
+        game_id = session["game_id"]
+        state = get_detection_state(game_id)
+        if state is not None and state.is_current(booked_counts.get(game_id, 0), plans[game_id], versions[game_id]):
+            state.sync(called)
+            states[game_id] = state
+        else:
+            stale.append((game_id, called))
+    if stale:
+        tickets_by_game = await load_booked_tickets([game_id for game_id, _ in stale])
+        for game_id, called in stale:
+            states[game_id] = await load_detection_state(
+                db, game_id, called, plans[game_id], tickets=tickets_by_game[game_id],
+                bookings_version=versions[game_id]
+            )
+    return states
+
+async def _fill_holder_names(winners: Dict[tuple, dict]):
+    """
+    Resolve missing holder names of new winners, keyed by (game_id, prize),
+    from each game's player cache; players no cache has seen are fetched
+    with one users query across all games.
+    """
+    needed = {}
+    for (game_id, _), winner in winners.items():
+        for e in (winner["winners"] if winner.get("shared") else [winner]):
+            if not e.get("holder_name") and e.get("user_id"):
+                needed.setdefault(game_id, set()).add(e["user_id"])
+    missing = {game_id: get_player_cache(game_id).missing(ids) for game_id, ids in needed.items()}
+    fetched = await fetch_players(db, list({uid for ids in missing.values() for uid in ids}))
+    for game_id, ids in missing.items():
+        get_player_cache(game_id).add(fetched, requested=ids)
+    
+    for (game_id, _), winner in winners.items():
+        players = get_player_cache(game_id)
+        entries = winner["winners"] if winner.get("shared") else [winner]
+        for e in entries:
+            e["holder_name"] = e.get("holder_name") or players.name(e.get("user_id"))
+        if winner.get("shared"):
+            winner["holder_name"] = ", ".join([w["holder_name"] for w in entries])
+
+async def detect_session_winners(drawn: List[tuple]) -> List[str]:
+    """
+    Check for winners in every admin game that called a number this tick.
+    drawn holds (session, called_numbers, commit); prizes are awarded from
+    each game's incremental DetectionState, and new winners and the auto-end
+    status go into each game's commit. Returns the game_ids whose prizes are
+    now all won.
+    """
     try:
-        game = await db.games.find_one({"game_id": game_id}, {"_id": 0})
-        if not game:
-            return
-        
-        session = await db.game_sessions.find_one({"game_id": game_id, "status": "active"}, {"_id": 0})
-        if not session:
-            return
-        
-        # Get all booked tickets for this game
-        booked_tickets = await db.tickets.find({
-            "game_id": game_id,
-            "is_booked": True
-        }, {"_id": 0}).to_list(1000)
-        
-        # Check winners for each prize type
-        prizes = game.get("prizes", {})
-        current_winners = session.get("winners", {})
-        
-        # Build set of ticket_ids that already won a Full House
-        # These tickets cannot win another Full House
-        fh_winner_tickets = set()
-        for prize_key, winner_data in current_winners.items():
-            if "full" in prize_key.lower() and "house" in prize_key.lower() and "sheet" not in prize_key.lower():
-                if winner_data.get("shared"):
-                    for w in winner_data.get("winners", []):
-                        if w.get("ticket_id"):
-                            fh_winner_tickets.add(w["ticket_id"])
-                else:
-                    if winner_data.get("ticket_id"):
-                        fh_winner_tickets.add(winner_data["ticket_id"])
+        game_ids = [session["game_id"] for session, _, _ in drawn]
+        games = {
+            g["game_id"]: g
+            for g in await db.games.find({"game_id": {"$in": game_ids}}, {"_id": 0}).to_list(None)
+        }
+        drawn = [entry for entry in drawn if entry[0]["game_id"] in games]
+        plans = {game_id: get_prize_plan(game) for game_id, game in games.items()}
+        states = await session_detection_states(drawn, games, plans)
+        new_winners_by_game = detect_winners([{
+            "key": session["game_id"],
+            "plan": plans[session["game_id"]],
+            "rules": ADMIN_GAME_RULES,
+            "state": states[session["game_id"]],
+            "called_numbers": called,
+            "existing_winners": session.get("winners", {}),
+        } for session, called, _ in drawn])
+        await _fill_holder_names({
+            (game_id, prize): winner
+            for game_id, winners in new_winners_by_game.items() for prize, winner in winners.items()
+        })
         
-        for prize_type in prizes.keys():
-            if prize_type in current_winners:
-                continue  # Already won
-            
-            prize_lower = prize_type.lower()
-            is_full_house = "full" in prize_lower and "house" in prize_lower and "sheet" not in prize_lower
+        completed_games = []
+        for session, called, commit in drawn:
+            game_id = session["game_id"]
+            commit.add_winners(new_winners_by_game[game_id])
             
-            # For Full House prizes, collect all candidates on this call
-            if is_full_house:
-                fh_candidates = []
-                for ticket in booked_tickets:
-                    ticket_id = ticket.get("ticket_id")
-                    # Skip if this ticket already won a Full House
-                    if ticket_id in fh_winner_tickets:
-                        continue
-                    
-                    winner_info = check_all_winners(ticket, called_numbers, prize_type)
-                    if winner_info:
-                        holder_name = ticket.get("holder_name") or ticket.get("booked_by_name")
-                        if not holder_name and ticket.get("user_id"):
-                            user = await db.users.find_one({"user_id": ticket.get("user_id")}, {"_id": 0})
-                            holder_name = user.get("name") if user else None
-                        
-                        fh_candidates.append({
-                            "user_id": ticket.get("user_id"),
-                            "ticket_id": ticket_id,
-                            "ticket_number": ticket.get("ticket_number"),
-                            "holder_name": holder_name or "Player"
-                        })
-                
-                # Award prize to all candidates (they share it)
-                if fh_candidates:
-                    if len(fh_candidates) == 1:
-                        # Single winner
-                        current_winners[prize_type] = {
-                            **fh_candidates[0],
-                            "won_at": datetime.now(timezone.utc).isoformat()
-                        }
-                    else:
-                        # Multiple winners share
-                        current_winners[prize_type] = {
-                            "shared": True,
-                            "winners": fh_candidates,
-                            "holder_name": ", ".join([c["holder_name"] for c in fh_candidates]),
-                            "won_at": datetime.now(timezone.utc).isoformat()
-                        }
-                    
-                    await db.game_sessions.update_one(
-                        {"session_id": session["session_id"]},
-                        {"$set": {"winners": current_winners}}
-                    )
-                    
-                    # Add these tickets to the fh_winner_tickets set for next iteration
-                    for c in fh_candidates:
-                        fh_winner_tickets.add(c["ticket_id"])
-                    
-                    logger.info(f"🎉 {len(fh_candidates)} winner(s) found for {prize_type} in game {game_id}")
-            else:
-                # Non-Full House prize - first ticket wins
-                for ticket in booked_tickets:
-                    winner_info = check_all_winners(ticket, called_numbers, prize_type)
-                    if winner_info:
-                        holder_name = ticket.get("holder_name") or ticket.get("booked_by_name")
-                        if not holder_name and ticket.get("user_id"):
-                            user = await db.users.find_one({"user_id": ticket.get("user_id")}, {"_id": 0})
-                            holder_name = user.get("name") if user else None
-                        
-                        current_winners[prize_type] = {
-                            "user_id": ticket.get("user_id"),
-                            "ticket_id": ticket.get("ticket_id"),
-                            "ticket_number": ticket.get("ticket_number"),
-                            "holder_name": holder_name or "Player",
-                            "won_at": datetime.now(timezone.utc).isoformat()
-                        }
-                        await db.game_sessions.update_one(
-                            {"session_id": session["session_id"]},
-                            {"$set": {"winners": current_winners}}
-                        )
-                        logger.info(f"🎉 Winner found for {prize_type} in game {game_id}: {holder_name}")
-                        break
-        
-        # Check if all prizes are won - end game automatically
-        if len(current_winners) >= len(prizes) and len(prizes) > 0:
-            await db.games.update_one(
-                {"game_id": game_id},
-                {"$set": {"status": "completed", "completed_at": datetime.now(timezone.utc).isoformat()}}
-            )
-            await db.game_sessions.update_one(
-                {"session_id": session["session_id"]},
-                {"$set": {"status": "completed", "auto_call_enabled": False}}
-            )
-            logger.info(f"Game {game_id} auto-ended - all prizes won!")
+            # Check if all prizes are won - end game automatically. A Full
+            # Sheet Bonus outside the game's prizes does not count
+            prizes = games[game_id].get("prizes", {})
+            if prizes and all(prize in commit.all_winners for prize in prizes):
+                commit.set(status="completed", auto_call_enabled=False)
+                completed_games.append(game_id)
+                drop_detection_state(game_id)
+                logger.info(f"Game {game_id} auto-ended - all prizes won!")
+        return completed_games
             
     except Exception as e:
-        logger.error(f"Winner check error for game {game_id}: {e}")
+        logger.error(f"Winner check error for games {[s.get('game_id') for s, _, _ in drawn]}: {e}")
+        return []
 
 async def auto_game_manager():
     """Background task that manages auto-start, auto-call, and auto-end"""
@@ -4005,6 +4503,7 @@ async def check_and_start_user_games():
                             "last_call_time": now.isoformat()
                         }}
                     )
+                    await prerender_call_audio(game["user_game_id"])
                     logger.info(f"Auto-started user game: {game['name']} ({game['user_game_id']})")
             except Exception as parse_error:
                 logger.error(f"Date parse error for game {game['user_game_id']}: {parse_error}")
@@ -4031,6 +4530,8 @@ async def auto_call_user_game_numbers():
             game["auto_call_enabled"] = True
             game["last_call_time"] = now.isoformat()
     
+    drawn = []  # (game, called_numbers, commit) for every game that called a number this tick
+    game_updates = []
     for game in live_games:
         if not game.get("auto_call_enabled", True):
             continue
@@ -4045,14 +4546,14 @@ async def auto_call_user_game_numbers():
             
             # End game if all dividends claimed
             if actual_dividends and len(winners) >= len(actual_dividends):
-                await db.user_games.update_one(
+                game_updates.append(UpdateOne(
                     {"user_game_id": game["user_game_id"]},
                     {"$set": {
                         "status": "completed",
                         "auto_call_enabled": False,
                         "ended_at": now.isoformat()
                     }}
-                )
+                ))
                 logger.info(f"User game {game['user_game_id']} completed - all dividends claimed!")
                 continue
             
@@ -4071,14 +4572,14 @@ async def auto_call_user_game_numbers():
             # Stop calling if all 90 numbers called
             if len(called) >= 90:
                 if game.get("status") != "completed":
-                    await db.user_games.update_one(
+                    game_updates.append(UpdateOne(
                         {"user_game_id": game["user_game_id"]},
                         {"$set": {
                             "status": "completed",
                             "auto_call_enabled": False,
                             "ended_at": now.isoformat()
                         }}
-                    )
+                    ))
                     logger.info(f"User game {game['user_game_id']} completed - all 90 numbers called")
                 continue
             
@@ -4089,223 +4590,92 @@ async def auto_call_user_game_numbers():
                 next_number = random.choice(remaining)
                 called.append(next_number)
                 
-                await db.user_games.update_one(
-                    {"user_game_id": game["user_game_id"]},
-                    {"$set": {
-                        "called_numbers": called,
-                        "current_number": next_number,
-                        "last_call_time": now.isoformat()
-                    }}
-                )
+                commit = CallCommit("user_game_id", game["user_game_id"], game.get("winners"))
+                commit.call(next_number, called, now.isoformat())
+                drawn.append((game, called, commit))
                 
                 logger.info(f"Auto-called number {next_number} for user game {game['user_game_id']} ({len(called)}/90)")
                 
-                # Check for winners
-                await check_user_game_winners(game["user_game_id"], called)
-                
         except Exception as e:
             logger.error(f"Auto-call error for user game {game.get('user_game_id')}: {e}")
+    
+    if drawn:
+        # Check for winners in every game that called a number, in one pass;
+        # each game's call, winners and status then go out as one update
+        await detect_user_game_winners(drawn)
+        game_updates += [commit.operation() for _, _, commit in drawn]
+    if game_updates:
+        result = await db.user_games.bulk_write(game_updates, ordered=False)
+        if result.matched_count < len(game_updates):
+            # A call that lost a race with another writes nothing, winners included
+            logger.warning(f"{len(game_updates) - result.matched_count} user game calls lost a race with another call")
+    for _ in drawn:
+        record_call_writes(1)
 
 async def check_user_game_winners(user_game_id: str, called_numbers: List[int]):
     """Check for winners in user-created games with proper Full House tracking"""
-    from winner_detection import check_all_winners, check_full_house, check_four_corners, check_full_sheet_bonus
-    
+    game = await db.user_games.find_one({"user_game_id": user_game_id}, {"_id": 0})
+    if game:
+        commit = CallCommit("user_game_id", user_game_id, game.get("winners"))
+        await detect_user_game_winners([(game, called_numbers, commit)])
+        if commit.update():
+            await db.user_games.update_one({"user_game_id": user_game_id}, commit.update())
+
+async def detect_user_game_winners(drawn: List[tuple]):
+    """
+    Check for winners in every user game that called a number this tick.
+    drawn holds (game, called_numbers, commit). Tickets are embedded in the
+    game documents (participants are loaded for all games in one query), all
+    games are evaluated in one batched pass, and new winners and the auto-end
+    status go into each game's commit.
+    """
     try:
-        game = await db.user_games.find_one({"user_game_id": user_game_id}, {"_id": 0})
-        if not game:
-            return
-        
-        dividends = game.get("dividends", {})
-        current_winners = game.get("winners", {})
-        
-        # Get players from embedded tickets in the game
-        tickets = game.get("tickets", [])
-        assigned_tickets = [t for t in tickets if t.get("assigned_to")]
-        
-        # If no embedded tickets, try participants collection
-        participants = []
-        if not assigned_tickets:
+        # If no embedded tickets, fall back to the participants collection
+        assigned_by_game = {
+            game["user_game_id"]: [t for t in game.get("tickets", []) if t.get("assigned_to")]
+            for game, _, _ in drawn
+        }
+        without_tickets = [game_id for game_id, tickets in assigned_by_game.items() if not tickets]
+        participants_by_game = {}
+        if without_tickets:
             participants = await db.user_game_participants.find({
-                "user_game_id": user_game_id
-            }, {"_id": 0}).to_list(100)
-        
-        # Track Full House winners for sequential assignment
-        full_house_candidates = []
-        
-        # Check Full Sheet Bonus first (requires grouped tickets)
-        full_sheet_bonus_checked = False
-        
-        # Use assigned_tickets or participants
-        ticket_source = assigned_tickets if assigned_tickets else [
-            {"numbers": p.get("ticket", {}).get("numbers", []), "assigned_to": p.get("name"), "participant_id": p.get("participant_id")}
-            for p in participants if p.get("ticket")
-        ]
-        
-        for prize_type in dividends.keys():
-            if prize_type in current_winners:
-                continue
-            
-            # Skip Full House prizes for now - collect candidates first
-            prize_lower = prize_type.lower()
-            if "full house" in prize_lower:
-                continue
-            
-            # Skip Full Sheet Bonus - handle separately
-            if "full sheet" in prize_lower or "bonus" in prize_lower:
-                continue
-            
-            for ticket in ticket_source:
-                ticket_numbers = ticket.get("numbers", [])
-                if not ticket_numbers or len(ticket_numbers) < 3:
-                    continue
-                
-                winner_info = check_all_winners({"numbers": ticket_numbers}, called_numbers, prize_type)
-                if winner_info:
-                    current_winners[prize_type] = {
-                        "ticket_id": ticket.get("ticket_id"),
-                        "holder_name": ticket.get("assigned_to"),
-                        "name": ticket.get("assigned_to"),
-                        "ticket_number": ticket.get("ticket_number"),
-                        "won_at": datetime.now(timezone.utc).isoformat()
-                    }
-                    await db.user_games.update_one(
-                        {"user_game_id": user_game_id},
-                        {"$set": {"winners": current_winners}}
-                    )
-                    logger.info(f"Winner found for {prize_type} in user game {user_game_id}: {ticket.get('assigned_to')}")
-                    break
+                "user_game_id": {"$in": without_tickets}
+            }, {"_id": 0}).to_list(None)
+            for p in participants:
+                participants_by_game.setdefault(p["user_game_id"], []).append(p)
         
-        # Now check Full House - collect all tickets that have completed Full House
-        for ticket in ticket_source:
-            ticket_numbers = ticket.get("numbers", [])
-            if not ticket_numbers or len(ticket_numbers) < 3:
-                continue
-            
-            if check_full_house(ticket_numbers, called_numbers):
-                ticket_id = ticket.get("ticket_id")
-                # Check if this ticket already won any Full House
-                already_won = any(
-                    w.get("ticket_id") == ticket_id 
-                    for w in current_winners.values() 
-                    if "Full House" in w.get("pattern", str(w.get("prize_type", "")))
-                )
-                if not already_won:
-                    full_house_candidates.append({
-                        "ticket_id": ticket_id,
-                        "holder_name": ticket.get("assigned_to"),
-                        "ticket_number": ticket.get("ticket_number")
-                    })
+        sources = {}
+        for game, _, _ in drawn:
+            game_id = game["user_game_id"]
+            sources[game_id] = assigned_by_game[game_id] or [
+                {"numbers": p.get("ticket", {}).get("numbers", []), "assigned_to": p.get("name"), "participant_id": p.get("participant_id")}
+                for p in participants_by_game.get(game_id, []) if p.get("ticket")
+            ]
         
-        # Assign Full House prizes in order (1st, 2nd, 3rd)
-        house_prizes = ["1st Full House", "2nd Full House", "3rd Full House"]
-        existing_house_count = sum(1 for p in current_winners.keys() if "Full House" in p)
+        new_winners_by_game = detect_winners([{
+            "key": game["user_game_id"],
+            "plan": get_prize_plan(game, prizes_field="dividends"),
+            "rules": USER_GAME_RULES,
+            "tickets": sources[game["user_game_id"]],
+            "called_numbers": called,
+            "existing_winners": game.get("winners", {}),
+        } for game, called, _ in drawn])
         
-        for idx, candidate in enumerate(full_house_candidates):
-            prize_idx = existing_house_count + idx
-            if prize_idx >= len(house_prizes):
-                break
+        for game, called, commit in drawn:
+            game_id = game["user_game_id"]
+            commit.add_winners(new_winners_by_game[game_id])
             
-            prize = house_prizes[prize_idx]
-            if prize in dividends and prize not in current_winners:
-                current_winners[prize] = {
-                    "ticket_id": candidate["ticket_id"],
-                    "holder_name": candidate["holder_name"],
-                    "name": candidate["holder_name"],
-                    "ticket_number": candidate["ticket_number"],
-                    "pattern": prize,
-                    "won_at": datetime.now(timezone.utc).isoformat()
-                }
-                await db.user_games.update_one(
-                    {"user_game_id": user_game_id},
-                    {"$set": {"winners": current_winners}}
+            # Auto-end game if all prizes won
+            # Filter out Full Sheet Bonus from check
+            dividends = game.get("dividends", {})
+            actual_dividends = {k: v for k, v in dividends.items() if "Full Sheet" not in k and "Bonus" not in k}
+            if actual_dividends and len(commit.all_winners) >= len(actual_dividends):
+                commit.set(
+                    status="completed",
+                    ended_at=datetime.now(timezone.utc).isoformat(),
+                    auto_call_enabled=False
                 )
-                logger.info(f"Winner found for {prize} in user game {user_game_id}: {candidate['holder_name']}")
-        
-        # Check Full Sheet Bonus
-        # Group tickets by player and full_sheet_id
-        for prize_type in dividends.keys():
-            if "Full Sheet" in prize_type or "Bonus" in prize_type:
-                if prize_type in current_winners:
-                    continue
-                
-                # Group tickets by player name and full_sheet_id
-                player_sheets = {}  # player_name -> {full_sheet_id -> [tickets]}
-                
-                for ticket in assigned_tickets:
-                    player_name = ticket.get("assigned_to")
-                    full_sheet_id = ticket.get("full_sheet_id")
-                    if not player_name or not full_sheet_id:
-                        continue
-                    
-                    if player_name not in player_sheets:
-                        player_sheets[player_name] = {}
-                    if full_sheet_id not in player_sheets[player_name]:
-                        player_sheets[player_name][full_sheet_id] = []
-                    player_sheets[player_name][full_sheet_id].append(ticket)
-                
-                # Check each player's complete sheets
-                for player_name, sheets in player_sheets.items():
-                    for sheet_id, sheet_tickets in sheets.items():
-                        # Must have all 6 tickets of the sheet
-                        if len(sheet_tickets) != 6:
-                            continue
-                        
-                        # Verify all 6 positions are present
-                        positions = {t.get("ticket_position_in_sheet") for t in sheet_tickets}
-                        if positions != {1, 2, 3, 4, 5, 6}:
-                            continue
-                        
-                        # Check if each ticket has at least 2 numbers marked (STRICT RULE)
-                        called_set = set(called_numbers)
-                        all_have_marks = True
-                        marks_per_ticket = []
-                        
-                        for ticket in sheet_tickets:
-                            ticket_numbers = ticket.get("numbers", [])
-                            marked_count = sum(
-                                1 for row in ticket_numbers 
-                                for num in row 
-                                if num is not None and num != 0 and num in called_set
-                            )
-                            marks_per_ticket.append(marked_count)
-                            if marked_count < 2:  # Each ticket must have at least 2 marked numbers
-                                all_have_marks = False
-                                break
-                        
-                        logger.debug(f"Full Sheet Bonus Check - Player: {player_name}, Sheet: {sheet_id}, Marks: {marks_per_ticket}, Eligible: {all_have_marks} (need >=2 per ticket)")
-                        
-                        if all_have_marks:
-                            current_winners[prize_type] = {
-                                "holder_name": player_name,
-                                "name": player_name,
-                                "full_sheet_id": sheet_id,
-                                "pattern": "Full Sheet Bonus",
-                                "won_at": datetime.now(timezone.utc).isoformat()
-                            }
-                            await db.user_games.update_one(
-                                {"user_game_id": user_game_id},
-                                {"$set": {"winners": current_winners}}
-                            )
-                            logger.info(f"Winner found for Full Sheet Bonus in user game {user_game_id}: {player_name}")
-                            break
-                    
-                    if prize_type in current_winners:
-                        break
-        
-        # Auto-end game if all prizes won
-        # Filter out Full Sheet Bonus from check
-        actual_dividends = {k: v for k, v in dividends.items() if "Full Sheet" not in k and "Bonus" not in k}
-        
-        if actual_dividends and len(current_winners) >= len(actual_dividends):
-            await db.user_games.update_one(
-                {"user_game_id": user_game_id},
-                {"$set": {
-                    "status": "completed",
-                    "ended_at": datetime.now(timezone.utc).isoformat(),
-                    "auto_call_enabled": False
-                }}
-            )
-            logger.info(f"User game {user_game_id} auto-ended - all prizes won!")
+                logger.info(f"User game {game_id} auto-ended - all prizes won!")
             
     except Exception as e:
         logger.error(f"User game winner check error: {e}")
@@ -4361,16 +4731,64 @@ async def startup_event():
         await db.otp_codes.create_index("phone")
         await db.otp_codes.create_index("expires_at", expireAfterSeconds=0)
         
+        # Notification outbox - workers claim by status and due time
+        await db.notification_outbox.create_index("outbox_id", unique=True)
+        await db.notification_outbox.create_index([("status", 1), ("next_attempt_at", 1)])
+        
+        # WhatsApp logs - delivery-status callbacks are applied by message SID
+        await db.whatsapp_logs.create_index("message_sid", sparse=True)
+        
+        # Campaigns - resumed by status, recipients read by status in chunks
+        await db.campaigns.create_index("campaign_id", unique=True)
+        await db.campaigns.create_index([("game_id", 1), ("message_type", 1)])
+        await db.campaign_recipients.create_index([("campaign_id", 1), ("booking_id", 1)], unique=True)
+        await db.campaign_recipients.create_index([("campaign_id", 1), ("status", 1)])
+        
+        # TTS sprite manifests, one per voice
+        await db.tts_sprites.create_index([("voice", 1), ("speed", 1), ("model", 1)], unique=True)
+        
         logger.info("MongoDB indexes created successfully")
     except Exception as e:
         logger.warning(f"Index creation warning (may already exist): {e}")
     
+    # No two tickets in a game may hold the same 15 numbers. Built on its own
+    # so that existing duplicates neither hide nor block the indexes above
+    try:
+        await db.tickets.create_index(
+            [("game_id", 1), ("fingerprint", 1)],
+            unique=True,
+            partialFilterExpression={"fingerprint": {"$exists": True}}
+        )
+    except Exception as e:
+        if isinstance(e, OperationFailure) and e.code == 11000:
+            logger.error(
+                f"❌ Ticket fingerprint index not created - duplicate tickets exist: {e}. "
+                "List them per game with GET /api/admin/games/{game_id}/tickets/duplicates"
+            )
+        else:
+            logger.warning(f"Ticket fingerprint index warning: {e}")
+    
     # Start background tasks
     asyncio.create_task(auto_game_manager())
     logger.info("Auto-game manager started")
+    await log_writer.start()
+    await delivery_status_queue.start()
+    await notification_outbox.start()
+    
+    # Finish campaigns a previous process did not complete; every worker tries,
+    # the campaign lease lets only one of them send
+    for campaign_id in await unfinished_campaign_ids(db):
+        logger.info(f"Resuming campaign {campaign_id}")
+        start_campaign(campaign_id)
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
     global auto_game_task_running
     auto_game_task_running = False
+    await cancel_live_game_preps()
+    await cancel_prerender_jobs()
+    await cancel_sprite_builds()
+    await notification_outbox.stop()
+    await delivery_status_queue.stop()
+    await log_writer.stop()
     client.close()
@@ -0,0 +1,163 @@
+# WHOLE-GAME TICKET AUDIT
+# Checks every ticket rule for all tickets of a game at once with NumPy,
+# instead of validate_ticket()/_validate_full_sheet() one ticket at a time.
+# Only violating tickets and sheets are reported. Compact tickets are checked
+# in both stored forms: the "numbers" grid players see and "numbers_packed".
+import logging
+import time
+from typing import Iterable, List
+
+import numpy as np
+
+from ticket_generator import COLUMN_RANGES
+
+logger = logging.getLogger(__name__)
+
+_COLUMN_LOW = np.array([start for start, _ in COLUMN_RANGES])
+_COLUMN_HIGH = np.array([end for _, end in COLUMN_RANGES])
+_CELL_BITS = np.arange(27, dtype=np.uint32)
+
+
+def _grids_from_packed(packed: List[bytes]) -> np.ndarray:
+    """
+    Decode "numbers_packed" values into an (N, 3, 9) array, 0 for blanks.
+    The k-th smallest number goes into the k-th occupied cell in column-major
+    order; a packed value whose numbers disagree with its mask lands numbers
+    in the wrong columns and fails the range check.
+    """
+    raw = np.frombuffer(b"".join(packed), dtype=np.uint8).reshape(-1, 19)
+    numbers = raw[:, :15]
+    masks = raw[:, 15:].copy().view("<u4").ravel()
+
+    occupied = ((masks[:, None] >> _CELL_BITS) & 1).astype(bool).reshape(-1, 3, 9)
+    column_major = occupied.transpose(0, 2, 1).reshape(-1, 27)
+    grids = np.zeros((len(packed), 27), dtype=np.uint8)
+
+    fillable = column_major.sum(axis=1) == 15
+    rows, cells = np.nonzero(column_major[fillable])
+    grids[np.flatnonzero(fillable)[rows], cells] = numbers[fillable].ravel()
+    return grids.reshape(-1, 9, 3).transpose(0, 2, 1)
+
+
+def _cell_value(num) -> int:
+    """Blank -> 0; a number that does not fit a uint8 cell becomes 255, which fails the range check."""
+    if not num:
+        return 0
+    return num if 0 < num <= 255 else 255
+
+
+def _grids_from_numbers(ticket_docs: List[dict]) -> np.ndarray:
+    """(N, 3, 9) array of the "numbers" grids as stored, 0 for blanks."""
+    grids = np.zeros((len(ticket_docs), 3, 9), dtype=np.uint8)
+    for i, doc in enumerate(ticket_docs):
+        if doc.get("numbers"):
+            try:
+                grids[i] = [[_cell_value(num) for num in row] for row in doc["numbers"]]
+            except (ValueError, TypeError):
+                pass  # Malformed grid stays empty and fails the row check
+    return grids
+
+
+def load_ticket_grids(ticket_docs: List[dict]) -> np.ndarray:
+    """(N, 3, 9) grid array for ticket documents in either storage form."""
+    grids = np.zeros((len(ticket_docs), 3, 9), dtype=np.uint8)
+    packed_rows = [i for i, doc in enumerate(ticket_docs) if doc.get("numbers_packed")]
+    grid_rows = [i for i, doc in enumerate(ticket_docs) if not doc.get("numbers_packed")]
+    if packed_rows:
+        grids[packed_rows] = _grids_from_packed([bytes(ticket_docs[i]["numbers_packed"]) for i in packed_rows])
+    if grid_rows:
+        grids[grid_rows] = _grids_from_numbers([ticket_docs[i] for i in grid_rows])
+    return grids
+
+
+def audit_ticket_grids(grids: np.ndarray) -> dict:
+    """Boolean (N,) arrays, one per rule, True where a ticket breaks it."""
+    occupied = grids > 0
+    col_index = np.arange(9)
+
+    in_range = ~occupied | ((grids >= _COLUMN_LOW[col_index]) & (grids <= _COLUMN_HIGH[col_index]))
+    col_counts = occupied.sum(axis=1)
+
+    # Every pair of filled cells in a column must increase downwards
+    descending = np.zeros(len(grids), dtype=bool)
+    for upper, lower in ((0, 1), (1, 2), (0, 2)):
+        both = occupied[:, upper] & occupied[:, lower]
+        descending |= (both & (grids[:, upper] >= grids[:, lower])).any(axis=1)
+
+    return {
+        "Number outside its column range": ~in_range.all(axis=(1, 2)),
+        "Row does not have exactly 5 numbers": (occupied.sum(axis=2) != 5).any(axis=1),
+        "Column has no numbers or more than 3": ((col_counts < 1) | (col_counts > 3)).any(axis=1),
+        "Column not in ascending order": descending,
+    }
+
+
+def audit_game_tickets(ticket_docs: Iterable[dict]) -> dict:
+    """
+    Audit all tickets of a game: per-ticket rules plus, for tickets that
+    belong to full sheets, 6 tickets per sheet covering 1-90 exactly once.
+    """
+    started = time.perf_counter()
+    ticket_docs = list(ticket_docs)
+    grids = load_ticket_grids(ticket_docs)
+
+    violations = audit_ticket_grids(grids)
+
+    # Compact tickets also keep the "numbers" grid. Decoding the packed form
+    # sorts each column, so audit the stored grid too and flag any drift
+    both_forms = [i for i, doc in enumerate(ticket_docs) if doc.get("numbers_packed") and doc.get("numbers")]
+    violations["Numbers grid does not match numbers_packed"] = np.zeros(len(ticket_docs), dtype=bool)
+    if both_forms:
+        stored_grids = _grids_from_numbers([ticket_docs[i] for i in both_forms])
+        for rule, failed in audit_ticket_grids(stored_grids).items():
+            violations[rule][both_forms] |= failed
+        violations["Numbers grid does not match numbers_packed"][both_forms] = (
+            stored_grids != grids[both_forms]
+        ).any(axis=(1, 2))
+    invalid_tickets = []
+    for i in np.flatnonzero(np.logical_or.reduce(list(violations.values()))) if ticket_docs else []:
+        invalid_tickets.append({
+            "ticket_number": ticket_docs[i].get("ticket_number"),
+            "errors": [rule for rule, failed in violations.items() if failed[i]]
+        })
+
+    # Full sheets: count each number per sheet in one bincount. Numbers
+    # above 90 already fail the range check and are counted as blanks here
+    sheet_ids = [doc.get("full_sheet_id") or "" for doc in ticket_docs]
+    in_sheet = np.array([bool(s) for s in sheet_ids], dtype=bool)
+    sheet_names, sheet_index = np.unique(np.array(sheet_ids)[in_sheet], return_inverse=True)
+    sheet_numbers = grids[in_sheet].reshape(-1, 27)
+    sheet_numbers = np.where(sheet_numbers <= 90, sheet_numbers, 0)
+    counts = np.bincount(
+        (np.repeat(sheet_index, 27) * 91 + sheet_numbers.ravel()), minlength=len(sheet_names) * 91
+    ).reshape(-1, 91)
+    tickets_per_sheet = np.bincount(sheet_index, minlength=len(sheet_names))
+
+    bad_sheets = (tickets_per_sheet != 6) | (counts[:, 1:] != 1).any(axis=1)
+    invalid_sheets = []
+    for s in np.flatnonzero(bad_sheets):
+        errors = []
+        if tickets_per_sheet[s] != 6:
+            errors.append(f"Sheet has {tickets_per_sheet[s]} tickets (must be 6)")
+        missing = np.flatnonzero(counts[s, 1:] == 0) + 1
+        repeated = np.flatnonzero(counts[s, 1:] > 1) + 1
+        if len(missing):
+            errors.append(f"Missing numbers: {missing.tolist()}")
+        if len(repeated):
+            errors.append(f"Repeated numbers: {repeated.tolist()}")
+        invalid_sheets.append({"full_sheet_id": str(sheet_names[s]), "errors": errors})
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    logger.info(
+        f"Ticket audit: {len(ticket_docs)} tickets, {len(invalid_tickets)} invalid, "
+        f"{len(invalid_sheets)} invalid sheets in {elapsed_ms:.1f}ms"
+    )
+    return {
+        "tickets_checked": len(ticket_docs),
+        "sheets_checked": len(sheet_names),
+        "grids_cross_checked": len(both_forms),
+        "invalid_tickets": invalid_tickets,
+        "invalid_sheets": invalid_sheets,
+        "valid": not invalid_tickets and not invalid_sheets,
+        "elapsed_ms": round(elapsed_ms, 2),
+    }
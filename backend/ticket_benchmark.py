@@ -0,0 +1,157 @@
+# TICKET GENERATOR BENCHMARK
+# Latency percentiles, validation cost and fallback-path statistics for the
+# ticket generator. Runs locally without a database:
+#
+#   python ticket_benchmark.py                 # full run, exit 1 on regression
+#   python ticket_benchmark.py --sheets 200 --json
+#
+# The pytest latency gate (tests/test_ticket_benchmark.py) is skipped unless
+# RUN_BENCHMARKS=1 is set, so shared CI runners do not fail on noisy timings.
+import argparse
+import json
+import sys
+import time
+from typing import Callable, Dict, List
+
+from ticket_generator import (
+    generate_authentic_ticket,
+    generate_full_sheet,
+    validate_ticket,
+    _validate_full_sheet,
+    get_generator_stats,
+    reset_generator_stats,
+)
+
+
+# Regression thresholds in milliseconds. Roughly 10x the figures measured on a
+# developer laptop, so they only trip on real slowdowns, not on CI noise.
+LATENCY_BUDGETS_MS = {
+    "ticket.p99": 2.0,
+    "sheet.p99": 10.0,
+    "batch_100.per_sheet": 5.0,
+}
+
+# Share of sheets allowed to come from anything but the primary v2 path
+MAX_FALLBACK_SHARE = 0.01
+
+BATCH_SIZES = [10, 50, 100]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def _time_calls(fn: Callable, iterations: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "iterations": iterations,
+        "mean_ms": sum(samples) / iterations,
+        "p50_ms": percentile(samples, 50),
+        "p99_ms": percentile(samples, 99),
+        "max_ms": max(samples),
+    }
+
+
+def run_benchmark(tickets: int = 2000, sheets: int = 500, batch_sizes: List[int] = None) -> dict:
+    """Run every benchmark and return the results as a dict."""
+    batch_sizes = batch_sizes or BATCH_SIZES
+    results = {}
+
+    reset_generator_stats()
+    results["ticket"] = _time_calls(generate_authentic_ticket, tickets)
+    results["sheet"] = _time_calls(generate_full_sheet, sheets)
+
+    # Validation cost on its own, measured on already generated output
+    sample_ticket = generate_authentic_ticket()
+    sample_sheet = generate_full_sheet()
+    results["validate_ticket"] = _time_calls(lambda: validate_ticket(sample_ticket), tickets)
+    results["validate_sheet"] = _time_calls(lambda: _validate_full_sheet(sample_sheet), sheets)
+
+    for size in batch_sizes:
+        start = time.perf_counter()
+        for _ in range(size):
+            generate_full_sheet()
+        total_ms = (time.perf_counter() - start) * 1000
+        results[f"batch_{size}"] = {"sheets": size, "total_ms": total_ms, "per_sheet_ms": total_ms / size}
+
+    stats = get_generator_stats()
+    sheet_total = sum(sum(h.values()) for path, h in stats.items() if path.startswith("sheet."))
+    primary = sum(stats.get("sheet.v2", {}).values())
+    results["paths"] = {path: dict(sorted(h.items())) for path, h in sorted(stats.items())}
+    results["fallback_share"] = (sheet_total - primary) / sheet_total if sheet_total else 0.0
+    return results
+
+
+def check_regressions(results: dict) -> List[str]:
+    """Return a message for every budget the results exceed."""
+    failures = []
+    measured = {
+        "ticket.p99": results["ticket"]["p99_ms"],
+        "sheet.p99": results["sheet"]["p99_ms"],
+    }
+    if "batch_100" in results:
+        measured["batch_100.per_sheet"] = results["batch_100"]["per_sheet_ms"]
+
+    for key, value in measured.items():
+        if value > LATENCY_BUDGETS_MS[key]:
+            failures.append(f"{key} = {value:.3f}ms exceeds budget {LATENCY_BUDGETS_MS[key]}ms")
+
+    if results["fallback_share"] > MAX_FALLBACK_SHARE:
+        failures.append(
+            f"{results['fallback_share']:.1%} of sheets needed a fallback path "
+            f"(allowed {MAX_FALLBACK_SHARE:.0%})"
+        )
+    return failures
+
+
+def print_report(results: dict):
+    """Print the results as a readable table."""
+    print(f"{'benchmark':<18}{'mean':>10}{'p50':>10}{'p99':>10}{'max':>10}  (ms)")
+    for name in ["ticket", "sheet", "validate_ticket", "validate_sheet"]:
+        r = results[name]
+        print(f"{name:<18}{r['mean_ms']:>10.3f}{r['p50_ms']:>10.3f}{r['p99_ms']:>10.3f}{r['max_ms']:>10.3f}")
+
+    print()
+    for name, r in results.items():
+        if name.startswith("batch_"):
+            print(f"{name:<18}{r['total_ms']:>10.1f}ms total  {r['per_sheet_ms']:.3f}ms/sheet")
+
+    print("\nAttempts per success by path:")
+    for path, histogram in results["paths"].items():
+        print(f"  {path:<22}{histogram}")
+    print(f"Fallback share: {results['fallback_share']:.2%}")
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the Tambola ticket generator")
+    parser.add_argument("--tickets", type=int, default=2000, help="single tickets to time")
+    parser.add_argument("--sheets", type=int, default=500, help="full sheets to time")
+    parser.add_argument("--batch", type=int, action="append", help="batch size (repeatable)")
+    parser.add_argument("--json", action="store_true", help="print raw results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args.tickets, args.sheets, args.batch)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results)
+
+    failures = check_regressions(results)
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("✅ Within latency budgets")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,11 @@
 # OFFICIAL TAMBOLA TICKET GENERATOR
 # Following authentic Indian Tambola/Housie rules STRICTLY
 import random
-from typing import List, Optional, Tuple
+from collections import Counter, defaultdict
+from itertools import combinations
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
 
 
 # Column number ranges (official Tambola)
@@ -18,6 +22,45 @@ COLUMN_RANGES = [
 ]
 
 
+# ============ PATH STATISTICS ============
+# Attempts-per-success histogram for every generation path, e.g.
+# {"sheet.v2": {1: 980, 2: 20}}. Read by ticket_benchmark.py.
+_path_stats: Dict[str, Counter] = defaultdict(Counter)
+
+
+def _record_path(path: str, attempts: int):
+    _path_stats[path][attempts] += 1
+
+
+def get_generator_stats() -> Dict[str, Dict[int, int]]:
+    """Snapshot of the attempts-per-success histograms by generation path."""
+    return {path: dict(histogram) for path, histogram in _path_stats.items()}
+
+
+def reset_generator_stats():
+    """Clear the path statistics."""
+    _path_stats.clear()
+
+
+# ============ LAYOUT CATALOGUE ============
+# Every valid 3×9 occupancy mask (5 numbers per row, 1-3 per column),
+# enumerated once at import: 126 possible rows, 735,210 valid layouts.
+# Bit row*9+col, the same layout as ticket_layout_mask().
+
+def _build_layout_catalogue() -> np.ndarray:
+    row_masks = np.array(
+        [sum(1 << col for col in cols) for cols in combinations(range(9), 5)], dtype=np.uint32
+    )
+    # Three rows of 5 give 15 numbers; a layout is valid when no column is empty
+    covered = row_masks[:, None, None] | row_masks[None, :, None] | row_masks[None, None, :]
+    r0, r1, r2 = np.nonzero(covered == 0x1FF)
+    return row_masks[r0] | (row_masks[r1] << 9) | (row_masks[r2] << 18)
+
+
+LAYOUT_CATALOGUE = _build_layout_catalogue()
+LAYOUT_COUNT = len(LAYOUT_CATALOGUE)
+
+
 def generate_authentic_ticket() -> List[List[Optional[int]]]:
     """
     Generate a single authentic Tambola ticket following OFFICIAL rules:
@@ -28,132 +71,22 @@ def generate_authentic_ticket() -> List[List[Optional[int]]]:
     - Each column: 1-3 numbers (never empty, max 3)
     - Total: 15 numbers per ticket
     - Numbers sorted ascending within each column
-    """
     
-    for attempt in range(100):  # Multiple attempts to generate valid ticket
-        ticket = [[None for _ in range(9)] for _ in range(3)]
-        
-        # STEP 1: Determine how many numbers per column (1, 2, or 3)
-        # Total must be exactly 15, distributed across 9 columns
-        col_counts = _generate_column_distribution()
-        
-        if sum(col_counts) != 15:
-            continue
-        
-        # STEP 2: For each column, assign numbers to rows
-        success = True
-        for col_idx in range(9):
-            count = col_counts[col_idx]
-            if count == 0:
-                success = False
-                break
-            
-            # Get numbers from this column's range
-            start, end = COLUMN_RANGES[col_idx]
-            available_numbers = list(range(start, end + 1))
-            
-            # Pick random numbers
-            chosen_numbers = sorted(random.sample(available_numbers, count))
-            
-            # Pick random rows for this column
-            chosen_rows = sorted(random.sample([0, 1, 2], count))
-            
-            # Place numbers (already sorted)
-            for i, row in enumerate(chosen_rows):
-                ticket[row][col_idx] = chosen_numbers[i]
-        
-        if not success:
-            continue
-        
-        # STEP 3: Validate and fix row counts (each row must have exactly 5)
-        if _fix_row_distribution(ticket):
-            # STEP 4: Sort numbers in each column (ascending)
-            _sort_columns(ticket)
-            
-            # STEP 5: Final validation
-            if _validate_ticket(ticket):
-                return ticket
-    
-    # Fallback: Use deterministic approach
-    return _generate_deterministic_ticket()
-
-
-def _generate_column_distribution() -> List[int]:
-    """
-    Generate valid column distribution where:
-    - Each column has 1, 2, or 3 numbers
-    - Total is exactly 15
-    """
-    # Start with each column having at least 1 number (9 total)
-    col_counts = [1] * 9
-    remaining = 15 - 9  # 6 more to distribute
-    
-    # Randomly add 1 more to 6 columns (so they have 2 numbers)
-    columns_to_add = random.sample(range(9), remaining)
-    for col in columns_to_add:
-        col_counts[col] += 1
-    
-    # Randomly shuffle to add variety
-    # Some columns can have 3, but then others have 1
-    if random.random() < 0.3:  # 30% chance to have a column with 3
-        # Find a column with 2 and one with 1
-        cols_with_2 = [i for i, c in enumerate(col_counts) if c == 2]
-        cols_with_1 = [i for i, c in enumerate(col_counts) if c == 1]
-        
-        if cols_with_2 and cols_with_1:
-            # Move one number from a 2-column to make it 3
-            # And from another 2-column to the 1-column
-            src = random.choice(cols_with_2)
-            # Actually let's keep it simpler - just ensure valid distribution
-            pass
-    
-    return col_counts
-
-
-def _fix_row_distribution(ticket: List[List[Optional[int]]]) -> bool:
-    """
-    Ensure each row has exactly 5 numbers.
-    Returns True if successful, False otherwise.
+    Picks a layout uniformly from LAYOUT_CATALOGUE and fills each column
+    from its range, so every call succeeds in a single pass.
     """
-    max_iterations = 50
+    mask = int(LAYOUT_CATALOGUE[random.randrange(LAYOUT_COUNT)])
+    ticket = [[None for _ in range(9)] for _ in range(3)]
     
-    for _ in range(max_iterations):
-        row_counts = [sum(1 for cell in row if cell is not None) for row in ticket]
-        
-        if row_counts == [5, 5, 5]:
-            return True
-        
-        # Find rows with too many/too few numbers
-        over_rows = [i for i, c in enumerate(row_counts) if c > 5]
-        under_rows = [i for i, c in enumerate(row_counts) if c < 5]
-        
-        if not over_rows or not under_rows:
-            # Can't fix - need to regenerate
-            return False
-        
-        # Try to move a number from over_row to under_row
-        over_row = over_rows[0]
-        under_row = under_rows[0]
-        
-        # Find a column where over_row has a number and under_row doesn't
-        for col in range(9):
-            if ticket[over_row][col] is not None and ticket[under_row][col] is None:
-                # Check if moving won't violate column constraints
-                col_count = sum(1 for r in range(3) if ticket[r][col] is not None)
-                
-                # Move the number
-                # We need to pick a new valid number for under_row in this column
-                start, end = COLUMN_RANGES[col]
-                existing_in_col = [ticket[r][col] for r in range(3) if ticket[r][col] is not None]
-                available = [n for n in range(start, end + 1) if n not in existing_in_col]
-                
-                if available:
-                    # Swap: remove from over_row, add new to under_row
-                    ticket[over_row][col] = None
-                    ticket[under_row][col] = random.choice(available)
-                    break
+    for col in range(9):
+        rows = [row for row in range(3) if mask >> (row * 9 + col) & 1]
+        start, end = COLUMN_RANGES[col]
+        # Sorted numbers into top-down rows keeps the column ascending
+        for row, num in zip(rows, sorted(random.sample(range(start, end + 1), len(rows)))):
+            ticket[row][col] = num
     
-    return False
+    _record_path("ticket.catalogue", 1)
+    return ticket
 
 
 def _sort_columns(ticket: List[List[Optional[int]]]):
@@ -216,46 +149,6 @@ def _validate_ticket(ticket: List[List[Optional[int]]]) -> bool:
     return True
 
 
-def _generate_deterministic_ticket() -> List[List[Optional[int]]]:
-    """Fallback deterministic ticket generation."""
-    ticket = [[None for _ in range(9)] for _ in range(3)]
-    
-    # Use a known working pattern: 2,2,2,1,2,1,2,2,1 = 15
-    col_counts = [2, 2, 2, 1, 2, 1, 2, 2, 1]
-    random.shuffle(col_counts)  # Add some randomness
-    
-    # Ensure total is 15
-    while sum(col_counts) != 15:
-        if sum(col_counts) < 15:
-            idx = col_counts.index(1)
-            col_counts[idx] = 2
-        else:
-            idx = col_counts.index(2)
-            col_counts[idx] = 1
-    
-    row_counts = [0, 0, 0]
-    
-    for col in range(9):
-        count = col_counts[col]
-        start, end = COLUMN_RANGES[col]
-        
-        # Pick numbers
-        numbers = sorted(random.sample(range(start, end + 1), count))
-        
-        # Pick rows that need more numbers
-        available_rows = [r for r in range(3) if row_counts[r] < 5]
-        if len(available_rows) < count:
-            available_rows = [0, 1, 2]
-        
-        chosen_rows = sorted(random.sample(available_rows, count))
-        
-        for i, row in enumerate(chosen_rows):
-            ticket[row][col] = numbers[i]
-            row_counts[row] += 1
-    
-    return ticket
-
-
 def generate_full_sheet(max_attempts: int = 2000) -> List[List[List[Optional[int]]]]:
     """
     Generate an authentic Tambola Full Sheet with 6 tickets.
@@ -274,21 +167,25 @@ def generate_full_sheet(max_attempts: int = 2000) -> List[List[List[Optional[int
         # Try the primary method
         result = _try_generate_full_sheet_v2()
         if result is not None and _validate_full_sheet(result):
+            _record_path("sheet.v2", attempt + 1)
             return result
         
         # Try smart method every 100 attempts
         if attempt % 100 == 50:
-            result = _generate_full_sheet_smart()
+            result, path = _generate_full_sheet_smart_or_last_resort()
             if _validate_full_sheet(result):
+                _record_path(f"sheet.{path}", attempt + 1)
                 return result
     
     # Final fallback with validation loop
-    for _ in range(1000):
-        result = _generate_full_sheet_smart()
+    for fallback_attempt in range(1000):
+        result, path = _generate_full_sheet_smart_or_last_resort()
         if _validate_full_sheet(result):
+            _record_path(f"sheet.{path.replace('smart', 'smart_fallback', 1)}", max_attempts + fallback_attempt + 1)
             return result
     
     # Ultimate fallback - last resort
+    _record_path("sheet.last_resort", max_attempts + 1000)
     return _generate_full_sheet_last_resort()
 
 
@@ -455,10 +352,21 @@ def _find_valid_distribution(patterns: dict) -> Optional[List[List[int]]]:
     return col_distributions
 
 
-def _generate_full_sheet_smart() -> List[List[List[Optional[int]]]]:
+def _generate_full_sheet_smart_or_last_resort() -> Tuple[List[List[List[Optional[int]]]], str]:
+    """
+    Smart generation, falling back to the last-resort method when it gives up.
+    Returns the sheet and the path that built it ("smart" or "smart.last_resort").
+    """
+    tickets = _generate_full_sheet_smart()
+    if tickets is not None:
+        return tickets, "smart"
+    return _generate_full_sheet_last_resort(), "smart.last_resort"
+
+
+def _generate_full_sheet_smart() -> Optional[List[List[List[Optional[int]]]]]:
     """
-    Guaranteed full sheet generation using a more deterministic approach.
-    Uses a matrix filling technique that guarantees valid output.
+    Full sheet generation using a more deterministic approach.
+    Uses a matrix filling technique; returns None if 500 attempts fail.
     """
     for attempt in range(500):
         tickets = [[[None for _ in range(9)] for _ in range(3)] for _ in range(6)]
@@ -547,9 +455,8 @@ def _generate_full_sheet_smart() -> List[List[List[Optional[int]]]]:
         if all_valid:
             return tickets
     
-    # Last resort fallback - should rarely reach here
-    # Use the original algorithm with better handling
-    return _generate_full_sheet_last_resort()
+    # Should rarely reach here; the caller falls back to the last resort
+    return None
 
 
 def _generate_full_sheet_last_resort() -> List[List[List[Optional[int]]]]:
@@ -806,6 +713,7 @@ def _generate_full_sheet_guaranteed() -> List[List[List[Optional[int]]]]:
         _balance_rows_by_column_swap(tickets[ticket_idx], row_counts)
         _sort_columns(tickets[ticket_idx])
     
+    _record_path("sheet.guaranteed", 1)
     return tickets
 
 
@@ -1041,6 +949,120 @@ def validate_ticket(ticket: List[List[Optional[int]]]) -> dict:
     return results
 
 
+# ============ COMPACT ENCODING ============
+# Tickets can be stored as a 19-byte "numbers_packed" field instead of the
+# 27-cell nested "numbers" array:
+#   bytes 0-14  : the 15 numbers, sorted ascending (one byte each, 1-90)
+#   bytes 15-18 : 27-bit layout mask, little-endian, bit (row * 9 + col) set
+#                 for every occupied cell
+
+PACKED_TICKET_SIZE = 19
+
+
+def ticket_layout_mask(ticket: List[List[Optional[int]]]) -> int:
+    """Return the 27-bit occupancy mask of a ticket (bit row*9+col)."""
+    mask = 0
+    for row in range(3):
+        for col in range(9):
+            if ticket[row][col]:
+                mask |= 1 << (row * 9 + col)
+    return mask
+
+
+def ticket_bitmap(ticket: List[List[Optional[int]]]) -> int:
+    """Return the 90-bit membership bitmap of a ticket (bit n-1 set for number n)."""
+    bitmap = 0
+    for row in ticket:
+        for num in row:
+            if num:
+                bitmap |= 1 << (num - 1)
+    return bitmap
+
+
+def encode_ticket_compact(ticket: List[List[Optional[int]]]) -> bytes:
+    """
+    Encode a 3×9 ticket grid as PACKED_TICKET_SIZE bytes.
+    Raises ValueError if the ticket does not hold exactly 15 numbers.
+    """
+    numbers = sorted(num for row in ticket for num in row if num)
+    if len(numbers) != 15:
+        raise ValueError(f"Ticket has {len(numbers)} numbers (must be 15)")
+    return bytes(numbers) + ticket_layout_mask(ticket).to_bytes(4, "little")
+
+
+def decode_ticket_compact(packed: bytes) -> List[List[Optional[int]]]:
+    """Decode a packed ticket back into the 3×9 grid stored in "numbers"."""
+    if len(packed) != PACKED_TICKET_SIZE:
+        raise ValueError(f"Packed ticket must be {PACKED_TICKET_SIZE} bytes, got {len(packed)}")
+
+    numbers = packed[:15]
+    mask = int.from_bytes(packed[15:], "little")
+    ticket = [[None for _ in range(9)] for _ in range(3)]
+
+    # Numbers are sorted, so each column's numbers arrive in ascending order
+    # and fill that column's occupied cells top to bottom
+    next_row = [0] * 9
+    for num in numbers:
+        col = _get_column_for_number(num)
+        row = next_row[col]
+        while row < 3 and not mask >> (row * 9 + col) & 1:
+            row += 1
+        if row == 3:
+            raise ValueError(f"Layout mask has no free cell for {num} in column {col + 1}")
+        ticket[row][col] = num
+        next_row[col] = row + 1
+
+    return ticket
+
+
+def get_ticket_grid(ticket_doc: dict) -> List[List[Optional[int]]]:
+    """
+    Return the 3×9 grid of a ticket document, accepting either the
+    "numbers" array or the compact "numbers_packed" field.
+    """
+    numbers = ticket_doc.get("numbers")
+    if numbers:
+        return numbers
+    packed = ticket_doc.get("numbers_packed")
+    if packed:
+        return decode_ticket_compact(bytes(packed))
+    return []
+
+
+# ============ FINGERPRINTS ============
+
+def ticket_fingerprint(ticket: List[List[Optional[int]]]) -> str:
+    """
+    Canonical fingerprint of a ticket's 15-number set: the 90-bit bitmap as
+    23 hex digits. Two tickets share a fingerprint exactly when they hold the
+    same numbers, whatever their layout.
+    """
+    return f"{ticket_bitmap(ticket):023x}"
+
+
+def iter_unique_full_sheets(count: int, existing_fingerprints=None) -> Iterator[List[List[List[Optional[int]]]]]:
+    """
+    Yield full sheets whose tickets never repeat a number set already in
+    existing_fingerprints or earlier in the stream. A sheet holding a
+    duplicate is regenerated whole, since its tickets depend on each other.
+    """
+    seen = set(existing_fingerprints or ())
+    produced = 0
+    while produced < count:
+        sheet = generate_full_sheet()
+        fingerprints = [ticket_fingerprint(ticket) for ticket in sheet]
+        # Tickets within one sheet never overlap, so only check against earlier sheets
+        if seen.isdisjoint(fingerprints):
+            seen.update(fingerprints)
+            produced += 1
+            yield sheet
+
+
+def generate_unique_full_sheets(count: int, existing_fingerprints=None) -> List[List[List[List[Optional[int]]]]]:
+    """List form of iter_unique_full_sheets()."""
+    return list(iter_unique_full_sheets(count, existing_fingerprints))
+
+
 def print_ticket(ticket: List[List[Optional[int]]]):
     """Print ticket in readable format."""
     print("+" + "-" * 45 + "+")
@@ -0,0 +1,257 @@
+# PER-GAME TICKET STORE
+# Fixed-width binary ticket file written when a game goes live. Any process
+# can mmap it and view the records zero-copy as a NumPy array instead of
+# scanning and decoding the tickets collection.
+#
+# Each process caches its open stores. A store is rewritten by swapping in a
+# new file, so a cached map is reused only while the path still names the
+# same file (inode, mtime, size); otherwise it is closed and reopened.
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from ticket_generator import decode_ticket_compact, encode_ticket_compact, get_ticket_grid
+
+logger = logging.getLogger(__name__)
+
+STORE_DIR = Path(os.environ.get("TICKET_STORE_DIR", Path(__file__).parent / "ticket_store"))
+
+# Header: magic, version, record size, record count, CRC32 of the record block, game_id
+MAGIC = b"TMBT"
+VERSION = 1
+HEADER = struct.Struct("<4sHHII48s")
+HEADER_SIZE = 64
+
+RECORD_DTYPE = np.dtype([
+    ("ticket_index", "<u4"),     # 1-based, from ticket_number "T001"
+    ("numbers", "u1", 15),       # sorted ticket numbers
+    ("layout_mask", "<u4"),      # 27-bit occupancy mask (bit row*9+col)
+    ("sheet_number", "<u2"),     # FS001 -> 1, 0 when the ticket has no sheet
+    ("sheet_position", "u1"),    # 1-6 within the full sheet
+])
+
+
+def ticket_store_path(game_id: str) -> Path:
+    """Location of the store file for a game."""
+    return STORE_DIR / f"{game_id}.tickets"
+
+
+def parse_ticket_index(ticket_number: str) -> Optional[int]:
+    """Extract the numeric index from a ticket number ("T042" -> 42)."""
+    digits = "".join(filter(str.isdigit, ticket_number or ""))
+    return int(digits) if digits else None
+
+
+def _parse_sheet_number(full_sheet_id: Optional[str]) -> int:
+    digits = "".join(filter(str.isdigit, full_sheet_id or ""))
+    return int(digits) if digits else 0
+
+
+def build_ticket_records(ticket_docs: Iterable[dict]) -> np.ndarray:
+    """
+    Convert ticket documents (either grid form) into store records sorted by
+    ticket index. Tickets without a parseable ticket_number are skipped.
+    """
+    rows = []
+    for doc in ticket_docs:
+        index = parse_ticket_index(doc.get("ticket_number"))
+        if index is None:
+            logger.warning(f"Ticket store: skipping {doc.get('ticket_id')} - no ticket index")
+            continue
+        packed = doc.get("numbers_packed")
+        packed = bytes(packed) if packed else encode_ticket_compact(get_ticket_grid(doc))
+        rows.append((
+            index,
+            np.frombuffer(packed[:15], dtype=np.uint8),
+            int.from_bytes(packed[15:], "little"),
+            _parse_sheet_number(doc.get("full_sheet_id")),
+            doc.get("ticket_position_in_sheet") or 0,
+        ))
+
+    records = np.array(rows, dtype=RECORD_DTYPE)
+    records.sort(order="ticket_index")
+    return records
+
+
+def write_ticket_store(game_id: str, ticket_docs: Iterable[dict]) -> Path:
+    """Write (or replace) the store file for a game and return its path."""
+    records = build_ticket_records(ticket_docs)
+    payload = records.tobytes()
+    header = HEADER.pack(
+        MAGIC, VERSION, RECORD_DTYPE.itemsize, len(records),
+        zlib.crc32(payload), game_id.encode()[:48]
+    ).ljust(HEADER_SIZE, b"\0")
+
+    path = ticket_store_path(game_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Each writer gets its own temp file so concurrent go-lives of the same
+    # game never write into (or swap in) each other's half-written file
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f"{path.stem}.", suffix=".tmp", delete=False) as f:
+        tmp_path = Path(f.name)
+        try:
+            f.write(header)
+            f.write(payload)
+        except BaseException:
+            f.close()
+            tmp_path.unlink(missing_ok=True)
+            raise
+    # Atomic swap so readers never map a half-written file
+    os.replace(tmp_path, path)
+
+    _discard_store(game_id)
+    logger.info(f"Ticket store written for {game_id}: {len(records)} tickets")
+    return path
+
+
+class TicketStore:
+    """Read-only, memory-mapped view over a game's ticket store file."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.file_stamp = _file_stamp(os.fstat(f.fileno()))
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, record_size, count, checksum, game_id = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION or record_size != RECORD_DTYPE.itemsize:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a version {VERSION} ticket store")
+        if len(self._mmap) != HEADER_SIZE + count * record_size:
+            self._mmap.close()
+            raise ValueError(f"{path} is truncated")
+
+        self.game_id = game_id.rstrip(b"\0").decode()
+        self.checksum = checksum
+        # Zero-copy view over the mapped file
+        self.records = np.frombuffer(self._mmap, dtype=RECORD_DTYPE, count=count, offset=HEADER_SIZE)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def checksum_ok(self) -> bool:
+        """Whether the mapped records still match the header CRC."""
+        return zlib.crc32(self.records.tobytes()) == self.checksum
+
+    def find(self, ticket_index: int) -> Optional[int]:
+        """Record position for a ticket index, or None if the store lacks it."""
+        pos = int(np.searchsorted(self.records["ticket_index"], ticket_index))
+        if pos < len(self.records) and self.records["ticket_index"][pos] == ticket_index:
+            return pos
+        return None
+
+    def packed(self, ticket_index: int) -> Optional[bytes]:
+        """The ticket in "numbers_packed" form."""
+        pos = self.find(ticket_index)
+        if pos is None:
+            return None
+        record = self.records[pos]
+        return record["numbers"].tobytes() + int(record["layout_mask"]).to_bytes(4, "little")
+
+    def grid(self, ticket_number: str) -> Optional[List[List[Optional[int]]]]:
+        """The 3×9 grid for a ticket number such as "T042"."""
+        index = parse_ticket_index(ticket_number)
+        packed = self.packed(index) if index is not None else None
+        return decode_ticket_compact(packed) if packed else None
+
+    def close(self):
+        self.records = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass  # A caller still holds a view of the records; the map is released with it
+
+
+def _file_stamp(stat: os.stat_result) -> tuple:
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+_open_stores: Dict[str, TicketStore] = {}
+
+
+def _discard_store(game_id: str):
+    store = _open_stores.pop(game_id, None)
+    if store is not None:
+        store.close()
+
+
+def open_ticket_store(game_id: str) -> Optional[TicketStore]:
+    """
+    Return the (cached) store for a game, or None if it has not been written
+    or fails validation. A cached store whose file was replaced or removed
+    (by this or another process) is closed and the current file opened.
+    """
+    path = ticket_store_path(game_id)
+    try:
+        stamp = _file_stamp(path.stat())
+    except FileNotFoundError:
+        _discard_store(game_id)
+        return None
+
+    store = _open_stores.get(game_id)
+    if store is not None:
+        if store.file_stamp == stamp:
+            return store
+        _discard_store(game_id)
+
+    try:
+        store = TicketStore(path)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ticket store for {game_id} unusable: {e}")
+        return None
+
+    _open_stores[game_id] = store
+    return store
+
+
+def fill_ticket_grids(store: TicketStore, tickets: List[dict]) -> List[str]:
+    """
+    Attach "numbers_packed" from the store to ticket documents loaded without
+    their grids. Returns the ticket_ids the store could not supply.
+    """
+    missing = []
+    for ticket in tickets:
+        index = parse_ticket_index(ticket.get("ticket_number"))
+        packed = store.packed(index) if index is not None else None
+        if packed:
+            ticket["numbers_packed"] = packed
+        else:
+            missing.append(ticket.get("ticket_id"))
+    return missing
+
+
+def verify_ticket_store(store: TicketStore, ticket_docs: Iterable[dict]) -> dict:
+    """Compare a store against the Mongo copy of the same game's tickets."""
+    expected = build_ticket_records(ticket_docs)
+    result = {
+        "game_id": store.game_id,
+        "store_tickets": len(store),
+        "mongo_tickets": len(expected),
+        "checksum_ok": store.checksum_ok(),
+        "mismatched_tickets": [],
+        "missing_from_store": [],
+        "extra_in_store": [],
+    }
+
+    store_index = store.records["ticket_index"]
+    expected_index = expected["ticket_index"]
+    result["missing_from_store"] = np.setdiff1d(expected_index, store_index).tolist()
+    result["extra_in_store"] = np.setdiff1d(store_index, expected_index).tolist()
+
+    common, store_pos, expected_pos = np.intersect1d(store_index, expected_index, return_indices=True)
+    differs = store.records[store_pos] != expected[expected_pos]
+    result["mismatched_tickets"] = common[differs].tolist()
+
+    result["valid"] = (
+        result["checksum_ok"]
+        and not result["mismatched_tickets"]
+        and not result["missing_from_store"]
+        and not result["extra_in_store"]
+    )
+    return result
@@ -0,0 +1,254 @@
+# TTS AUDIO CACHE
+# Number calls draw from a tiny text space (90 numbers x a few prefix lines x
+# a few voices), so synthesized audio is cached by content: the key is a
+# SHA-256 of the final text, voice, speed and model. Audio lives on disk
+# (TTS_CACHE_DIR) behind an in-memory LRU; both tiers are bounded in bytes
+# and evict least recently used entries first. Concurrent requests for the
+# same key share one synthesis. Clips are served as plain mp3 at
+# /api/tts/audio/<key>.mp3; the helpers at the bottom back that endpoint.
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path(os.environ.get("TTS_CACHE_DIR", Path(__file__).parent / "tts_cache"))
+DEFAULT_MEMORY_BYTES = 32 * 1024 * 1024
+DEFAULT_DISK_BYTES = 512 * 1024 * 1024
+
+_KEY_RE = re.compile(r"^[0-9a-f]{64}$")
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def tts_cache_key(text: str, voice: str, speed: float, model: str) -> str:
+    """Content address of one synthesized clip."""
+    payload = json.dumps(
+        {"text": " ".join(text.split()), "voice": voice, "speed": round(float(speed), 2), "model": model},
+        sort_keys=True, ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class TTSAudioCache:
+    """In-memory LRU over a size-bounded directory of <key>.mp3 files."""
+
+    def __init__(self, directory: Path = CACHE_DIR, memory_bytes: int = DEFAULT_MEMORY_BYTES,
+                 disk_bytes: int = DEFAULT_DISK_BYTES):
+        self.directory = Path(directory)
+        self.memory_limit = memory_bytes
+        self.disk_limit = disk_bytes
+        self.memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self.memory_bytes = 0
+        self.disk: "OrderedDict[str, int]" = OrderedDict()   # key -> size, least recently used first
+        self.disk_bytes = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "generated_ms": 0.0}
+        self._scan()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.mp3"
+
+    def _scan(self):
+        """Index files left by earlier runs, oldest access first."""
+        if not self.directory.exists():
+            return
+        files = sorted(self.directory.glob("*/*.mp3"), key=lambda p: p.stat().st_mtime)
+        for path in files:
+            size = path.stat().st_size
+            self.disk[path.stem] = size
+            self.disk_bytes += size
+        self._evict_disk()
+
+    # ============ MEMORY TIER ============
+
+    def _remember(self, key: str, audio: bytes):
+        if len(audio) > self.memory_limit:
+            return
+        if key in self.memory:
+            self.memory_bytes -= len(self.memory.pop(key))
+        self.memory[key] = audio
+        self.memory_bytes += len(audio)
+        while self.memory_bytes > self.memory_limit:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_bytes -= len(evicted)
+
+    # ============ DISK TIER ============
+
+    def _read(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            audio = path.read_bytes()
+            os.utime(path)   # mtime doubles as last access for the next _scan()
+            return audio
+        except FileNotFoundError:
+            return None
+
+    def _write(self, key: str, audio: bytes):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(audio)
+        tmp.replace(path)
+
+    def _evict_disk(self):
+        while self.disk_bytes > self.disk_limit and self.disk:
+            key, size = self.disk.popitem(last=False)
+            self.disk_bytes -= size
+            self.stats["evictions"] += 1
+            try:
+                self._path(key).unlink()
+            except FileNotFoundError:
+                pass
+
+    # ============ LOOKUPS ============
+
+    def contains(self, key: str) -> bool:
+        return key in self.memory or key in self.disk
+
+    def get_cached(self, key: str, count: bool = True) -> Optional[bytes]:
+        """Memory-tier hit only; never touches the disk."""
+        audio = self.memory.get(key)
+        if audio is not None:
+            self.memory.move_to_end(key)
+            if key in self.disk:
+                self.disk.move_to_end(key)
+            if count:
+                self.stats["memory_hits"] += 1
+        return audio
+
+    async def get(self, key: str, count: bool = True) -> Optional[bytes]:
+        """count=False for reads that are not synthesis lookups (serving a clip), so hit_rate stays honest."""
+        audio = self.get_cached(key, count)
+        if audio is not None:
+            return audio
+        if key in self.disk:
+            audio = await asyncio.to_thread(self._read, key)
+            if audio is not None:
+                self.disk.move_to_end(key)
+                self._remember(key, audio)
+                if count:
+                    self.stats["disk_hits"] += 1
+                return audio
+            self.disk_bytes -= self.disk.pop(key)
+        return None
+
+    async def put(self, key: str, audio: bytes):
+        self._remember(key, audio)
+        try:
+            await asyncio.to_thread(self._write, key, audio)
+        except OSError as e:
+            logger.warning(f"TTS cache write failed for {key[:12]}: {e}")
+            return
+        if key in self.disk:
+            self.disk_bytes -= self.disk.pop(key)
+        self.disk[key] = len(audio)
+        self.disk_bytes += len(audio)
+        self._evict_disk()
+
+    async def get_or_generate(self, key: str, generate: Callable[[], Awaitable[bytes]]) -> Tuple[bytes, bool]:
+        """
+        Audio for key and whether it came from the cache. On a miss
+        generate() runs once, however many requests are waiting for the key.
+        """
+        audio = await self.get(key)
+        if audio is not None:
+            return audio, True
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight), True
+
+        self.stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        started = time.perf_counter()
+        try:
+            audio = await generate()
+            self.stats["generated_ms"] += (time.perf_counter() - started) * 1000
+            await self.put(key, audio)
+            future.set_result(audio)
+            return audio, False
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()   # waiters re-raise it; don't warn about an unretrieved exception
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def get_stats(self) -> dict:
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        lookups = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "generated_ms": round(self.stats["generated_ms"], 1),
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory_bytes,
+            "disk_entries": len(self.disk),
+            "disk_bytes": self.disk_bytes,
+        }
+
+
+# ============ HTTP SERVING ============
+
+def is_cache_key(key: str) -> bool:
+    return bool(_KEY_RE.match(key))
+
+
+def audio_url(key: str) -> str:
+    return f"/api/tts/audio/{key}.mp3"
+
+
+def audio_etag(audio: bytes) -> str:
+    """Strong validator: a hash of the bytes served."""
+    return f'"{hashlib.sha256(audio).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+def parse_byte_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Inclusive (start, end) of a single "bytes=" range, or None to serve the
+    whole body (no header, multiple ranges or a malformed one). Raises
+    ValueError when the range cannot be satisfied (416).
+    """
+    match = _RANGE_RE.match((header or "").strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if not first:
+        length = int(last)    # suffix range: the last N bytes
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or (last and int(last) < start):
+        raise ValueError(f"range {header!r} outside {size} bytes")
+    return start, end
+
+
+_tts_cache: Optional[TTSAudioCache] = None
+
+
+def get_tts_cache() -> TTSAudioCache:
+    """The process-wide cache, sized from TTS_CACHE_MEMORY_MB / TTS_CACHE_DISK_MB."""
+    global _tts_cache
+    if _tts_cache is None:
+        _tts_cache = TTSAudioCache(
+            memory_bytes=int(float(os.environ.get("TTS_CACHE_MEMORY_MB", 32)) * 1024 * 1024),
+            disk_bytes=int(float(os.environ.get("TTS_CACHE_DISK_MB", 512)) * 1024 * 1024),
+        )
+    return _tts_cache
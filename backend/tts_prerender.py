@@ -0,0 +1,159 @@
+# TTS PRE-RENDERING
+# When a game goes live, a background job renders the call audio for all 90
+# numbers (and, optionally, every prefix line + call variant) in the caller's
+# voice into the TTS cache, so the first call of each number is a cache hit
+# instead of a live synthesis. Jobs run with bounded concurrency, one per
+# game; a call that races the job for the same clip waits for that render
+# rather than synthesizing it twice.
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from call_names import get_call_name
+from tts_cache import TTSAudioCache, get_tts_cache, tts_cache_key
+
+logger = logging.getLogger(__name__)
+
+RUNNING, COMPLETED, FAILED, CANCELLED = "running", "completed", "failed", "cancelled"
+
+DEFAULT_CONCURRENCY = 4
+MAX_ERRORS_KEPT = 20
+MAX_FINISHED_JOBS = 50
+
+# synthesize(text, voice, speed) -> mp3 bytes
+Synthesizer = Callable[[str, str, float], Awaitable[bytes]]
+
+
+def prerender_texts(prefix_lines: Optional[List[str]] = None, include_prefixes: bool = False) -> List[str]:
+    """Every text a number call can be announced with: the plain calls, then prefixed variants."""
+    calls = [get_call_name(number) for number in range(1, 91)]
+    if not include_prefixes:
+        return calls
+    return calls + [f"{prefix} {call}" for prefix in prefix_lines or [] for call in calls]
+
+
+def prerender_concurrency() -> int:
+    return int(os.environ.get("TTS_PRERENDER_CONCURRENCY", DEFAULT_CONCURRENCY))
+
+
+class PrerenderJob:
+    """Renders a list of texts into the cache, `concurrency` syntheses at a time."""
+
+    def __init__(self, game_id: str, texts: List[str], voice: str, speed: float, model: str,
+                 synthesize: Synthesizer, cache: Optional[TTSAudioCache] = None,
+                 concurrency: int = DEFAULT_CONCURRENCY):
+        self.game_id = game_id
+        self.texts = texts
+        self.voice = voice
+        self.speed = speed
+        self.model = model
+        self.synthesize = synthesize
+        self.cache = cache or get_tts_cache()
+        self.concurrency = concurrency
+        self.status = RUNNING
+        self.rendered = 0      # synthesized by this job
+        self.cached = 0        # already in the cache
+        self.failed = 0
+        self.errors: List[dict] = []
+        self.started_at = datetime.now(timezone.utc)
+        self.finished_at: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def _render(self, semaphore: asyncio.Semaphore, text: str):
+        key = tts_cache_key(text, self.voice, self.speed, self.model)
+        async with semaphore:
+            try:
+                _, hit = await self.cache.get_or_generate(
+                    key, lambda: self.synthesize(text, self.voice, self.speed)
+                )
+            except Exception as e:
+                self.failed += 1
+                if len(self.errors) < MAX_ERRORS_KEPT:
+                    self.errors.append({"text": text, "error": str(e)})
+                return
+        if hit:
+            self.cached += 1
+        else:
+            self.rendered += 1
+
+    async def run(self):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        try:
+            await asyncio.gather(*(self._render(semaphore, text) for text in self.texts))
+        except asyncio.CancelledError:
+            self.status = CANCELLED
+            raise
+        finally:
+            self.finished_at = datetime.now(timezone.utc)
+        # Partial failures still leave the rest of the clips cached
+        self.status = FAILED if self.failed == len(self.texts) and self.texts else COMPLETED
+        logger.info(
+            f"🔊 TTS pre-render for {self.game_id} {self.status}: {self.rendered} rendered, "
+            f"{self.cached} already cached, {self.failed} failed"
+        )
+
+    def progress(self) -> dict:
+        done = self.rendered + self.cached + self.failed
+        return {
+            "game_id": self.game_id,
+            "status": self.status,
+            "voice": self.voice,
+            "speed": self.speed,
+            "total": len(self.texts),
+            "done": done,
+            "rendered": self.rendered,
+            "cached": self.cached,
+            "failed": self.failed,
+            "percent": round(100 * done / len(self.texts), 1) if self.texts else 100.0,
+            "errors": self.errors,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+# ============ JOB REGISTRY ============
+
+_jobs: Dict[str, PrerenderJob] = {}
+
+
+def start_prerender(game_id: str, texts: List[str], voice: str, speed: float, model: str,
+                    synthesize: Synthesizer, cache: Optional[TTSAudioCache] = None,
+                    concurrency: Optional[int] = None) -> PrerenderJob:
+    """Start a game's pre-render job in the background; a job already running for the game is reused."""
+    job = _jobs.get(game_id)
+    if job is not None and job.status == RUNNING:
+        return job
+
+    job = PrerenderJob(game_id, texts, voice, speed, model, synthesize, cache,
+                       concurrency or prerender_concurrency())
+    job._task = asyncio.create_task(job.run())
+    _jobs.pop(game_id, None)
+    _jobs[game_id] = job
+    _prune_finished()
+    logger.info(f"🔊 TTS pre-render started for {game_id}: {len(texts)} clips in voice {voice}")
+    return job
+
+
+def _prune_finished():
+    finished = [game_id for game_id, job in _jobs.items() if job.status != RUNNING]
+    for game_id in finished[:max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+        del _jobs[game_id]
+
+
+def get_prerender_job(game_id: str) -> Optional[PrerenderJob]:
+    return _jobs.get(game_id)
+
+
+def prerender_progress() -> List[dict]:
+    """Progress of every tracked job, most recently started first."""
+    return [job.progress() for job in reversed(list(_jobs.values()))]
+
+
+async def cancel_prerender_jobs():
+    """Cancel running jobs (shutdown); clips rendered so far stay cached."""
+    tasks = [job._task for job in _jobs.values() if job._task and not job._task.done()]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
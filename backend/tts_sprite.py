@@ -0,0 +1,190 @@
+# TTS AUDIO SPRITES
+# All 90 number calls of one voice joined into a single mp3 plus a manifest of
+# [offset_ms, duration_ms] per number (Howler's sprite format). Players fetch
+# the sprite once before the game and play calls from it locally, so a live
+# game makes no per-call TTS requests.
+#
+# MP3 is a sequence of self-contained frames, so clips are joined frame by
+# frame: ID3 tags and each clip's Xing/Info header (which would claim the
+# length of that one clip) are dropped, and durations are counted from the
+# frame headers. The sprite is stored in the TTS cache under its own content
+# key and served by /api/tts/audio like any clip; manifests live in the
+# tts_sprites collection, one per (voice, speed, model).
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from tts_cache import TTSAudioCache, audio_url, get_tts_cache, tts_cache_key
+from tts_prerender import DEFAULT_CONCURRENCY, Synthesizer, prerender_texts
+
+logger = logging.getLogger(__name__)
+
+# ============ MP3 FRAMES ============
+
+# Layer III kbps by bitrate index, for MPEG-1 and for MPEG-2 / 2.5
+_BITRATES = {
+    1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+# Sample rates by version bits (3 = MPEG-1, 2 = MPEG-2, 0 = MPEG-2.5)
+_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+
+
+def _id3v2_size(data: bytes, offset: int) -> int:
+    if data[offset:offset + 3] != b"ID3" or len(data) < offset + 10:
+        return 0
+    size = 0
+    for byte in data[offset + 6:offset + 10]:
+        size = (size << 7) | (byte & 0x7F)
+    footer = 10 if data[offset + 5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def mp3_frames(data: bytes) -> Iterator[Tuple[int, int, int, int]]:
+    """(offset, length, samples, sample_rate) of each MPEG Layer III frame, skipping ID3 tags."""
+    offset = _id3v2_size(data, 0)
+    end = len(data) - 128 if data[-128:-125] == b"TAG" else len(data)
+    while offset + 4 <= end:
+        b1, b2 = data[offset + 1], data[offset + 2]
+        version, layer = (b1 >> 3) & 3, (b1 >> 1) & 3
+        bitrate_index, rate_index = b2 >> 4, (b2 >> 2) & 3
+        if (data[offset] != 0xFF or (b1 & 0xE0) != 0xE0 or version == 1 or layer != 1
+                or bitrate_index in (0, 15) or rate_index == 3):
+            raise ValueError(f"Not an MPEG Layer III frame at byte {offset}")
+        mpeg1 = version == 3
+        bitrate = _BITRATES[1 if mpeg1 else 2][bitrate_index] * 1000
+        sample_rate = _SAMPLE_RATES[version][rate_index]
+        samples = 1152 if mpeg1 else 576
+        length = (144 if mpeg1 else 72) * bitrate // sample_rate + ((b2 >> 1) & 1)
+        if offset + length > end:
+            break   # truncated last frame
+        yield offset, length, samples, sample_rate
+        offset += length
+        # Some encoders put a second ID3 tag mid-stream
+        offset += _id3v2_size(data, offset)
+
+
+def _is_info_frame(data: bytes, offset: int) -> bool:
+    """Xing/Info (VBR header) frame: silent, and describes only its own clip."""
+    b1, b3 = data[offset + 1], data[offset + 3]
+    mono = (b3 >> 6) == 3
+    side_info = (17 if mono else 32) if (b1 >> 3) & 3 == 3 else (9 if mono else 17)
+    tag = data[offset + 4 + side_info:offset + 8 + side_info]
+    return tag in (b"Xing", b"Info")
+
+
+def join_clips(clips: List[bytes]) -> Tuple[bytes, List[Tuple[float, float]]]:
+    """Concatenate mp3 clips; returns the audio and each clip's (offset_ms, duration_ms)."""
+    audio = bytearray()
+    spans = []
+    position_ms = 0.0
+    for index, clip in enumerate(clips):
+        duration_ms = 0.0
+        for offset, length, samples, sample_rate in mp3_frames(clip):
+            if duration_ms == 0.0 and _is_info_frame(clip, offset):
+                continue
+            audio += clip[offset:offset + length]
+            duration_ms += samples * 1000 / sample_rate
+        if duration_ms == 0.0:
+            raise ValueError(f"Clip {index} has no audio frames")
+        spans.append((round(position_ms, 3), round(duration_ms, 3)))
+        position_ms += duration_ms
+    return bytes(audio), spans
+
+
+# ============ BUILDS ============
+
+def sprite_key(clip_keys: List[str]) -> str:
+    """Content address of a sprite: changes whenever any of its clips would."""
+    return hashlib.sha256(("sprite:" + ",".join(clip_keys)).encode()).hexdigest()
+
+
+async def build_sprite(voice: str, speed: float, model: str, synthesize: Synthesizer,
+                       cache: Optional[TTSAudioCache] = None, concurrency: int = DEFAULT_CONCURRENCY) -> dict:
+    """Render (or reuse) the 90 call clips, join them and cache the sprite; returns its manifest."""
+    cache = cache or get_tts_cache()
+    texts = prerender_texts()
+    keys = [tts_cache_key(text, voice, speed, model) for text in texts]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def clip(text: str, key: str) -> bytes:
+        async with semaphore:
+            audio, _ = await cache.get_or_generate(key, lambda: synthesize(text, voice, speed))
+            return audio
+
+    clips = await asyncio.gather(*(clip(text, key) for text, key in zip(texts, keys)))
+    audio, spans = await asyncio.to_thread(join_clips, clips)
+    key = sprite_key(keys)
+    await cache.put(key, audio)
+
+    return {
+        "voice": voice,
+        "speed": speed,
+        "model": model,
+        "sprite_key": key,
+        "url": audio_url(key),
+        "sprite": {str(number): list(span) for number, span in enumerate(spans, start=1)},
+        "duration_ms": round(spans[-1][0] + spans[-1][1], 3),
+        "bytes": len(audio),
+        "built_at": datetime.now(timezone.utc),
+    }
+
+
+async def get_sprite_manifest(db, voice: str, speed: float, model: str,
+                              cache: Optional[TTSAudioCache] = None) -> Optional[dict]:
+    """Stored manifest for a voice, if its sprite is still in the cache."""
+    manifest = await db.tts_sprites.find_one({"voice": voice, "speed": speed, "model": model}, {"_id": 0})
+    if manifest and (cache or get_tts_cache()).contains(manifest["sprite_key"]):
+        return manifest
+    return None
+
+
+# ============ BUILD REGISTRY ============
+
+_builds: Dict[Tuple[str, float, str], asyncio.Task] = {}
+_build_errors: Dict[Tuple[str, float, str], str] = {}
+
+
+async def _build_and_store(db, voice: str, speed: float, model: str, synthesize: Synthesizer,
+                           cache: Optional[TTSAudioCache]):
+    build = (voice, speed, model)
+    try:
+        manifest = await build_sprite(voice, speed, model, synthesize, cache)
+        await db.tts_sprites.update_one(
+            {"voice": voice, "speed": speed, "model": model}, {"$set": manifest}, upsert=True
+        )
+        _build_errors.pop(build, None)
+        logger.info(f"🔊 Sprite for voice {voice} @ {speed}x built: {manifest['bytes']} bytes")
+        return manifest
+    except Exception as e:
+        _build_errors[build] = str(e)
+        logger.error(f"Sprite build for voice {voice} @ {speed}x failed: {e}")
+    finally:
+        _builds.pop(build, None)
+
+
+def start_sprite_build(db, voice: str, speed: float, model: str, synthesize: Synthesizer,
+                       cache: Optional[TTSAudioCache] = None) -> asyncio.Task:
+    """Build a voice's sprite in the background; a build already running for it is reused."""
+    build = (voice, speed, model)
+    task = _builds.get(build)
+    if task is None:
+        task = asyncio.create_task(_build_and_store(db, voice, speed, model, synthesize, cache))
+        _builds[build] = task
+    return task
+
+
+def sprite_build_status() -> dict:
+    return {
+        "building": [{"voice": v, "speed": s, "model": m} for v, s, m in _builds],
+        "errors": [{"voice": v, "speed": s, "model": m, "error": e} for (v, s, m), e in _build_errors.items()],
+    }
+
+
+async def cancel_sprite_builds():
+    tasks = list(_builds.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
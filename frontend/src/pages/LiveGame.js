@@ -6,7 +6,7 @@ import { ArrowLeft, Trophy, Volume2, VolumeX, ZoomIn, ZoomOut } from 'lucide-rea
 import { toast } from 'sonner';
 import confetti from 'canvas-confetti';
 import { getCallName } from '@/utils/tambolaCallNames';
-import { unlockMobileAudio, playBase64Audio, speakText } from '@/utils/audioHelper';
+import { unlockMobileAudio, playAudioUrl, loadCallSprite, playCallFromSprite, speakText } from '@/utils/audioHelper';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -112,8 +112,8 @@ export default function LiveGame() {
     const callName = getCallName(number);
     
     try {
-      // Try server-side TTS with Howler.js (most reliable for mobile)
-      const played = await playTTSWithHowler(callName);
+      // Play from the preloaded sprite, else server-side TTS with Howler.js (most reliable for mobile)
+      const played = await playCallFromSprite(number) || await playTTSWithHowler(callName);
       
       // Fallback to browser TTS if server TTS fails
       if (!played) {
@@ -126,14 +126,26 @@ export default function LiveGame() {
     }
   };
 
+  // Download all 90 calls in one sprite up front; per-call TTS is only a fallback
+  const loadCallAudio = async () => {
+    try {
+      const response = await axios.get(`${API}/tts/sprite`);
+      if (response.data.available) {
+        await loadCallSprite(`${BACKEND_URL}${response.data.url}`, response.data.sprite);
+      }
+    } catch (e) {
+      console.log('Call sprite unavailable:', e);
+    }
+  };
+
   // Server-side TTS with Howler.js - works on iOS/Android
   const playTTSWithHowler = async (text) => {
     try {
       const response = await axios.post(`${API}/tts/generate?text=${encodeURIComponent(text)}&include_prefix=false`);
       const data = response.data;
       
-      if (data.audio) {
-        return await playBase64Audio(data.audio);
+      if (data.audio_url) {
+        return await playAudioUrl(`${BACKEND_URL}${data.audio_url}`);
       }
       
       if (data.use_browser_tts) {
@@ -152,6 +164,7 @@ export default function LiveGame() {
     fetchGameData();
     fetchMyTickets();
     fetchAllBookedTickets();
+    loadCallAudio();
     pollInterval.current = setInterval(fetchSession, 3000);
     return () => { if (pollInterval.current) clearInterval(pollInterval.current); };
   }, [gameId]);
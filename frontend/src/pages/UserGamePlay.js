@@ -6,7 +6,7 @@ import { ArrowLeft, Play, Square, Volume2, VolumeX, Users, Trophy } from 'lucide
 import { toast } from 'sonner';
 import confetti from 'canvas-confetti';
 import { getCallName } from '../utils/tambolaCallNames';
-import { unlockMobileAudio, playBase64Audio, speakText, isAudioUnlocked } from '../utils/audioHelper';
+import { unlockMobileAudio, playAudioUrl, loadCallSprite, playCallFromSprite, speakText, isAudioUnlocked } from '../utils/audioHelper';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -53,6 +53,7 @@ export default function UserGamePlay() {
 
   useEffect(() => {
     fetchInitialData();
+    loadCallAudio();
     
     return () => {
       if (pollIntervalRef.current) clearInterval(pollIntervalRef.current);
@@ -275,8 +276,8 @@ export default function UserGamePlay() {
     const callName = getCallName(number);
     
     try {
-      // Try server-side TTS with Howler.js (most reliable for mobile)
-      const played = await playTTSWithHowler(callName);
+      // Play from the preloaded sprite, else server-side TTS with Howler.js (most reliable for mobile)
+      const played = await playCallFromSprite(number) || await playTTSWithHowler(callName);
       
       // Fallback to browser TTS if server TTS fails
       if (!played) {
@@ -289,15 +290,27 @@ export default function UserGamePlay() {
     }
   };
 
+  // Download all 90 calls in one sprite up front; per-call TTS is only a fallback
+  const loadCallAudio = async () => {
+    try {
+      const response = await axios.get(`${API}/tts/sprite`);
+      if (response.data.available) {
+        await loadCallSprite(`${BACKEND_URL}${response.data.url}`, response.data.sprite);
+      }
+    } catch (e) {
+      console.log('Call sprite unavailable:', e);
+    }
+  };
+
   // Server-side TTS with Howler.js - works on iOS/Android
   const playTTSWithHowler = async (text) => {
     try {
       const response = await axios.post(`${API}/tts/generate?text=${encodeURIComponent(text)}&include_prefix=false`);
       const data = response.data;
       
-      if (data.audio) {
+      if (data.audio_url) {
         // Use Howler.js via our utility
-        return await playBase64Audio(data.audio);
+        return await playAudioUrl(`${BACKEND_URL}${data.audio_url}`);
       }
       
       // If server returns use_browser_tts, use browser TTS
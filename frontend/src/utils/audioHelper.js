@@ -7,6 +7,9 @@ Howler.autoUnlock = true;
 
 // Store for playing sounds
 let currentSound = null;
+let callSprite = null;
+let callSpriteUrl = null;
+let callSpriteMap = {};
 let isUnlocked = false;
 let audioContext = null;
 
@@ -128,11 +131,29 @@ export const resetAudioUnlock = () => {
 
 /**
  * Play audio from base64 data
- * Updated for iOS 16+ with better error handling
  * @param {string} base64Audio - Base64 encoded MP3 audio
  * @returns {Promise<boolean>} - Whether playback succeeded
  */
 export const playBase64Audio = async (base64Audio) => {
+  const audioSrc = base64Audio.startsWith('data:') 
+    ? base64Audio 
+    : `data:audio/mpeg;base64,${base64Audio}`;
+  return playAudioSource(audioSrc);
+};
+
+/**
+ * Play an MP3 served by the backend (e.g. /api/tts/audio/<key>.mp3).
+ * The browser caches these URLs, so repeated calls need no download.
+ * @param {string} url - Audio URL
+ * @returns {Promise<boolean>} - Whether playback succeeded
+ */
+export const playAudioUrl = async (url) => playAudioSource(url);
+
+/**
+ * Play an MP3 source (data: URI or URL) with Howler
+ * Updated for iOS 16+ with better error handling
+ */
+const playAudioSource = async (audioSrc) => {
   try {
     // Ensure AudioContext is resumed before playing
     await resumeAudioContext();
@@ -146,10 +167,6 @@ export const playBase64Audio = async (base64Audio) => {
       currentSound.unload();
     }
 
-    const audioSrc = base64Audio.startsWith('data:') 
-      ? base64Audio 
-      : `data:audio/mpeg;base64,${base64Audio}`;
-
     return new Promise((resolve) => {
       currentSound = new Howl({
         src: [audioSrc],
@@ -195,7 +212,68 @@ export const playBase64Audio = async (base64Audio) => {
       setTimeout(() => resolve(true), 10000);
     });
   } catch (e) {
-    console.log('playBase64Audio error:', e);
+    console.log('playAudioSource error:', e);
+    return false;
+  }
+};
+
+/**
+ * Load the number-call sprite (all 90 calls in one mp3) from /api/tts/sprite
+ * so calls can be played without a request per number
+ * @param {string} url - Sprite audio URL
+ * @param {Object} sprite - { "<number>": [offsetMs, durationMs] }
+ * @returns {Promise<boolean>} - Whether the sprite loaded
+ */
+export const loadCallSprite = (url, sprite) => {
+  if (callSprite && callSpriteUrl === url) {
+    return Promise.resolve(callSprite.state() === 'loaded');
+  }
+  if (callSprite) {
+    callSprite.unload();
+  }
+  callSpriteUrl = url;
+  callSpriteMap = sprite;
+  return new Promise((resolve) => {
+    callSprite = new Howl({
+      src: [url],
+      sprite,
+      html5: true, // Critical for iOS Safari
+      format: ['mp3'],
+      preload: true,
+      onload: () => resolve(true),
+      onloaderror: (id, error) => {
+        console.log('Sprite load error:', error);
+        callSprite = null;
+        callSpriteUrl = null;
+        resolve(false);
+      }
+    });
+  });
+};
+
+/**
+ * Play one number call from the loaded sprite
+ * @param {number} number - Called number (1-90)
+ * @returns {Promise<boolean>} - Whether playback succeeded (false if no sprite is loaded)
+ */
+export const playCallFromSprite = async (number) => {
+  const sound = callSprite;
+  if (!sound || sound.state() !== 'loaded' || !callSpriteMap[String(number)]) return false;
+  try {
+    await resumeAudioContext();
+    if (currentSound) {
+      currentSound.stop();
+    }
+    sound.stop();
+    return await new Promise((resolve) => {
+      const id = sound.play(String(number));
+      sound.once('end', () => resolve(true), id);
+      sound.once('playerror', () => resolve(false), id);
+      // Timeout safety
+      setTimeout(() => resolve(true), 10000);
+    });
+  } catch (e) {
+    console.log('playCallFromSprite error:', e);
     return false;
   }
 };
@@ -279,6 +357,9 @@ export const stopAudio = () => {
   if (currentSound) {
     currentSound.stop();
   }
+  if (callSprite) {
+    callSprite.stop();
+  }
   if ('speechSynthesis' in window) {
     window.speechSynthesis.cancel();
   }
@@ -299,6 +380,9 @@ export default {
   isAudioUnlocked,
   resetAudioUnlock,
   playBase64Audio,
+  playAudioUrl,
+  loadCallSprite,
+  playCallFromSprite,
   speakText,
   stopAudio,
   getAudioState
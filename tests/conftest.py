@@ -0,0 +1,247 @@
+"""
+Shared fixtures for the backend unit tests.
+Puts backend/ on the import path, provides `memory_db` (an in-memory stand-in
+for the Motor database) and keeps wall-clock benchmarks out of the default run.
+"""
+
+import copy
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+BENCHMARK_ENV = "RUN_BENCHMARKS"
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", f"benchmark: wall-clock latency gate, runs only with {BENCHMARK_ENV}=1")
+
+
+def pytest_collection_modifyitems(config, items):
+    if os.environ.get(BENCHMARK_ENV):
+        return
+    skip = pytest.mark.skip(reason=f"benchmark; set {BENCHMARK_ENV}=1 to run")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
+# ============ IN-MEMORY MONGO ============
+
+def _get(doc, path):
+    for part in path.split("."):
+        if not isinstance(doc, dict) or part not in doc:
+            return None, False
+        doc = doc[part]
+    return doc, True
+
+
+def _set(doc, path, value):
+    *parents, leaf = path.split(".")
+    for part in parents:
+        doc = doc.setdefault(part, {})
+    doc[leaf] = value
+
+
+def _condition(value, present, op, arg):
+    if op == "$in":
+        return value in arg
+    if op == "$nin":
+        return value not in arg
+    if op == "$ne":
+        return value != arg
+    if op == "$exists":
+        return present == bool(arg)
+    if op == "$size":
+        return isinstance(value, list) and len(value) == arg
+    if op in ("$lt", "$lte", "$gt", "$gte"):
+        if value is None:
+            return False
+        return {"$lt": value < arg, "$lte": value <= arg, "$gt": value > arg, "$gte": value >= arg}[op]
+    raise NotImplementedError(op)
+
+
+def matches(doc, query):
+    """Equality, dotted paths, $or and the comparison operators the backend uses."""
+    for key, cond in query.items():
+        if key == "$or":
+            if not any(matches(doc, q) for q in cond):
+                return False
+            continue
+        value, present = _get(doc, key)
+        if isinstance(cond, dict) and cond and all(op.startswith("$") for op in cond):
+            if not all(_condition(value, present, op, arg) for op, arg in cond.items()):
+                return False
+        elif value != cond:
+            return False
+    return True
+
+
+def project(doc, projection):
+    doc = copy.deepcopy(doc)
+    if not projection:
+        return doc
+    shown = [k for k, v in projection.items() if v and k != "_id"]
+    if shown:
+        return {k: doc[k] for k in shown if k in doc}
+    return {k: v for k, v in doc.items() if projection.get(k, 1)}
+
+
+def apply_update(doc, update, inserting=False):
+    for path, value in update.get("$set", {}).items():
+        _set(doc, path, copy.deepcopy(value))
+    if inserting:
+        for path, value in update.get("$setOnInsert", {}).items():
+            _set(doc, path, copy.deepcopy(value))
+    for path, inc in update.get("$inc", {}).items():
+        _set(doc, path, (_get(doc, path)[0] or 0) + inc)
+    for path, value in update.get("$push", {}).items():
+        _set(doc, path, (_get(doc, path)[0] or []) + [value])
+    for path in update.get("$unset", {}):
+        *parents, leaf = path.split(".")
+        parent = _get(doc, ".".join(parents))[0] if parents else doc
+        if isinstance(parent, dict):
+            parent.pop(leaf, None)
+
+
+class _Result:
+    def __init__(self, matched=0, modified=0, upserted_id=None):
+        self.matched_count = matched
+        self.modified_count = modified
+        self.upserted_id = upserted_id
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, key, direction=1):
+        self.docs.sort(key=lambda d: (_get(d, key)[0] is None, _get(d, key)[0]), reverse=direction < 0)
+        return self
+
+    def limit(self, count):
+        self.docs = self.docs[:count] if count else self.docs
+        return self
+
+    async def to_list(self, length):
+        return self.docs[:length] if length else self.docs
+
+
+class MemoryCollection:
+    """
+    Just enough of a Motor collection for the unit tests. Records reads,
+    updates and bulk writes; set fail_with to an exception to make writes fail.
+    """
+
+    def __init__(self, docs=()):
+        self.docs = [dict(d) for d in docs]
+        self.reads = []          # (query, projection)
+        self.updates = []        # (query, update)
+        self.bulk_writes = []    # list of operations per call
+        self.fail_with = None
+
+    def _fail(self):
+        if self.fail_with is not None:
+            raise self.fail_with
+
+    def _update(self, query, update, many=False, upsert=False):
+        self._fail()
+        self.updates.append((query, update))
+        matched = [d for d in self.docs if matches(d, query)]
+        if not many:
+            matched = matched[:1]
+        for doc in matched:
+            apply_update(doc, update)
+        if not matched and upsert:
+            doc = {k: v for k, v in query.items() if not k.startswith("$") and not isinstance(v, dict)}
+            apply_update(doc, update, inserting=True)
+            self.docs.append(doc)
+            return _Result(upserted_id=len(self.docs))
+        return _Result(len(matched), len(matched))
+
+    async def insert_one(self, doc):
+        self._fail()
+        self.docs.append(copy.deepcopy(doc))
+
+    async def insert_many(self, docs, ordered=True):
+        self._fail()
+        self.docs.extend(copy.deepcopy(d) for d in docs)
+
+    async def find_one(self, query, projection=None):
+        self.reads.append((query, projection))
+        return next((project(d, projection) for d in self.docs if matches(d, query)), None)
+
+    def find(self, query=None, projection=None):
+        query = query or {}
+        self.reads.append((query, projection))
+        return _Cursor([project(d, projection) for d in self.docs if matches(d, query)])
+
+    async def count_documents(self, query):
+        return sum(1 for d in self.docs if matches(d, query))
+
+    async def update_one(self, query, update, upsert=False):
+        return self._update(query, update, upsert=upsert)
+
+    async def update_many(self, query, update, upsert=False):
+        return self._update(query, update, many=True, upsert=upsert)
+
+    async def find_one_and_update(self, query, update, projection=None, upsert=False,
+                                  return_document=False, sort=None):
+        candidates = [d for d in self.docs if matches(d, query)]
+        if sort:
+            for key, direction in reversed(sort):
+                candidates.sort(key=lambda d: _get(d, key)[0], reverse=direction < 0)
+        before = copy.deepcopy(candidates[0]) if candidates else None
+        if candidates:
+            self._fail()
+            self.updates.append((query, update))
+            apply_update(candidates[0], update)
+            after = candidates[0]
+        elif upsert:
+            self._update(query, update, upsert=True)
+            after = self.docs[-1]
+        else:
+            return None
+        result = after if return_document else before
+        return project(result, projection) if result is not None else None
+
+    async def bulk_write(self, operations, ordered=True):
+        self._fail()
+        self.bulk_writes.append(list(operations))
+        matched = modified = 0
+        for op in operations:
+            result = self._update(op._filter, op._doc, upsert=getattr(op, "_upsert", False) or False)
+            matched += result.matched_count
+            modified += result.modified_count
+        return _Result(matched, modified)
+
+    async def delete_many(self, query):
+        before = len(self.docs)
+        self.docs = [d for d in self.docs if not matches(d, query)]
+        return type("DeleteResult", (), {"deleted_count": before - len(self.docs)})()
+
+
+class MemoryDB:
+    """Collections are created on first access, as attributes or items."""
+
+    def __init__(self):
+        self._collections = {}
+
+    def __getitem__(self, name):
+        return self._collections.setdefault(name, MemoryCollection())
+
+    def __setitem__(self, name, collection):
+        self._collections[name] = collection
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+
+@pytest.fixture
+def memory_db():
+    return MemoryDB()
@@ -0,0 +1,47 @@
+"""
+Tests for vectorized multi-game detection (batch_detection.py)
+"""
+
+from batch_detection import evaluate_games
+from ticket_generator import encode_ticket_compact, generate_unique_full_sheets, get_ticket_grid
+from winner_detection import (
+    check_early_five, check_top_line, check_middle_line,
+    check_bottom_line, check_four_corners, check_full_house
+)
+
+
+class TestBatchDetection:
+    """Several games evaluated in one vectorized pass"""
+    
+    def test_matches_per_ticket_checks(self):
+        """Batched results agree with the check_* functions for every game"""
+        import random
+        checks = {
+            "early_five": check_early_five, "four_corners": check_four_corners,
+            "top_line": check_top_line, "middle_line": check_middle_line,
+            "bottom_line": check_bottom_line, "full_house": check_full_house,
+        }
+        rng = random.Random(11)
+        games = []
+        for g in range(5):
+            tickets = [{"numbers": t} for sheet in generate_unique_full_sheets(3) for t in sheet]
+            packed = [{"numbers_packed": encode_ticket_compact(t["numbers"])} for t in tickets[:6]]
+            games.append((f"game{g}", packed + tickets, rng.sample(range(1, 91), rng.randint(5, 85))))
+        
+        results = evaluate_games(games)
+        for game_key, tickets, called in games:
+            called_set = set(called)
+            for pattern, check in checks.items():
+                expected = [i for i, t in enumerate(tickets) if check(get_ticket_grid(t), called_set)]
+                assert results[game_key]["completed"][pattern] == expected, (game_key, pattern)
+            expected_marks = [sum(1 for row in get_ticket_grid(t) for n in row if n in called_set) for t in tickets]
+            assert results[game_key]["marks"] == expected_marks
+        print(f"✓ {len(games)} games evaluated in one pass")
+    
+    def test_empty_and_malformed_tickets(self):
+        """Games without tickets and tickets without grids complete nothing"""
+        results = evaluate_games([("empty", [], [1, 2, 3]), ("bad", [{"numbers": []}, {}], list(range(1, 91)))])
+        assert all(not v for v in results["empty"]["completed"].values())
+        assert all(not v for v in results["bad"]["completed"].values())
+        assert results["bad"]["marks"] == [0, 0]
+        print("✓ Empty and malformed tickets handled")
@@ -0,0 +1,68 @@
+"""
+Tests for coalesced per-call game writes (call_commit.py)
+"""
+
+import asyncio
+
+from call_commit import CallCommit, get_call_write_stats, record_call_writes, reset_call_write_stats
+
+
+class TestCallCommit:
+    """One update per call for number, winners and status"""
+    
+    def test_single_update_with_winner_keys(self):
+        """Call, new winners and status end up in one update with per-prize keys"""
+        commit = CallCommit("session_id", "s1", {"Top Line": {"ticket_id": "t1"}})
+        commit.call(42, [7, 42], "2026-01-01T00:00:00+00:00")
+        commit.add_winners({"Early Five": {"ticket_id": "t2"}})
+        commit.set(status="completed")
+        update = commit.update()
+        assert set(update) == {"$set", "$push"} and update["$push"] == {"called_numbers": 42}
+        assert update["$set"]["current_number"] == 42 and "called_numbers" not in update["$set"]
+        assert update["$set"]["winners.Early Five"] == {"ticket_id": "t2"}
+        assert "winners" not in update["$set"]
+        assert update["$set"]["status"] == "completed"
+        assert set(commit.all_winners) == {"Top Line", "Early Five"}
+        assert commit.operation()._filter == {"session_id": "s1", "called_numbers": {"$size": 1}}
+        print("✓ Single coalesced update")
+    
+    def test_unsafe_prize_name_sets_whole_dict(self):
+        """Prize names that cannot be field paths fall back to the full winners dict"""
+        commit = CallCommit("user_game_id", "g1", {"Top Line": {}})
+        commit.add_winners({"Rs. 500 Jaldi": {"ticket_id": "t3"}})
+        assert commit.update()["$set"] == {"winners": {"Top Line": {}, "Rs. 500 Jaldi": {"ticket_id": "t3"}}}
+        assert CallCommit("user_game_id", "g1").update() == {}
+        assert CallCommit("user_game_id", "g1").operation() is None
+        print("✓ Unsafe prize names handled")
+    
+    def test_racing_calls_do_not_drop_numbers(self, memory_db):
+        """Two calls drawn from the same document: the second matches nothing"""
+        memory_db.game_sessions.docs = [{"game_id": "g1", "called_numbers": [7], "winners": {}}]
+        first, second = CallCommit("game_id", "g1"), CallCommit("game_id", "g1")
+        first.call(42, [7, 42])
+        second.call(55, [7, 55])
+        second.add_winners({"Top Line": {"ticket_id": "t1"}})
+        
+        async def write(commit):
+            return (await memory_db.game_sessions.update_one(commit.filter(), commit.update())).matched_count
+        
+        assert asyncio.run(write(first)) == 1 and asyncio.run(write(second)) == 0
+        session = memory_db.game_sessions.docs[0]
+        assert session["called_numbers"] == [7, 42] and session["winners"] == {}
+        assert first.applied_in(session["called_numbers"]) and not second.applied_in(session["called_numbers"])
+        
+        # The first call of a document that has no array yet
+        memory_db.game_sessions.docs.append({"game_id": "g2"})
+        fresh = CallCommit("game_id", "g2")
+        fresh.call(9, [9])
+        assert asyncio.run(write(fresh)) == 1 and memory_db.game_sessions.docs[1]["called_numbers"] == [9]
+        print("✓ Racing calls keep both numbers consistent")
+    
+    def test_write_metrics(self):
+        """Write counts per call are aggregated"""
+        reset_call_write_stats()
+        for writes in (1, 1, 2):
+            record_call_writes(writes)
+        stats = get_call_write_stats()
+        assert stats == {"calls": 3, "writes": 4, "max_writes": 2, "writes_per_call": 1.333}
+        print(f"✓ Write metrics: {stats}")
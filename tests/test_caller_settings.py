@@ -0,0 +1,48 @@
+"""
+Tests for the process-local caller settings cache (caller_settings.py)
+"""
+
+import asyncio
+
+from caller_settings import CallerSettingsCache
+
+
+class TestCallerSettingsCache:
+    """Caller settings are served from memory and invalidated across workers by version"""
+    
+    DEFAULTS = {"voice": "nova", "speed": 1.0, "prefix_lines": ["Ready?"], "enabled": True}
+    
+    def _workers(self, db, check_interval):
+        return db, CallerSettingsCache(db, self.DEFAULTS, check_interval), CallerSettingsCache(db, self.DEFAULTS, check_interval)
+    
+    def test_reads_hit_memory(self, memory_db):
+        db, cache, _ = self._workers(memory_db, check_interval=60)
+        
+        async def scenario():
+            first = await cache.get()
+            first["prefix_lines"].append("mutated by caller")
+            for _ in range(10):
+                settings = await cache.get()
+            return settings
+        
+        settings = asyncio.run(scenario())
+        assert settings["voice"] == "nova" and settings["prefix_lines"] == ["Ready?"]
+        assert len(db.caller_settings.reads) == 1 and cache.stats["hits"] == 10
+        print("✓ Settings read from the database once")
+    
+    def test_writes_are_seen_by_other_workers(self, memory_db):
+        db, writer, reader = self._workers(memory_db, check_interval=0)
+        
+        async def scenario():
+            await reader.get()
+            updated = await writer.update({"$set": {"voice": "onyx"}})
+            await writer.update({"$push": {"prefix_lines": "Housie!"}})
+            return updated, await writer.get(), await reader.get(), await reader.get()
+        
+        updated, written, seen, again = asyncio.run(scenario())
+        assert updated["voice"] == "onyx" and updated["settings_version"] == 1
+        assert written["prefix_lines"] == ["Ready?", "Housie!"] and written["settings_version"] == 2
+        assert seen == written and again == written
+        # Unchanged version: only the stamp is re-read, not the whole document
+        assert reader.stats["loads"] == 2 and reader.stats["version_checks"] == 2
+        print("✓ Version stamp invalidates other workers' copies")
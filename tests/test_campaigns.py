@@ -0,0 +1,123 @@
+"""
+Tests for resumable bulk campaigns (campaigns.py)
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from campaigns import CampaignRunner, create_campaign, campaign_progress, retry_failed_recipients
+
+
+class TestCampaigns:
+    """Bulk campaigns send each recipient at most once, even across restarts"""
+    
+    class _Transport:
+        def __init__(self, fail_for=()):
+            self.sent = []
+            self.fail_for = set(fail_for)
+        
+        async def send_whatsapp(self, phone, message):
+            self.sent.append(phone)
+            return (False, "Twilio 500") if phone in self.fail_for else (True, f"SM{len(self.sent)}")
+    
+    def _recipients(self, count):
+        return [{"booking_id": f"b{i}", "user_id": f"u{i}", "name": f"P{i}", "ticket_count": 2,
+                 "phone": f"+91{i:04d}" if i % 10 else None} for i in range(count)]
+    
+    def test_campaign_sends_in_chunks_and_logs_everyone(self, memory_db):
+        db = memory_db
+        transport = self._Transport(fail_for={"+910003"})
+        
+        async def run():
+            campaign = await create_campaign(db, "g1", "game_reminder", "game_reminder_v1",
+                                             lambda r: f"Hi {r['name']}, {r['ticket_count']} tickets", self._recipients(25))
+            return await CampaignRunner(db, transport, window=4, chunk_size=7).run(campaign["campaign_id"])
+        
+        campaign = asyncio.run(run())
+        assert campaign["status"] == "completed"
+        assert (campaign["total"], campaign["skipped"], campaign["sent"], campaign["failed"]) == (25, 3, 21, 1)
+        assert len(transport.sent) == 22 and len(set(transport.sent)) == 22
+        assert len(db.whatsapp_logs.docs) == 22
+        assert db.whatsapp_logs.docs[0]["message_type"] == "game_reminder"
+        assert campaign_progress(campaign)["remaining"] == 0
+        print("✓ Campaign sent in chunks with batched logs")
+    
+    def test_resume_skips_sent_and_in_flight_recipients(self, memory_db):
+        db = memory_db
+        
+        async def setup():
+            return await create_campaign(db, "g1", "game_reminder", "game_reminder_v1",
+                                         lambda r: "Reminder", self._recipients(10))
+        campaign = asyncio.run(setup())
+        
+        # A previous run delivered b1, and stopped while b2 was in flight
+        for doc in db.campaign_recipients.docs:
+            if doc["booking_id"] == "b1":
+                doc["status"] = "sent"
+            elif doc["booking_id"] == "b2":
+                doc["status"] = "sending"
+        db.campaigns.docs[0]["sent"] = 1
+        
+        transport = self._Transport()
+        campaign = asyncio.run(CampaignRunner(db, transport, window=2).run(campaign["campaign_id"]))
+        assert "+910001" not in transport.sent and "+910002" not in transport.sent
+        assert len(transport.sent) == 7
+        assert (campaign["sent"], campaign["unknown"], campaign["skipped"]) == (8, 1, 1)
+        print("✓ Resumed campaign does not resend")
+    
+    def test_concurrent_runs_send_each_recipient_once(self, memory_db):
+        """Two workers resuming the same campaign: the lease lets only one send"""
+        db = memory_db
+        first, second = self._Transport(), self._Transport()
+        
+        async def run():
+            campaign = await create_campaign(db, "g1", "game_reminder", "game_reminder_v1",
+                                             lambda r: "Reminder", self._recipients(30))
+            return await asyncio.gather(
+                CampaignRunner(db, first, window=3, chunk_size=5).run(campaign["campaign_id"]),
+                CampaignRunner(db, second, window=3, chunk_size=5).run(campaign["campaign_id"]),
+            )
+        
+        asyncio.run(run())
+        assert sorted(first.sent + second.sent) == sorted(set(first.sent + second.sent))
+        assert len(first.sent + second.sent) == 27 and not (first.sent and second.sent)
+        campaign = db.campaigns.docs[0]
+        assert campaign["status"] == "completed" and campaign["sent"] == 27 and "lease_owner" not in campaign
+        print("✓ Concurrent runs do not double-send")
+    
+    def test_expired_lease_is_taken_over(self, memory_db):
+        """A live lease blocks other runs; once it expires another run finishes the campaign"""
+        db = memory_db
+        campaign = asyncio.run(create_campaign(db, "g1", "game_reminder", "game_reminder_v1",
+                                               lambda r: "Reminder", self._recipients(5)))
+        db.campaigns.docs[0].update(lease_owner="run_dead",
+                                    lease_until=datetime.now(timezone.utc) + timedelta(seconds=60))
+        
+        transport = self._Transport()
+        assert asyncio.run(CampaignRunner(db, transport).run(campaign["campaign_id"]))["status"] == "running"
+        assert transport.sent == []
+        
+        db.campaigns.docs[0]["lease_until"] = datetime.now(timezone.utc) - timedelta(seconds=1)
+        assert asyncio.run(CampaignRunner(db, transport).run(campaign["campaign_id"]))["status"] == "completed"
+        assert len(transport.sent) == 4
+        print("✓ Expired lease taken over")
+    
+    def test_failed_recipients_can_be_retried(self, memory_db):
+        """Failed sends stay failed until retried, then only they are sent again"""
+        db = memory_db
+        
+        async def run(transport):
+            return await CampaignRunner(db, transport).run(db.campaigns.docs[0]["campaign_id"])
+        
+        asyncio.run(create_campaign(db, "g1", "game_reminder", "game_reminder_v1",
+                                    lambda r: "Reminder", self._recipients(5)))
+        assert asyncio.run(run(self._Transport(fail_for={"+910003"})))["failed"] == 1
+        
+        retry = self._Transport()
+        assert asyncio.run(run(retry))["status"] == "completed" and retry.sent == []
+        assert asyncio.run(retry_failed_recipients(db, db.campaigns.docs[0]["campaign_id"])) == 1
+        campaign = asyncio.run(run(retry))
+        assert retry.sent == ["+910003"]
+        assert (campaign["sent"], campaign["failed"], campaign["retried"]) == (4, 0, 1)
+        assert campaign_progress(campaign)["remaining"] == 0
+        print("✓ Failed recipients retried on request")
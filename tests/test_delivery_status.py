@@ -0,0 +1,60 @@
+"""
+Tests for batched Twilio delivery-status callbacks (delivery_status.py)
+"""
+
+import asyncio
+
+from delivery_status import DeliveryStatusQueue, validate_twilio_signature
+
+
+class TestDeliveryStatus:
+    """Twilio status callbacks are validated, coalesced per SID and applied in batches"""
+    
+    def test_signature_matches_twilio(self):
+        from twilio.request_validator import RequestValidator
+        url = "https://example.com/api/webhooks/twilio/status"
+        params = {"MessageSid": "SM123", "MessageStatus": "delivered", "To": "whatsapp:+911234"}
+        signature = RequestValidator("token").compute_signature(url, params)
+        assert validate_twilio_signature("token", url, params, signature)
+        assert not validate_twilio_signature("token", url, {**params, "MessageStatus": "read"}, signature)
+        assert not validate_twilio_signature("other", url, params, signature)
+        print("✓ Twilio signature validation")
+    
+    def test_callbacks_coalesce_to_latest_state(self, memory_db):
+        db = memory_db
+        db.whatsapp_logs.docs = [{"message_sid": "SM1"}, {"message_sid": "SM2"}]
+        queue = DeliveryStatusQueue(db, batch_size=1000)
+        for sid, status in [("SM1", "sent"), ("SM1", "delivered"), ("SM1", "sent"), ("SM2", "failed"),
+                            ("SM3", "bogus"), ("", "sent")]:
+            assert queue.enqueue(sid, status)
+        assert {sid: u["status"] for sid, u in queue.pending.items()} == {"SM1": "delivered", "SM2": "failed"}
+        
+        asyncio.run(queue.flush())
+        (batch,) = db.whatsapp_logs.bulk_writes
+        assert len(batch) == 2 and batch[0]._doc["$set"]["delivery_status"] == "delivered"
+        assert queue.pending == {} and queue.stats["applied"] == 2
+        print("✓ Callbacks coalesced and applied in one bulk_write")
+    
+    def test_unknown_sids_are_retried_then_dropped(self, memory_db):
+        db = memory_db
+        queue = DeliveryStatusQueue(db)
+        queue.enqueue("SM9", "delivered")
+        asyncio.run(queue.flush())
+        assert "SM9" in queue.pending
+        
+        db.whatsapp_logs.docs.append({"message_sid": "SM9"})
+        asyncio.run(queue.flush())
+        assert queue.pending == {} and queue.stats["applied"] == 1
+        
+        db.whatsapp_logs.docs.clear()
+        queue.enqueue("SM8", "sent")
+        for _ in range(3):
+            asyncio.run(queue.flush())
+        assert queue.pending == {}
+        print("✓ Callbacks for SIDs not logged yet are retried")
+    
+    def test_full_queue_rejects_new_sids(self):
+        queue = DeliveryStatusQueue(None, max_pending=1)
+        assert queue.enqueue("SM1", "sent") and queue.enqueue("SM1", "delivered")
+        assert not queue.enqueue("SM2", "sent")
+        print("✓ Full queue asks Twilio to retry")
@@ -0,0 +1,138 @@
+"""
+Tests for the shared winner detection service (detection_service.py)
+"""
+
+from batch_detection import evaluate_games
+from detection_service import ADMIN_GAME_RULES, USER_GAME_RULES, award_prizes, detect_winners
+from detection_state import DetectionState, PlayerCache
+from prize_plan import compile_prize_plan
+from ticket_generator import generate_full_sheet
+
+
+class TestDetectionServiceParity:
+    """Admin and user games go through one service; today's outcomes are pinned"""
+    
+    PRIZES = {"Quick Five": 1, "Top Line": 1, "Middle Line": 1, "Bottom Line": 1, "Four Corners": 1,
+              "1st Full House": 1, "2nd Full House": 1, "3rd Full House": 1}
+    
+    def _sheet_tickets(self, holder="Asha", user_id="u1", sheet_id="FS001", start=1):
+        tickets = []
+        for position, grid in enumerate(generate_full_sheet(), 1):
+            tickets.append({
+                "ticket_id": f"{sheet_id}-{position}", "ticket_number": f"T{start + position - 1:03d}",
+                "numbers": grid, "user_id": user_id, "holder_name": holder, "assigned_to": holder,
+                "full_sheet_id": sheet_id, "ticket_position_in_sheet": position,
+            })
+        return tickets
+    
+    def _award(self, rules, tickets, called, prizes=None, winners=None):
+        plan = compile_prize_plan(prizes if prizes is not None else self.PRIZES)
+        result = evaluate_games([("g", tickets, called)])["g"]
+        return award_prizes(plan, rules, tickets, result, called, winners or {})
+    
+    def test_first_completing_ticket_takes_single_prizes(self):
+        """Line prizes go to the first completing ticket in ticket order"""
+        tickets = self._sheet_tickets()
+        called = [n for n in tickets[0]["numbers"][0] if n] + [n for n in tickets[3]["numbers"][0] if n]
+        for rules in (ADMIN_GAME_RULES, USER_GAME_RULES):
+            winners = self._award(rules, tickets, called)
+            assert winners["Top Line"]["ticket_id"] == "FS001-1"
+            assert winners["Quick Five"]["ticket_id"] == "FS001-1"
+            assert "Middle Line" not in winners
+        print("✓ First completing ticket wins in both game types")
+    
+    def test_full_house_shared_for_admin_sequential_for_user(self):
+        """Same-call full houses: admin games share one prize, user games hand out the next ones"""
+        tickets = self._sheet_tickets()
+        called = list(range(1, 91))
+        admin = self._award(ADMIN_GAME_RULES, tickets, called)
+        assert admin["1st Full House"]["shared"] and len(admin["1st Full House"]["winners"]) == 6
+        assert "2nd Full House" not in admin
+        
+        user = self._award(USER_GAME_RULES, tickets, called)
+        assert [user[p]["ticket_id"] for p in ("1st Full House", "2nd Full House", "3rd Full House")] == \
+            ["FS001-1", "FS001-2", "FS001-3"]
+        
+        # Earlier full house winners cannot win again
+        user = self._award(USER_GAME_RULES, tickets, called, winners={"1st Full House": {"ticket_id": "FS001-1"}})
+        assert user["2nd Full House"]["ticket_id"] == "FS001-2"
+        print("✓ Full house sharing rules per game type")
+    
+    def test_full_sheet_bonus_rules_differ(self):
+        """Admin FSB: >=1 mark per ticket, always checked; user FSB: >=2 marks, only when offered"""
+        tickets = self._sheet_tickets()
+        one_each = [next(n for row in t["numbers"] for n in row if n) for t in tickets]
+        prizes = {**self.PRIZES, "Full Sheet Bonus": 1}
+        
+        assert self._award(ADMIN_GAME_RULES, tickets, one_each)["Full Sheet Bonus"]["full_sheet_id"] == "FS001"
+        assert "Full Sheet Bonus" in self._award(ADMIN_GAME_RULES, tickets, one_each, prizes=self.PRIZES)
+        assert "Full Sheet Bonus" not in self._award(USER_GAME_RULES, tickets, one_each, prizes=prizes)
+        
+        two_each = [n for t in tickets for n in [x for row in t["numbers"] for x in row if x][:2]]
+        assert self._award(USER_GAME_RULES, tickets, two_each, prizes=prizes)["Full Sheet Bonus"]["holder_name"] == "Asha"
+        assert "Full Sheet Bonus" not in self._award(USER_GAME_RULES, tickets, two_each)
+        
+        # A sheet split between two holders never qualifies
+        split = [dict(t, user_id="u2", holder_name="Ravi", assigned_to="Ravi") if t["ticket_position_in_sheet"] > 3 else t
+                 for t in tickets]
+        assert "Full Sheet Bonus" not in self._award(ADMIN_GAME_RULES, split, two_each)
+        assert "Full Sheet Bonus" not in self._award(USER_GAME_RULES, split, two_each, prizes=prizes)
+        print("✓ Full Sheet Bonus rules per game type")
+    
+    def test_aliased_prize_names_award_once(self):
+        """Two names for one pattern: only the plan's first alias is awarded"""
+        tickets = self._sheet_tickets()
+        prizes = {"Quick Five": 1, "Early Five": 1, "Top Line": 1, "First Line": 1, "1st Full House": 1}
+        plan = compile_prize_plan(prizes)
+        state = DetectionState("g", tickets, plan["custom_patterns"], PlayerCache("g"))
+        called = [n for n in tickets[0]["numbers"][0] if n]
+        state.sync(called)
+        for game in ({"tickets": tickets}, {"state": state}):
+            winners = detect_winners([{"key": "g", "plan": plan, "rules": ADMIN_GAME_RULES, "called_numbers": called,
+                                       "existing_winners": {}, **game}])["g"]
+            assert set(winners) == {"Quick Five", "Top Line"}
+            
+            # The alias is never paid out once the first name is won
+            later = detect_winners([{"key": "g", "plan": plan, "rules": ADMIN_GAME_RULES, "called_numbers": called,
+                                     "existing_winners": winners, **game}])["g"]
+            assert later == {}
+        print("✓ Aliased prizes awarded once")
+    
+    def test_won_prizes_are_not_awarded_again(self):
+        """Existing winners are respected and games are batched together"""
+        first = self._sheet_tickets()
+        second = self._sheet_tickets(holder="Ravi", user_id="u2", sheet_id="FS002", start=7)
+        called = list(range(1, 91))
+        results = detect_winners([
+            {"key": "a", "plan": compile_prize_plan(self.PRIZES), "rules": ADMIN_GAME_RULES, "tickets": first,
+             "called_numbers": called, "existing_winners": {"Top Line": {"ticket_id": "x"}}},
+            {"key": "u", "plan": compile_prize_plan(self.PRIZES), "rules": USER_GAME_RULES, "tickets": second,
+             "called_numbers": called, "existing_winners": {}},
+        ])
+        assert "Top Line" not in results["a"] and results["u"]["Top Line"]["ticket_id"] == "FS002-1"
+        print("✓ Batched games keep their own winners")
+    
+    def test_incremental_state_matches_batch(self):
+        """Admin prizes from a synced DetectionState match the batched pass call by call"""
+        import random
+        tickets = [t for i, (holder, user_id) in enumerate([("Asha", "u1"), ("Ravi", "u2"), ("Meena", "u3")])
+                   for t in self._sheet_tickets(holder, user_id, f"FS{i + 1:03d}", start=6 * i + 1)]
+        plan = compile_prize_plan({**self.PRIZES, "Full Sheet Bonus": 1})
+        state = DetectionState("g", tickets, plan["custom_patterns"], PlayerCache("g"))
+        without_times = lambda winners: {
+            name: {k: v for k, v in w.items() if k != "won_at"} for name, w in winners.items()
+        }
+        
+        winners = {}
+        calls = random.sample(range(1, 91), 90)
+        for i in range(5, 91):
+            called = calls[:i]
+            state.sync(called)
+            game = {"key": "g", "plan": plan, "rules": ADMIN_GAME_RULES, "called_numbers": called,
+                    "existing_winners": winners}
+            batched = detect_winners([{**game, "tickets": tickets}])["g"]
+            incremental = detect_winners([{**game, "state": state}])["g"]
+            assert without_times(incremental) == without_times(batched), f"call {i}"
+            winners.update(batched)
+        assert set(winners) == set(self.PRIZES) | {"Full Sheet Bonus"}
+        print("✓ Incremental state awards the same prizes as the batched pass")
@@ -0,0 +1,227 @@
+"""
+Tests for per-game incremental detection state (detection_state.py)
+"""
+
+import asyncio
+
+from detection_state import (
+    NEAR_WIN_PATTERNS, FullSheetBonusTracker, NearWinIndex, PlayerCache, drop_detection_state, ensure_detection_state,
+    get_detection_state, get_player_cache, load_detection_state, resolve_players, touch_bookings
+)
+from prize_plan import (
+    EARLY_FIVE, FOUR_CORNERS, TOP_LINE, MIDDLE_LINE, BOTTOM_LINE, FULL_HOUSE, compile_prize_plan
+)
+from ticket_generator import generate_authentic_ticket, generate_full_sheet
+from winner_detection import (
+    check_full_sheet_bonus, check_early_five, check_top_line, check_middle_line,
+    check_bottom_line, check_four_corners, check_full_house
+)
+
+
+class TestFullSheetBonusTracker:
+    """Tests for the incremental Full Sheet Bonus tracker"""
+    
+    @staticmethod
+    def _tracker_with_sheets(sheets):
+        tickets = []
+        for sheet_index, sheet in enumerate(sheets):
+            for position, grid in enumerate(sheet, start=1):
+                tickets.append(({
+                    "ticket_id": f"TKT_{len(tickets)}",
+                    "ticket_number": f"T{len(tickets) + 1:03d}",
+                    "user_id": f"user_{sheet_index}",
+                    "full_sheet_id": f"FS{sheet_index + 1:03d}",
+                    "ticket_position_in_sheet": position
+                }, grid))
+        tracker = FullSheetBonusTracker("game_test")
+        for ticket, grid in tickets:
+            tracker.add_ticket(ticket, grid, "Player")
+        return tracker
+    
+    def test_matches_full_recount(self):
+        """Eligibility after every call matches check_full_sheet_bonus()"""
+        import random
+        sheets = [generate_full_sheet() for _ in range(3)]
+        sheets[2] = sheets[2][:5]  # Incomplete sheet can never qualify
+        tracker = self._tracker_with_sheets(sheets)
+        
+        calls = random.sample(range(1, 91), 90)
+        for i, number in enumerate(calls, start=1):
+            tracker.mark(number)
+            called = set(calls[:i])
+            for summary in tracker.sheet_summaries():
+                sheet = sheets[int(summary["user_id"].split("_")[1])]
+                assert summary["fsb_eligible"] == check_full_sheet_bonus(sheet, called)
+        
+        assert {s["sheet_id"] for s in tracker.sheet_summaries()} == {"FS001", "FS002"}
+        assert tracker.first_eligible()["full_sheet_id"] in ("FS001", "FS002")
+        print("✓ Tracker matches full recount over 90 calls")
+    
+    def test_rebuild_replays_calls(self):
+        """A tracker rebuilt mid-game reaches the same state via sync()"""
+        import random
+        sheets = [generate_full_sheet() for _ in range(2)]
+        calls = random.sample(range(1, 91), 40)
+        
+        live = self._tracker_with_sheets(sheets)
+        for number in calls:
+            live.mark(number)
+        rebuilt = self._tracker_with_sheets(sheets)
+        rebuilt.sync(calls)
+        
+        assert rebuilt.sheet_summaries() == live.sheet_summaries()
+        assert rebuilt.first_eligible() == live.first_eligible()
+        print("✓ Rebuilt tracker matches live tracker")
+
+
+class TestNearWinIndex:
+    """Tests for the incremental one-away index"""
+    
+    PATTERN_CHECKS = {
+        EARLY_FIVE: check_early_five,
+        TOP_LINE: check_top_line,
+        MIDDLE_LINE: check_middle_line,
+        BOTTOM_LINE: check_bottom_line,
+        FOUR_CORNERS: check_four_corners,
+        FULL_HOUSE: check_full_house,
+    }
+    
+    def test_matches_brute_force(self):
+        """waiting[pattern][n] holds exactly the tickets that n would complete"""
+        import random
+        grids = {f"TKT_{i}": generate_authentic_ticket() for i in range(30)}
+        index = NearWinIndex("game_test")
+        for ticket_id, grid in grids.items():
+            index.add_ticket({"ticket_id": ticket_id, "user_id": f"user_{ticket_id}"}, grid, "Player")
+        
+        calls = random.sample(range(1, 91), 90)
+        for i, number in enumerate(calls):
+            called = set(calls[:i])
+            for pattern, check in self.PATTERN_CHECKS.items():
+                expected = {
+                    t for t, grid in grids.items()
+                    if not check(grid, called) and check(grid, called | {number})
+                }
+                assert index.waiting[pattern].get(number, set()) == expected, f"{pattern} at call {i + 1}"
+            completed = index.mark(number)
+            for pattern, tickets in completed.items():
+                assert all(self.PATTERN_CHECKS[pattern](grids[t], called | {number}) for t in tickets)
+        
+        assert all(not waiting for waiting in index.waiting.values())
+        assert index.completed[FULL_HOUSE] == set(grids)
+        print("✓ Near-win index matches brute force over 90 calls")
+    
+    def test_prize_plan_patterns_are_indexed(self):
+        """Every built-in prize pattern except the Full Sheet Bonus has an index entry"""
+        plan = compile_prize_plan({"1st Full House": 1, "Quick Five": 1, "top_line": 1, "Four Corners": 1,
+                                   "Full Sheet Bonus": 1})
+        indexed = {e["name"]: e["pattern"] for e in plan["prizes"] if e["pattern"] in NEAR_WIN_PATTERNS}
+        assert indexed == {"1st Full House": FULL_HOUSE, "Quick Five": EARLY_FIVE, "top_line": TOP_LINE,
+                           "Four Corners": FOUR_CORNERS}
+        print("✓ Prize plan patterns map to near-win patterns")
+
+
+class TestPlayerCache:
+    """Winner enrichment resolves players in one query per batch of unseen users"""
+    
+    def test_cache_lookups(self):
+        """Known, unknown and missing players"""
+        cache = PlayerCache("g1")
+        cache.add([{"user_id": "u1", "name": "Asha", "phone": "+911"}], requested=["u1", "u9"])
+        assert cache.name("u1") == "Asha" and cache.get("u1")["phone"] == "+911"
+        assert cache.name("u9") == "Player" and cache.get(None) == {}
+        assert cache.missing(["u1", "u9", "u2", None]) == ["u2"]
+        print("✓ Player cache lookups")
+    
+    def test_resolve_fetches_only_unseen_players_once(self, memory_db):
+        """One $in query for new players, none for players already cached"""
+        memory_db.users.docs = [{"user_id": f"u{i}", "name": f"P{i}"} for i in range(5)]
+        queried = lambda: [query["user_id"]["$in"] for query, _ in memory_db.users.reads]
+        drop_detection_state("g-cache")
+        
+        players = asyncio.run(resolve_players(memory_db, "g-cache", ["u0", "u1", "u1", None, "gone"]))
+        assert len(queried()) == 1 and sorted(queried()[0]) == ["gone", "u0", "u1"]
+        assert players.name("u1") == "P1" and players.name("gone") == "Player"
+        
+        asyncio.run(resolve_players(memory_db, "g-cache", ["u0", "gone"]))
+        assert len(queried()) == 1
+        asyncio.run(resolve_players(memory_db, "g-cache", ["u0", "u4"]))
+        assert queried()[-1] == ["u4"]
+        drop_detection_state("g-cache")
+        print("✓ Players resolved with batched queries")
+
+
+class TestDetectionState:
+    """A game's state is built once, advanced per call and rebuilt when bookings change"""
+    
+    @staticmethod
+    def _book(memory_db, game_id, count):
+        sheet = generate_full_sheet()
+        memory_db.tickets.docs = [{
+            "ticket_id": f"TKT_{i}", "ticket_number": f"T{i + 1:03d}", "game_id": game_id, "numbers": sheet[i % 6],
+            "user_id": "u1", "is_booked": i < count, "full_sheet_id": "FS001", "ticket_position_in_sheet": i + 1,
+        } for i in range(6)]
+        return sheet
+    
+    def test_built_once_then_synced(self, memory_db):
+        """Calls advance the cached state; a new booking rebuilds it"""
+        memory_db.users.docs = [{"user_id": "u1", "name": "Asha"}]
+        sheet = self._book(memory_db, "g-state", 5)
+        plan = compile_prize_plan({"Top Line": 1, "1st Full House": 1})
+        drop_detection_state("g-state")
+        
+        calls = [n for n in sheet[0][0] if n]
+        state = asyncio.run(ensure_detection_state(memory_db, "g-state", calls[:4], plan))
+        assert get_detection_state("g-state") is state and len(state.tickets) == 5
+        assert state.tickets[0]["holder_name"] == "Asha" and "numbers" not in state.tickets[0]
+        assert state.completed_positions(TOP_LINE) == []
+        
+        assert asyncio.run(ensure_detection_state(memory_db, "g-state", calls, plan)) is state
+        assert state.completed_positions(TOP_LINE) == [0]
+        
+        memory_db.tickets.docs[5]["is_booked"] = True
+        rebuilt = asyncio.run(ensure_detection_state(memory_db, "g-state", calls, plan))
+        assert rebuilt is not state and len(rebuilt.tickets) == 6
+        assert rebuilt.completed_positions(TOP_LINE) == [0]
+        drop_detection_state("g-state")
+        assert get_detection_state("g-state") is None
+        print("✓ Detection state cached, synced and rebuilt on booking changes")
+    
+    def test_booking_swap_with_same_count_rebuilds(self, memory_db):
+        """A cancelled and a new booking in another worker leave the count alone but bump the version"""
+        sheet = self._book(memory_db, "g-swap", 5)
+        memory_db.games.docs = [{"game_id": "g-swap", "prizes": {"Top Line": 1}}]
+        plan = compile_prize_plan({"Top Line": 1})
+        drop_detection_state("g-swap")
+        
+        calls = [n for n in sheet[0][0] if n]
+        state = asyncio.run(ensure_detection_state(memory_db, "g-swap", calls, plan))
+        assert state.completed_positions(TOP_LINE) == [0]
+        
+        # Another worker: TKT_0 cancelled, TKT_5 booked - still 5 booked tickets
+        memory_db.tickets.docs[0]["is_booked"] = False
+        memory_db.tickets.docs[5]["is_booked"] = True
+        assert asyncio.run(ensure_detection_state(memory_db, "g-swap", calls, plan)) is state
+        memory_db.games.docs[0]["bookings_version"] = 1
+        rebuilt = asyncio.run(ensure_detection_state(memory_db, "g-swap", calls, plan))
+        assert rebuilt is not state and "TKT_0" not in rebuilt.positions and "TKT_5" in rebuilt.positions
+        
+        # In the writing worker touch_bookings bumps the version and drops its own state
+        asyncio.run(touch_bookings(memory_db, "g-swap"))
+        assert memory_db.games.docs[0]["bookings_version"] == 2 and get_detection_state("g-swap") is None
+        drop_detection_state("g-swap")
+        print("✓ Booking changes with an unchanged count rebuild the state")
+    
+    def test_one_off_state_is_not_kept(self, memory_db):
+        """keep=False answers a read without registering the state or its players"""
+        memory_db.users.docs = [{"user_id": "u1", "name": "Asha"}]
+        sheet = self._book(memory_db, "g-once", 6)
+        plan = compile_prize_plan({"Top Line": 1})
+        drop_detection_state("g-once")
+        
+        calls = [n for n in sheet[0][0] if n]
+        state = asyncio.run(load_detection_state(memory_db, "g-once", calls, plan, keep=False))
+        assert state.completed_positions(TOP_LINE) == [0] and state.tickets[0]["holder_name"] == "Asha"
+        assert get_detection_state("g-once") is None and get_player_cache("g-once").players == {}
+        drop_detection_state("g-once")
+        print("✓ One-off detection state not kept")
@@ -0,0 +1,145 @@
+"""
+Tests for the buffered audit log writer (log_writer.py)
+"""
+
+import asyncio
+
+from pymongo.errors import BulkWriteError
+
+from log_writer import BufferedLogWriter
+
+
+class TestBufferedLogWriter:
+    """Audit logs are batched with insert_many and visible before they are flushed"""
+    
+    def test_flush_batches_and_buffered_reads(self, memory_db):
+        async def run():
+            db = memory_db
+            writer = BufferedLogWriter(db, max_batch=100, flush_interval=60)
+            for i in range(5):
+                await writer.write("game_control_logs", {"log_id": f"gcl_{i}", "action": "PAYMENT_CONFIRMED"})
+            await writer.write("whatsapp_logs", {"log_id": "wl_1", "booking_id": "b1", "status": "queued"})
+            
+            # Not written yet, but visible to lookups and updates
+            assert db["whatsapp_logs"].docs == []
+            assert (await writer.find_one("whatsapp_logs", {"booking_id": "b1"}))["log_id"] == "wl_1"
+            await writer.update_one("whatsapp_logs", {"log_id": "wl_1", "status": {"$ne": "sent"}},
+                                    {"$set": {"status": "sent"}, "$inc": {"sent_count": 1}})
+            
+            await writer.flush()
+            assert len(db["game_control_logs"].docs) == 5
+            assert db["whatsapp_logs"].docs[0]["status"] == "sent" and db["whatsapp_logs"].docs[0]["sent_count"] == 1
+            
+            # Once flushed, updates go to the database
+            await writer.update_one("whatsapp_logs", {"log_id": "wl_1"}, {"$set": {"delivery_status": "delivered"}})
+            assert db["whatsapp_logs"].docs[0]["delivery_status"] == "delivered"
+            return writer.get_stats()
+        
+        stats = asyncio.run(run())
+        assert stats["written"] == 6 and stats["flushes"] == 2 and stats["buffered"] == 0
+        print("✓ Buffered entries flushed in batches")
+    
+    def test_batch_visible_while_being_written(self, memory_db):
+        async def run():
+            db = memory_db
+            released = asyncio.Event()
+            insert_many = db["whatsapp_logs"].insert_many
+            
+            async def slow_insert_many(docs, ordered=True):
+                await released.wait()
+                await insert_many(docs, ordered)
+            db["whatsapp_logs"].insert_many = slow_insert_many
+            
+            writer = BufferedLogWriter(db, flush_interval=60)
+            await writer.write("whatsapp_logs", {"log_id": "wl_1", "booking_id": "b1"})
+            flush = asyncio.create_task(writer.flush())
+            await asyncio.sleep(0)
+            
+            # Out of the buffer but not in the database yet
+            assert writer.buffered == 0 and db["whatsapp_logs"].docs == []
+            assert (await writer.find_one("whatsapp_logs", {"booking_id": "b1"}))["log_id"] == "wl_1"
+            released.set()
+            await flush
+            assert writer.inflight == {}
+            assert (await writer.find_one("whatsapp_logs", {"booking_id": "b1"}))["log_id"] == "wl_1"
+        
+        asyncio.run(run())
+        print("✓ In-flight batch stays visible until insert_many returns")
+    
+    def test_backpressure_and_shutdown_flush(self, memory_db):
+        async def run():
+            db = memory_db
+            writer = BufferedLogWriter(db, max_batch=3, flush_interval=60, max_buffer=4)
+            await writer.start()
+            for i in range(10):
+                await writer.write("game_control_logs", {"log_id": f"gcl_{i}"})
+                assert writer.buffered <= 4
+            await writer.stop()
+            return db, writer.get_stats()
+        
+        db, stats = asyncio.run(run())
+        assert len(db["game_control_logs"].docs) == 10 and stats["buffered"] == 0
+        print("✓ Full buffer applies backpressure; stop() flushes")
+    
+    def test_failed_flush_keeps_entries(self, memory_db):
+        async def run():
+            db = memory_db
+            db["game_control_logs"].fail_with = ConnectionError("mongo down")
+            writer = BufferedLogWriter(db)
+            await writer.write("game_control_logs", {"log_id": "gcl_1"})
+            await writer.flush()
+            return writer
+        
+        writer = asyncio.run(run())
+        assert writer.buffered == 1 and writer.stats["errors"] == 1
+        print("✓ Failed flush keeps entries for the next attempt")
+    
+    class _PartialCollection:
+        """insert_many(ordered=False) the way Mongo reports a partly written batch"""
+        
+        def __init__(self, reject=()):
+            self.docs = []
+            self.reject = set(reject)   # log_ids rejected with a non-duplicate error
+            self.calls = 0
+        
+        async def insert_many(self, docs, ordered=True):
+            self.calls += 1
+            errors = []
+            for index, doc in enumerate(docs):
+                doc.setdefault("_id", f"oid_{doc['log_id']}")
+                if doc["log_id"] in self.reject:
+                    errors.append({"index": index, "code": 121, "errmsg": "Document failed validation"})
+                elif any(d["_id"] == doc["_id"] for d in self.docs):
+                    errors.append({"index": index, "code": 11000, "errmsg": "E11000 duplicate key"})
+                else:
+                    self.docs.append(dict(doc))
+            if errors:
+                raise BulkWriteError({"writeErrors": errors, "nInserted": len(docs) - len(errors)})
+    
+    def test_partial_failure_retries_only_rejected_entries(self, memory_db):
+        """Stored and duplicate entries leave the buffer; a permanently rejected one is dead-lettered"""
+        collection = self._PartialCollection(reject={"wl_2"})
+        memory_db["whatsapp_logs"] = collection
+        
+        async def run():
+            writer = BufferedLogWriter(memory_db, max_attempts=3)
+            for i in range(3):
+                await writer.write("whatsapp_logs", {"log_id": f"wl_{i}"})
+            await writer.flush()
+            assert writer.buffered == 1 and writer.stats["written"] == 2
+            
+            # A retry of an entry that is already stored counts as written
+            collection.reject.clear()
+            writer.buffers["whatsapp_logs"].append(dict(collection.docs[0]))
+            collection.reject.add("wl_2")
+            await writer.flush()
+            assert writer.buffered == 1 and writer.stats["written"] == 3
+            
+            await writer.flush()
+            return writer
+        
+        writer = asyncio.run(run())
+        assert writer.buffered == 0 and writer.stats["dead_lettered"] == 1
+        assert writer.dead_letters[0]["doc"]["log_id"] == "wl_2"
+        assert sorted(d["log_id"] for d in collection.docs) == ["wl_0", "wl_1"]
+        print("✓ Partly written batches retry only rejected entries")
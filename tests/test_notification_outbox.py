@@ -0,0 +1,70 @@
+"""
+Tests for the notification outbox (notification_outbox.py)
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+from notification_outbox import NotificationOutbox, TokenBucket, retry_delay
+
+
+class TestNotificationOutbox:
+    """Outbox delivery: backoff, rate limits and log updates"""
+    
+    class _Transport:
+        def __init__(self, ok):
+            self.ok = ok
+        
+        async def deliver(self, doc):
+            return (True, "SM1") if self.ok else (False, "Twilio 500")
+    
+    def _outbox(self, db, ok):
+        return NotificationOutbox(db, max_attempts=3, transport=self._Transport(ok)), db
+    
+    def _doc(self, attempts=0, **fields):
+        return {"outbox_id": "ob_1", "channel": "whatsapp", "provider": "twilio", "to": "+911",
+                "body": "hi", "payload": {}, "log_id": "wl_1", "attempts": attempts, **fields}
+    
+    def test_retry_delay_doubles_up_to_cap(self):
+        assert [retry_delay(n) for n in (1, 2, 3, 4)] == [2.0, 4.0, 8.0, 16.0]
+        assert retry_delay(30) == 300.0
+        print("✓ Exponential retry delay")
+    
+    def test_token_bucket_paces_bursts(self):
+        """A burst beyond the bucket waits for tokens to refill"""
+        async def run():
+            bucket = TokenBucket(rate=50, burst=2)
+            started = time.perf_counter()
+            for _ in range(4):
+                await bucket.acquire()
+            return time.perf_counter() - started
+        assert asyncio.run(run()) >= 0.035
+        print("✓ Token bucket rate limit")
+    
+    def test_failed_delivery_is_retried_then_failed(self, memory_db):
+        outbox, db = self._outbox(memory_db, ok=False)
+        
+        asyncio.run(outbox.process(self._doc(attempts=0)))
+        _, update = db.notification_outbox.updates[-1]
+        assert update["$set"]["status"] == "queued" and update["$set"]["attempts"] == 1
+        assert not db.whatsapp_logs.updates
+        
+        asyncio.run(outbox.process(self._doc(attempts=2)))
+        _, update = db.notification_outbox.updates[-1]
+        assert update["$set"]["status"] == "failed" and update["$set"]["last_error"] == "Twilio 500"
+        assert db.whatsapp_logs.updates[-1][0] == {"log_id": "wl_1", "status": {"$ne": "sent"}}
+        assert outbox.stats["retries"] == 1 and outbox.stats["failed"] == 1
+        print("✓ Failed deliveries retried, then marked failed")
+    
+    def test_delivered_and_expired_messages(self, memory_db):
+        outbox, db = self._outbox(memory_db, ok=True)
+        
+        asyncio.run(outbox.process(self._doc()))
+        assert db.notification_outbox.updates[-1][1]["$set"]["status"] == "sent"
+        assert db.whatsapp_logs.updates[-1][1]["$set"]["status"] == "sent"
+        
+        expired = self._doc(log_id=None, expires_at=datetime.now(timezone.utc) - timedelta(seconds=1))
+        asyncio.run(outbox.process(expired))
+        assert db.notification_outbox.updates[-1][1]["$set"]["status"] == "expired"
+        print("✓ Delivered and expired messages recorded")
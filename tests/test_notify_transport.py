@@ -0,0 +1,54 @@
+"""
+Tests for the pooled notification transport (notify_transport.py) against fake_provider.py
+"""
+
+import asyncio
+
+import httpx
+
+import fake_provider
+from notify_transport import NotifyTransport
+
+
+class TestNotifyTransport:
+    """Pooled transport against the fake provider, in-process"""
+    
+    def _transport(self):
+        transport = NotifyTransport(twilio_base="http://fake", sendgrid_base="http://fake",
+                                    transport=httpx.ASGITransport(app=fake_provider.app))
+        transport.twilio_sid, transport.twilio_token, transport.whatsapp_from = "ACtest", "token", "+10000000000"
+        transport.sendgrid_key = "SG.test"
+        return transport
+    
+    def test_messages_reach_the_fake_provider(self):
+        async def run():
+            transport = self._transport()
+            whatsapp = await transport.deliver({"channel": "whatsapp", "to": "+911234", "body": "Hello"})
+            email = await transport.send_winner_email("a@b.c", "Asha", "Top Line", 500, "Sunday Game")
+            await transport.close()
+            return whatsapp, email
+        
+        fake_provider.received.clear()
+        fake_provider.fake_config.update({"latency_ms": 0.0, "failure_rate": 0.0})
+        whatsapp, email = asyncio.run(run())
+        assert whatsapp[0] and whatsapp[1].startswith("SM") and email[0]
+        assert [(m["provider"], m["to"]) for m in fake_provider.received] == [
+            ("twilio", "whatsapp:+911234"), ("sendgrid", "a@b.c")
+        ]
+        assert fake_provider.received[0]["body"] == "Hello"
+        print("✓ WhatsApp and email delivered to the fake provider")
+    
+    def test_injected_failures_are_reported(self):
+        async def run():
+            transport = self._transport()
+            result = await transport.send_whatsapp("+911234", "Hello")
+            await transport.close()
+            return result
+        
+        fake_provider.fake_config.update({"latency_ms": 0.0, "failure_rate": 1.0})
+        try:
+            ok, error = asyncio.run(run())
+        finally:
+            fake_provider.fake_config["failure_rate"] = 0.0
+        assert not ok and error.startswith("Twilio 500")
+        print("✓ Provider failures surface as errors")
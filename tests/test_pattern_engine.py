@@ -0,0 +1,83 @@
+"""
+Tests for declarative prize patterns (pattern_engine.py)
+"""
+
+import pytest
+
+from pattern_engine import (
+    BUILTIN_DEFINITIONS, PRESET_PATTERNS, compile_pattern, is_complete, numbers_mask,
+    validate_custom_patterns, validate_pattern_definition
+)
+from prize_plan import compile_prize_plan, get_prize_plan
+from ticket_generator import generate_authentic_ticket
+from winner_detection import (
+    check_early_five, check_top_line, check_middle_line,
+    check_bottom_line, check_four_corners, check_full_house, check_pattern
+)
+
+
+class TestPatternEngine:
+    """Declarative patterns compile to per-ticket masks"""
+    
+    def test_builtins_match_hardcoded_checks(self):
+        """Built-in definitions agree with the check_* functions"""
+        import random
+        checks = {
+            "early_five": check_early_five, "four_corners": check_four_corners,
+            "top_line": check_top_line, "middle_line": check_middle_line,
+            "bottom_line": check_bottom_line, "full_house": check_full_house,
+        }
+        definitions = {k: validate_pattern_definition(d) for k, d in BUILTIN_DEFINITIONS.items()}
+        rng = random.Random(7)
+        for _ in range(200):
+            ticket = generate_authentic_ticket()
+            numbers = [n for row in ticket for n in row if n]
+            called = set(rng.sample(numbers, rng.randint(0, 15)))
+            for pattern, check in checks.items():
+                compiled = compile_pattern(definitions[pattern], ticket)
+                assert is_complete(compiled, numbers_mask(called)) == check(ticket, called), pattern
+        print("✓ Built-in definitions match hard-coded checks")
+    
+    def test_presets_compile_on_every_ticket(self):
+        """Presets validate and select the expected number of cells"""
+        expected = {"Pyramid": 6, "Star": 5, "First Column": 3, "Last Column": 3}
+        presets = validate_custom_patterns(PRESET_PATTERNS)
+        for _ in range(50):
+            ticket = generate_authentic_ticket()
+            for preset in presets:
+                compiled = compile_pattern(preset, ticket)
+                assert compiled, preset["name"]
+                if preset["name"] in expected:
+                    assert compiled[0][0].bit_count() == expected[preset["name"]]
+        print(f"✓ {len(presets)} presets compile")
+    
+    def test_invalid_definitions_rejected(self):
+        """Malformed definitions raise ValueError"""
+        bad = [
+            {"cells": [{"row": 0}]},
+            {"name": "X", "cells": [{"row": 3}]},
+            {"name": "X", "cells": [{"row": 0, "column": 1}]},
+            {"name": "X", "cells": [{"row": 0, "position": "centre"}]},
+            {"name": "X", "cells": [{"all": True}], "need": 16},
+            {"name": "X", "cells": [{"cell": ["a", 1]}]},
+            {"name": "X", "cells": [{"cell": [0, None]}]},
+        ]
+        for definition in bad:
+            with pytest.raises(ValueError):
+                validate_pattern_definition(definition)
+        with pytest.raises(ValueError):
+            validate_custom_patterns([{"name": "Star", "cells": [{"row": 0}]}, {"name": "star", "cells": [{"row": 1}]}])
+        print("✓ Invalid definitions rejected")
+    
+    def test_custom_pattern_in_prize_plan(self):
+        """A prize named after a custom pattern is detected with it"""
+        custom = validate_custom_patterns([p for p in PRESET_PATTERNS if p["name"] == "First Column"])
+        plan = compile_prize_plan({"First Column": 200, "Top Line": 100}, custom)
+        assert plan["by_pattern"] == {"custom:first_column": "First Column", "top_line": "Top Line"}
+        
+        ticket = generate_authentic_ticket()
+        firsts = [[n for n in row if n][0] for row in ticket]
+        assert check_pattern(ticket, set(firsts), "custom:first_column", plan["custom_patterns"])
+        assert not check_pattern(ticket, set(firsts[:2]), "custom:first_column", plan["custom_patterns"])
+        assert get_prize_plan({"prizes": {"First Column": 200, "Top Line": 100}, "prize_plan": plan}) is not plan
+        print("✓ Custom pattern resolved through the prize plan")
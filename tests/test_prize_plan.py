@@ -0,0 +1,52 @@
+"""
+Tests for per-game prize plans (prize_plan.py)
+"""
+
+from prize_plan import compile_prize_plan, get_prize_plan, resolve_pattern, unclaimed_prizes
+from ticket_generator import generate_authentic_ticket
+from winner_detection import check_all_winners
+
+
+class TestPrizePlan:
+    """Prize names are resolved to pattern IDs once per game"""
+    
+    def test_resolves_name_variants(self):
+        """Free-form prize names map to canonical patterns"""
+        expected = {
+            "Quick Five": "early_five", "Early 5": "early_five", "4 Corners": "four_corners",
+            "First Line": "top_line", "middle_line": "middle_line", "Third Line": "bottom_line",
+            "2nd Full House": "full_house", "Full Sheet Bonus": "full_sheet_bonus", "Lucky Seven": None,
+        }
+        for name, pattern in expected.items():
+            assert resolve_pattern(name) == pattern, name
+        print("✓ Prize names resolved")
+    
+    def test_full_houses_ordered_by_rank(self):
+        """Full houses are awarded 1st, 2nd, 3rd regardless of dict order"""
+        plan = compile_prize_plan({
+            "3rd Full House": 300, "Top Line": 100, "1st Full House": 1000,
+            "2nd Full House": 500, "Lucky Seven": 50,
+        })
+        assert plan["full_house_order"] == ["1st Full House", "2nd Full House", "3rd Full House"]
+        assert plan["by_pattern"] == {"top_line": "Top Line"}
+        assert plan["full_sheet_bonus"] == "Full Sheet Bonus"
+        assert plan["unmatched"] == ["Lucky Seven"]
+        assert [e["name"] for e in unclaimed_prizes(plan, {"Top Line": {}})][0] == "1st Full House"
+        print("✓ Full house order and unmatched prizes")
+    
+    def test_stale_plan_recompiled(self):
+        """A stored plan is reused only while the prize names are unchanged"""
+        plan = compile_prize_plan({"Top Line": 100})
+        assert get_prize_plan({"prizes": {"Top Line": 100}, "prize_plan": plan}) is plan
+        fresh = get_prize_plan({"prizes": {"Bottom Line": 100}, "prize_plan": plan})
+        assert fresh["by_pattern"] == {"bottom_line": "Bottom Line"}
+        print("✓ Stale plan recompiled")
+    
+    def test_check_all_winners_uses_resolved_pattern(self):
+        """Single-ticket checks follow the resolved pattern, not substrings"""
+        ticket = generate_authentic_ticket()
+        top_row = [n for n in ticket[0] if n]
+        assert check_all_winners({"numbers": ticket}, top_row, "First Line")
+        assert not check_all_winners({"numbers": ticket}, top_row, "First Full House")
+        assert not check_all_winners({"numbers": ticket}, top_row, "Lucky Seven")
+        print("✓ check_all_winners follows the plan's patterns")
@@ -0,0 +1,85 @@
+"""
+Tests for the vectorized whole-game ticket audit (ticket_audit.py)
+"""
+
+from ticket_audit import audit_game_tickets
+from ticket_generator import COLUMN_RANGES, encode_ticket_compact, generate_unique_full_sheets
+
+
+class TestBulkAudit:
+    """Tests for the vectorized whole-game ticket audit"""
+    
+    @staticmethod
+    def _sheet_docs(num_sheets, packed=True, grid=None):
+        docs = []
+        for sheet_index, sheet in enumerate(generate_unique_full_sheets(num_sheets)):
+            for ticket in sheet:
+                doc = {"ticket_number": f"T{len(docs) + 1:03d}", "full_sheet_id": f"FS{sheet_index + 1:03d}"}
+                if packed:
+                    doc["numbers_packed"] = encode_ticket_compact(ticket)
+                if grid or (grid is None and not packed):
+                    doc["numbers"] = ticket
+                docs.append(doc)
+        return docs
+    
+    def test_valid_game_passes(self):
+        """Generated games pass in both storage forms"""
+        for packed in (True, False):
+            result = audit_game_tickets(self._sheet_docs(50, packed))
+            assert result["valid"], f"Valid game flagged: {result}"
+            assert result["tickets_checked"] == 300
+            assert result["sheets_checked"] == 50
+        print("✓ 300-ticket game passes audit (packed and grid forms)")
+    
+    def test_compact_tickets_audit_both_forms(self):
+        """A broken "numbers" grid is reported even when its packed form is valid"""
+        docs = self._sheet_docs(2, packed=True, grid=True)
+        assert audit_game_tickets(docs)["valid"]
+        
+        # Descending column in the stored grid; decoding the packed form would sort it
+        col = next(c for c in range(9) if docs[0]["numbers"][0][c] and docs[0]["numbers"][1][c])
+        docs[0]["numbers"][0][col], docs[0]["numbers"][1][col] = docs[0]["numbers"][1][col], docs[0]["numbers"][0][col]
+        
+        result = audit_game_tickets(docs)
+        assert result["grids_cross_checked"] == 12
+        assert result["invalid_tickets"] == [{
+            "ticket_number": "T001",
+            "errors": ["Column not in ascending order", "Numbers grid does not match numbers_packed"]
+        }]
+        print("✓ Compact tickets audited in both stored forms")
+    
+    def test_reports_only_violations(self):
+        """Each broken rule is reported against its ticket and sheet"""
+        docs = self._sheet_docs(2, packed=False)
+        
+        # Swap a column's numbers so it descends
+        col = next(c for c in range(9) if docs[0]["numbers"][0][c] and docs[0]["numbers"][1][c])
+        docs[0]["numbers"][0][col], docs[0]["numbers"][1][col] = docs[0]["numbers"][1][col], docs[0]["numbers"][0][col]
+        # Empty a row
+        docs[1]["numbers"][0] = [None] * 9
+        # Put a number outside its column range
+        col = next(c for c in range(9) if docs[2]["numbers"][2][c])
+        docs[2]["numbers"][2][col] = COLUMN_RANGES[col][1] + 1 if col < 8 else 5
+        
+        result = audit_game_tickets(docs)
+        invalid = {t["ticket_number"]: t["errors"] for t in result["invalid_tickets"]}
+        assert invalid.keys() == {"T001", "T002", "T003"}
+        assert invalid["T001"] == ["Column not in ascending order"]
+        assert "Row does not have exactly 5 numbers" in invalid["T002"]
+        assert "Number outside its column range" in invalid["T003"]
+        assert [s["full_sheet_id"] for s in result["invalid_sheets"]] == ["FS001"]
+        print("✓ Audit reports only the 3 broken tickets and their sheet")
+    
+    def test_numbers_beyond_cell_range_reported(self):
+        """Numbers that do not fit a uint8 cell are range violations, not crashes"""
+        docs = self._sheet_docs(1, packed=False)
+        col = next(c for c in range(9) if docs[0]["numbers"][0][c])
+        docs[0]["numbers"][0][col] = 300
+        col = next(c for c in range(9) if docs[1]["numbers"][1][c])
+        docs[1]["numbers"][1][col] = -4
+        
+        result = audit_game_tickets(docs)
+        invalid = {t["ticket_number"]: t["errors"] for t in result["invalid_tickets"]}
+        assert invalid.keys() == {"T001", "T002"}
+        assert all("Number outside its column range" in errors for errors in invalid.values())
+        print("✓ Out-of-range numbers reported without overflow")
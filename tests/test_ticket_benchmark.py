@@ -0,0 +1,42 @@
+"""
+Tests for the ticket generator benchmark and path statistics (ticket_benchmark.py)
+"""
+
+import pytest
+
+import ticket_benchmark
+import ticket_generator
+from ticket_generator import generate_authentic_ticket, generate_full_sheet
+
+
+class TestGeneratorBenchmark:
+    """Latency regression gate for the ticket generator"""
+    
+    @pytest.mark.benchmark
+    def test_within_latency_budgets(self):
+        """Generator stays inside the benchmark's regression thresholds"""
+        results = ticket_benchmark.run_benchmark(tickets=300, sheets=100, batch_sizes=[100])
+        failures = ticket_benchmark.check_regressions(results)
+        assert not failures, f"Generator regressed: {failures}"
+        print(f"✓ sheet p99 {results['sheet']['p99_ms']:.3f}ms, fallback share {results['fallback_share']:.2%}")
+    
+    def test_path_statistics_recorded(self):
+        """Every generated ticket and sheet is attributed to a path"""
+        ticket_benchmark.reset_generator_stats()
+        for _ in range(20):
+            generate_full_sheet()
+            generate_authentic_ticket()
+        stats = ticket_benchmark.get_generator_stats()
+        assert sum(sum(h.values()) for p, h in stats.items() if p.startswith("sheet.")) == 20
+        assert sum(sum(h.values()) for p, h in stats.items() if p.startswith("ticket.")) == 20
+        print(f"✓ Path statistics: {stats}")
+    
+    def test_nested_last_resort_recorded_under_its_own_path(self, monkeypatch):
+        """A sheet the smart path hands to the last resort is not counted as smart"""
+        ticket_benchmark.reset_generator_stats()
+        monkeypatch.setattr(ticket_generator, "_try_generate_full_sheet_v2", lambda: None)
+        monkeypatch.setattr(ticket_generator, "_generate_full_sheet_smart", lambda: None)
+        generate_full_sheet(max_attempts=60)
+        stats = ticket_benchmark.get_generator_stats()
+        assert stats == {"sheet.smart.last_resort": {51: 1}}
+        print(f"✓ Nested fallback recorded: {stats}")
@@ -18,7 +18,17 @@ from ticket_generator import (
     generate_full_sheet,
     validate_ticket,
     _validate_full_sheet,
-    COLUMN_RANGES
+    encode_ticket_compact,
+    decode_ticket_compact,
+    get_ticket_grid,
+    ticket_bitmap,
+    PACKED_TICKET_SIZE,
+    COLUMN_RANGES,
+    LAYOUT_CATALOGUE,
+    LAYOUT_COUNT,
+    ticket_layout_mask,
+    ticket_fingerprint,
+    generate_unique_full_sheets
 )
 
 
@@ -317,6 +327,98 @@ class TestColumnRangeDistribution:
         print(f"✓ Full sheet column distribution is correct: {col_counts}")
 
 
+class TestLayoutCatalogue:
+    """Tests for the precomputed layout catalogue"""
+    
+    def test_catalogue_is_complete_and_valid(self):
+        """All 735,210 layouts have 5 per row and 1-3 per column"""
+        assert LAYOUT_COUNT == 735210
+        assert len(set(LAYOUT_CATALOGUE.tolist())) == LAYOUT_COUNT
+        for row in range(3):
+            row_bits = (LAYOUT_CATALOGUE >> (row * 9)) & 0x1FF
+            assert all(bin(int(m)).count("1") == 5 for m in row_bits[::997])
+        columns = (LAYOUT_CATALOGUE | (LAYOUT_CATALOGUE >> 9) | (LAYOUT_CATALOGUE >> 18)) & 0x1FF
+        assert (columns == 0x1FF).all(), "Some layout leaves a column empty"
+        print(f"✓ {LAYOUT_COUNT} unique valid layouts")
+    
+    def test_tickets_use_catalogue_layouts(self):
+        """Generated tickets take their layout from the catalogue"""
+        catalogue = set(LAYOUT_CATALOGUE.tolist())
+        for _ in range(200):
+            ticket = generate_authentic_ticket()
+            assert ticket_layout_mask(ticket) in catalogue
+        print("✓ 200 tickets use catalogue layouts")
+
+
+class TestCompactEncoding:
+    """Tests for the packed "numbers_packed" ticket encoding"""
+    
+    def test_round_trip_single_tickets(self):
+        """Decoding an encoded ticket returns the original grid"""
+        for _ in range(200):
+            ticket = generate_authentic_ticket()
+            packed = encode_ticket_compact(ticket)
+            assert len(packed) == PACKED_TICKET_SIZE
+            assert decode_ticket_compact(packed) == ticket
+        print("✓ 200 tickets survive encode/decode round trip")
+    
+    def test_round_trip_full_sheet(self):
+        """Every ticket of a full sheet round-trips"""
+        for ticket in generate_full_sheet():
+            assert decode_ticket_compact(encode_ticket_compact(ticket)) == ticket
+        print("✓ Full sheet tickets survive encode/decode round trip")
+    
+    def test_get_ticket_grid_accepts_either_form(self):
+        """Read path accepts the grid or the packed field"""
+        ticket = generate_authentic_ticket()
+        packed = encode_ticket_compact(ticket)
+        assert get_ticket_grid({"numbers": ticket}) == ticket
+        assert get_ticket_grid({"numbers_packed": packed}) == ticket
+        assert get_ticket_grid({}) == []
+        print("✓ get_ticket_grid() reads both forms")
+    
+    def test_bitmap_matches_numbers(self):
+        """90-bit bitmap has exactly the ticket's numbers set"""
+        ticket = generate_authentic_ticket()
+        bitmap = ticket_bitmap(ticket)
+        numbers = {n for row in ticket for n in row if n}
+        assert {n for n in range(1, 91) if bitmap >> (n - 1) & 1} == numbers
+        print("✓ ticket_bitmap() matches ticket numbers")
+    
+    def test_encode_rejects_incomplete_ticket(self):
+        """Tickets without 15 numbers cannot be packed"""
+        ticket = generate_authentic_ticket()
+        ticket[0] = [None] * 9
+        with pytest.raises(ValueError):
+            encode_ticket_compact(ticket)
+        print("✓ encode_ticket_compact() rejects incomplete tickets")
+
+
+class TestFingerprints:
+    """Tests for duplicate-ticket fingerprints"""
+    
+    def test_fingerprint_ignores_layout(self):
+        """Same numbers in a different layout give the same fingerprint"""
+        ticket = generate_authentic_ticket()
+        reordered = [ticket[2], ticket[1], ticket[0]]
+        assert ticket_fingerprint(reordered) == ticket_fingerprint(ticket)
+        assert len(ticket_fingerprint(ticket)) == 23
+        print("✓ Fingerprint depends only on the number set")
+    
+    def test_unique_full_sheets(self):
+        """No ticket repeats across sheets or the existing fingerprints"""
+        existing = generate_full_sheet()
+        existing_fingerprints = {ticket_fingerprint(t) for t in existing}
+        sheets = generate_unique_full_sheets(50, existing_fingerprints)
+        fingerprints = [ticket_fingerprint(t) for sheet in sheets for t in sheet]
+        assert len(sheets) == 50
+        assert len(set(fingerprints)) == 300
+        assert existing_fingerprints.isdisjoint(fingerprints)
+        for sheet in sheets:
+            assert _validate_full_sheet(sheet)
+        print("✓ 50 sheets / 300 tickets with unique fingerprints")
+
+
 class TestWhatsAppNumberUpdate:
     """Test that WhatsApp number was updated in GameDetails.js"""
     
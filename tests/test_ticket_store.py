@@ -0,0 +1,94 @@
+"""
+Tests for the memory-mapped per-game ticket store (ticket_store.py)
+"""
+
+import os
+
+import pytest
+
+import ticket_store
+from ticket_generator import generate_full_sheet
+
+
+class TestTicketStore:
+    """Tests for the memory-mapped per-game ticket store"""
+    
+    @pytest.fixture
+    def ticket_docs(self):
+        docs = []
+        for sheet_index in range(3):
+            for position, ticket in enumerate(generate_full_sheet(), start=1):
+                docs.append({
+                    "ticket_id": f"TKT_{len(docs)}",
+                    "ticket_number": f"T{len(docs) + 1:03d}",
+                    "full_sheet_id": f"FS{sheet_index + 1:03d}",
+                    "ticket_position_in_sheet": position,
+                    "numbers": ticket
+                })
+        return docs
+    
+    @pytest.fixture(autouse=True)
+    def store_dir(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(ticket_store, "STORE_DIR", tmp_path)
+    
+    def test_round_trip(self, ticket_docs):
+        """Grids read from the mapped file match the ticket documents"""
+        ticket_store.write_ticket_store("game_test", ticket_docs)
+        store = ticket_store.open_ticket_store("game_test")
+        assert len(store) == len(ticket_docs)
+        assert store.checksum_ok()
+        for doc in ticket_docs:
+            assert store.grid(doc["ticket_number"]) == doc["numbers"]
+        assert store.grid("T999") is None
+        print("✓ Ticket store round-trips 18 tickets")
+    
+    def test_verify_detects_drift(self, ticket_docs):
+        """Verification flags tickets that differ from the Mongo copy"""
+        ticket_store.write_ticket_store("game_test", ticket_docs)
+        store = ticket_store.open_ticket_store("game_test")
+        assert ticket_store.verify_ticket_store(store, ticket_docs)["valid"]
+        
+        ticket_docs[0]["numbers"] = ticket_docs[1]["numbers"]
+        result = ticket_store.verify_ticket_store(store, ticket_docs[:-1])
+        assert not result["valid"]
+        assert result["mismatched_tickets"] == [1]
+        assert result["extra_in_store"] == [len(ticket_docs)]
+        print("✓ verify_ticket_store() reports mismatched and extra tickets")
+    
+    def test_concurrent_writers_use_their_own_temp_file(self, ticket_docs, tmp_path):
+        """Writers racing on one game each swap in a complete file and leave no temp files"""
+        from concurrent.futures import ThreadPoolExecutor
+        
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda n: ticket_store.write_ticket_store("game_test", ticket_docs[:n]), [6, 12] * 8))
+        
+        store = ticket_store.open_ticket_store("game_test")
+        assert store is not None and len(store) in (6, 12)
+        assert [p.name for p in tmp_path.iterdir()] == [ticket_store.ticket_store_path("game_test").name]
+        print("✓ Concurrent writers do not share a temp file")
+    
+    def test_rejects_corrupt_file(self, ticket_docs, tmp_path):
+        """A truncated file is not opened"""
+        path = ticket_store.write_ticket_store("game_test", ticket_docs)
+        path.write_bytes(path.read_bytes()[:-5])
+        assert ticket_store.open_ticket_store("game_test") is None
+        print("✓ Truncated ticket store is rejected")
+    
+    def test_cached_store_follows_file_replaced_elsewhere(self, ticket_docs):
+        """A file swapped in by another worker is picked up and the old map closed"""
+        ticket_store.write_ticket_store("game_test", ticket_docs)
+        old = ticket_store.open_ticket_store("game_test")
+        assert ticket_store.open_ticket_store("game_test") is old
+        
+        # Another process rewrites the file without touching this process's cache
+        other = ticket_store.write_ticket_store("game_other", ticket_docs[:6])
+        os.replace(other, ticket_store.ticket_store_path("game_test"))
+        
+        store = ticket_store.open_ticket_store("game_test")
+        assert store is not old and len(store) == 6
+        assert old.records is None and old._mmap.closed
+        
+        ticket_store.ticket_store_path("game_test").unlink()
+        assert ticket_store.open_ticket_store("game_test") is None
+        assert store._mmap.closed
+        print("✓ Stale cached store replaced and closed")
@@ -0,0 +1,104 @@
+"""
+Tests for the content-addressed TTS audio cache and its HTTP helpers (tts_cache.py)
+"""
+
+import asyncio
+
+import pytest
+
+from tts_cache import TTSAudioCache, audio_etag, etag_matches, is_cache_key, parse_byte_range, tts_cache_key
+
+
+class TestTTSCache:
+    """Synthesized call audio is cached by content hash in memory and on disk"""
+    
+    def test_key_normalizes_text_and_speed(self):
+        key = tts_cache_key("Number  7,\nlucky seven", "nova", 1, "tts-1")
+        assert key == tts_cache_key("Number 7, lucky seven", "nova", 1.0, "tts-1")
+        assert key != tts_cache_key("Number 7, lucky seven", "onyx", 1.0, "tts-1")
+        assert key != tts_cache_key("Number 7, lucky seven", "nova", 1.25, "tts-1")
+        print("✓ Cache key covers text, voice, speed and model")
+    
+    def test_memory_then_disk_hits(self, tmp_path):
+        calls = []
+        
+        async def generate():
+            calls.append(1)
+            return b"mp3-audio"
+        
+        async def scenario():
+            cache = TTSAudioCache(tmp_path)
+            assert await cache.get_or_generate("ab" * 32, generate) == (b"mp3-audio", False)
+            assert await cache.get_or_generate("ab" * 32, generate) == (b"mp3-audio", True)
+            # A new process finds the clip on disk
+            restarted = TTSAudioCache(tmp_path)
+            assert await restarted.get_or_generate("ab" * 32, generate) == (b"mp3-audio", True)
+            return cache, restarted
+        
+        cache, restarted = asyncio.run(scenario())
+        assert len(calls) == 1
+        assert cache.stats["memory_hits"] == 1 and restarted.stats["disk_hits"] == 1
+        assert cache.get_stats()["hit_rate"] == 0.5
+        print("✓ Memory and disk tiers both serve hits")
+    
+    def test_eviction_by_size(self, tmp_path):
+        async def scenario():
+            cache = TTSAudioCache(tmp_path, memory_bytes=20, disk_bytes=25)
+            for i in range(3):
+                await cache.put(f"{i:02d}" * 32, bytes(10))
+            await cache.get(f"{1:02d}" * 32)   # touch, so "02" is now the oldest
+            await cache.put("03" * 32, bytes(10))
+            return cache
+        
+        cache = asyncio.run(scenario())
+        assert cache.memory_bytes <= 20 and cache.disk_bytes <= 25
+        assert list(cache.disk) == ["01" * 32, "03" * 32]
+        assert not (tmp_path / "00" / f"{'00' * 32}.mp3").exists()
+        assert cache.stats["evictions"] == 2
+        print("✓ Least recently used clips are evicted by size")
+    
+    def test_concurrent_misses_generate_once(self, tmp_path):
+        calls = []
+        
+        async def generate():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return b"clip"
+        
+        async def scenario():
+            cache = TTSAudioCache(tmp_path)
+            return await asyncio.gather(*(cache.get_or_generate("cd" * 32, generate) for _ in range(5)))
+        
+        results = asyncio.run(scenario())
+        assert len(calls) == 1
+        assert [audio for audio, _ in results] == [b"clip"] * 5
+        assert sum(1 for _, hit in results if not hit) == 1
+        print("✓ Concurrent requests share one synthesis")
+    
+    def test_byte_ranges(self):
+        assert parse_byte_range(None, 100) is None
+        assert parse_byte_range("bytes=0-9", 100) == (0, 9)
+        assert parse_byte_range("bytes=90-", 100) == (90, 99)
+        assert parse_byte_range("bytes=-10", 100) == (90, 99)
+        assert parse_byte_range("bytes=50-500", 100) == (50, 99)
+        assert parse_byte_range("bytes=0-1,5-6", 100) is None   # multipart ranges: serve it all
+        for unsatisfiable in ("bytes=100-", "bytes=9-5", "bytes=-0"):
+            with pytest.raises(ValueError):
+                parse_byte_range(unsatisfiable, 100)
+        print("✓ Range headers parsed for partial audio responses")
+    
+    def test_serving_helpers(self, tmp_path):
+        key = tts_cache_key("Number 1", "nova", 1.0, "tts-1")
+        assert is_cache_key(key) and not is_cache_key("../" + key[3:]) and not is_cache_key(key.upper())
+        etag = audio_etag(b"clip")
+        assert etag_matches(etag, etag) and etag_matches(f'"x", {etag}', etag) and etag_matches("*", etag)
+        assert not etag_matches(None, etag) and not etag_matches('"other"', etag)
+        
+        async def scenario():
+            cache = TTSAudioCache(tmp_path)
+            await cache.put(key, b"clip")
+            return cache, await cache.get(key, count=False)
+        
+        cache, audio = asyncio.run(scenario())
+        assert audio == b"clip" and cache.stats["memory_hits"] == 0
+        print("✓ Audio URLs validated, ETags matched, serving leaves hit rate alone")
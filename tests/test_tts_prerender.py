@@ -0,0 +1,69 @@
+"""
+Tests for number-call audio pre-rendering (tts_prerender.py, call_names.py)
+"""
+
+import asyncio
+import os
+
+import pytest
+
+from call_names import TAMBOLA_CALLS
+from tts_cache import TTSAudioCache, tts_cache_key
+from tts_prerender import COMPLETED, PrerenderJob, get_prerender_job, prerender_texts, start_prerender
+
+
+class TestTTSPrerender:
+    """Number-call audio is rendered into the TTS cache when a game starts"""
+    
+    def test_texts_match_frontend_call_names(self):
+        frontend = os.path.join(os.path.dirname(__file__), "..", "frontend", "src", "utils", "tambolaCallNames.js")
+        if not os.path.exists(frontend):
+            pytest.skip("frontend sources not available")
+        with open(frontend) as f:
+            content = f.read()
+        for number, call in TAMBOLA_CALLS.items():
+            assert f'{number}: "{call}"' in content, f"Call name for {number} differs from the frontend"
+        assert len(prerender_texts()) == 90
+        assert len(prerender_texts(["Ready?", "Housie!"], include_prefixes=True)) == 270
+        print("✓ Pre-rendered texts are the frontend's call names")
+    
+    def test_job_renders_missing_clips_only(self, tmp_path):
+        synthesized = []
+        
+        async def synthesize(text, voice, speed):
+            synthesized.append(text)
+            if text == TAMBOLA_CALLS[13]:
+                raise RuntimeError("provider error")
+            return text.encode()
+        
+        async def scenario():
+            cache = TTSAudioCache(tmp_path)
+            await cache.put(tts_cache_key(TAMBOLA_CALLS[1], "nova", 1.0, "tts-1"), b"clip")
+            job = PrerenderJob("game_1", prerender_texts(), "nova", 1.0, "tts-1", synthesize, cache, concurrency=3)
+            await job.run()
+            return job, cache
+        
+        job, cache = asyncio.run(scenario())
+        progress = job.progress()
+        assert progress["status"] == COMPLETED and progress["percent"] == 100.0
+        assert (progress["rendered"], progress["cached"], progress["failed"]) == (88, 1, 1)
+        assert progress["errors"] == [{"text": TAMBOLA_CALLS[13], "error": "provider error"}]
+        assert len(synthesized) == 89 and cache.get_cached(tts_cache_key(TAMBOLA_CALLS[90], "nova", 1.0, "tts-1"))
+        print("✓ Pre-render skips cached clips and reports failures")
+    
+    def test_running_job_is_reused(self, tmp_path):
+        async def synthesize(text, voice, speed):
+            await asyncio.sleep(0.001)
+            return b"clip"
+        
+        async def scenario():
+            cache = TTSAudioCache(tmp_path)
+            first = start_prerender("game_2", prerender_texts(), "nova", 1.0, "tts-1", synthesize, cache)
+            second = start_prerender("game_2", prerender_texts(), "nova", 1.0, "tts-1", synthesize, cache)
+            await first._task
+            return first, second
+        
+        first, second = asyncio.run(scenario())
+        assert first is second and get_prerender_job("game_2") is first
+        assert first.progress()["rendered"] == 90
+        print("✓ One pre-render job per game")
@@ -0,0 +1,62 @@
+"""
+Tests for per-voice number-call sprites (tts_sprite.py)
+"""
+
+import asyncio
+
+import pytest
+
+from tts_cache import TTSAudioCache
+from tts_sprite import build_sprite, get_sprite_manifest, join_clips, mp3_frames, start_sprite_build
+
+
+def _mp3_clip(frames, info_frame=False, id3=False):
+    """Silent MPEG-1 Layer III clip: 128 kbps, 44.1 kHz, 417-byte frames of 1152 samples"""
+    frame = b"\xff\xfb\x90\x00" + bytes(413)
+    info = b"\xff\xfb\x90\x00" + bytes(32) + b"Info" + bytes(377)
+    tag = b"ID3\x04\x00\x00\x00\x00\x00\x05" + bytes(5) if id3 else b""
+    return tag + (info if info_frame else b"") + frame * frames
+
+
+class TestTTSSprite:
+    """All 90 calls of a voice are joined into one mp3 sprite with an offset manifest"""
+    
+    def test_frames_are_parsed_and_tags_dropped(self):
+        clip = _mp3_clip(3, info_frame=True, id3=True)
+        frames = list(mp3_frames(clip))
+        assert [offset for offset, _, _, _ in frames] == [15, 432, 849, 1266]
+        assert all(length == 417 and samples == 1152 and rate == 44100 for _, length, samples, rate in frames)
+        
+        audio, spans = join_clips([clip, _mp3_clip(2)])
+        assert len(audio) == 5 * 417
+        frame_ms = 1152 * 1000 / 44100
+        assert spans == [(0.0, round(3 * frame_ms, 3)), (round(3 * frame_ms, 3), round(2 * frame_ms, 3))]
+        with pytest.raises(ValueError):
+            join_clips([b"not an mp3"])
+        print("✓ Clips joined frame by frame with their offsets")
+    
+    def test_build_and_store_manifest(self, tmp_path, memory_db):
+        synthesized = []
+        
+        async def synthesize(text, voice, speed):
+            synthesized.append(text)
+            return _mp3_clip(1 + len(synthesized) % 3, info_frame=True)
+        
+        async def scenario():
+            cache = TTSAudioCache(tmp_path)
+            db = memory_db
+            await start_sprite_build(db, "nova", 1.0, "tts-1", synthesize, cache)
+            manifest = await get_sprite_manifest(db, "nova", 1.0, "tts-1", cache)
+            rebuilt = await build_sprite("nova", 1.0, "tts-1", synthesize, cache)
+            return cache, manifest, rebuilt
+        
+        cache, manifest, rebuilt = asyncio.run(scenario())
+        assert len(synthesized) == 90
+        assert list(manifest["sprite"]) == [str(n) for n in range(1, 91)]
+        assert manifest["url"] == f"/api/tts/audio/{manifest['sprite_key']}.mp3"
+        assert cache.contains(manifest["sprite_key"]) and manifest["bytes"] == len(cache.memory[manifest["sprite_key"]])
+        offset, duration = manifest["sprite"]["90"]
+        assert round(offset + duration, 3) == manifest["duration_ms"]
+        # Same clips -> same sprite, without synthesizing again
+        assert rebuilt["sprite_key"] == manifest["sprite_key"]
+        print("✓ Sprite built once per voice from cached clips")